@@ -1,17 +1,40 @@
 """API endpoints"""
+from datetime import date
 from typing import List, Union
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends
+from sqlalchemy import literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
-from lib.models import Lift, Resort, Trail
-from lib.postgres import get_api_db
+from lib.models import Lift, Resort, ResortRead, Trail
+from lib.postgres import get_api_db, get_session
 from lib import schemas
 
 
 router = APIRouter()
 
 
+def record_read(resort_id: str) -> None:
+    """
+    Count a read of this resort's data, so the webscraper can prioritize it. Reads of
+    resorts that don't exist aren't counted.
+    """
+    statement = pg_insert(ResortRead).from_select(
+        ["resort_id", "read_on", "count"],
+        select(Resort.id, literal(date.today()), literal(1)).where(
+            Resort.id == resort_id
+        ),
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[ResortRead.resort_id, ResortRead.read_on],
+        set_={"count": ResortRead.count + 1},
+    )
+    with get_session() as session:
+        session.execute(statement)
+        session.commit()
+
+
 @router.get(
     "/resorts", response_model=Union[List[schemas.ResortWithUser], List[schemas.Resort]]
 )
@@ -21,14 +44,24 @@ def get_resorts(db_session: Session = Depends(get_api_db)):
 
 
 @router.get("/resorts/{resort_id}", response_model=schemas.Resort)
-def get_resort_by_id(resort_id: str, db_session: Session = Depends(get_api_db)):
+def get_resort_by_id(
+    resort_id: str,
+    background_tasks: BackgroundTasks,
+    db_session: Session = Depends(get_api_db),
+):
     """Return a single resort"""
+    background_tasks.add_task(record_read, resort_id)
     return db_session.query(Resort).filter_by(id=resort_id).one()
 
 
 @router.get("/resorts/{resort_id}/lifts", response_model=List[schemas.Lift])
-def get_lifts_by_resort(resort_id: str, db_session: Session = Depends(get_api_db)):
+def get_lifts_by_resort(
+    resort_id: str,
+    background_tasks: BackgroundTasks,
+    db_session: Session = Depends(get_api_db),
+):
     """Return all lifts for a given resort"""
+    background_tasks.add_task(record_read, resort_id)
     return (
         db_session.query(Lift)
         .filter_by(resort_id=resort_id)
@@ -38,8 +71,13 @@ def get_lifts_by_resort(resort_id: str, db_session: Session = Depends(get_api_db
 
 
 @router.get("/resorts/{resort_id}/trails", response_model=List[schemas.Trail])
-def get_trails_by_resort(resort_id: str, db_session: Session = Depends(get_api_db)):
+def get_trails_by_resort(
+    resort_id: str,
+    background_tasks: BackgroundTasks,
+    db_session: Session = Depends(get_api_db),
+):
     """Return all trails for a given resort"""
+    background_tasks.add_task(record_read, resort_id)
     return (
         db_session.query(Trail)
         .filter_by(resort_id=resort_id)
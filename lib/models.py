@@ -6,9 +6,11 @@ from sqlalchemy import (
     Column,
     Date,
     DateTime,
+    Float,
     Integer,
     String,
     ForeignKey,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.dialects.postgresql import JSONB
@@ -22,6 +24,7 @@ class Lift(Base):
     """
 
     __tablename__ = "lifts"
+    __table_args__ = (UniqueConstraint("resort_id", "unique_name"),)
     id = Column(String, primary_key=True)
     resort_id = Column(ForeignKey("resorts.id"))
     name = Column(String)
@@ -39,6 +42,7 @@ class Trail(Base):
     """
 
     __tablename__ = "trails"
+    __table_args__ = (UniqueConstraint("resort_id", "unique_name"),)
     id = Column(String, primary_key=True)
     resort_id = Column(ForeignKey("resorts.id"))
     name = Column(String)
@@ -68,6 +72,11 @@ class Resort(Base):
     id = Column(String, primary_key=True)
     name = Column(String)
     parser_name = Column(String)
+    # Either "browser" (the default) or "http", for reports that are rendered server-side
+    fetch_strategy = Column(String)
+    # Check report pages with a `HEAD` request first, and skip those that haven't changed.
+    # Only for reports whose lifts + trails are in the page itself, not loaded by scripts.
+    probe_reports = Column(Boolean)
     trail_report_url = Column(String)
     snow_report_url = Column(String)
     updated_at = Column(DateTime)
@@ -79,6 +88,24 @@ class Resort(Base):
     city = Column(String)
     state = Column(String)
     snow_report = Column(JSONB)
+    # Hash of the lifts + trails from the last trail report that was written
+    trail_report_hash = Column(String)
+    # ETag/Last-Modified/Content-Length headers last seen for each report URL
+    report_validators = Column(JSONB)
+    # "ok", "failed", or "timed_out"
+    last_scrape_status = Column(String)
+    consecutive_failures = Column(Integer)
+    # The resort isn't scraped again until this time
+    next_scrape_at = Column(DateTime)
+    # IANA timezone name, like "America/New_York"
+    timezone = Column(String)
+    # Moving average of how often scrapes find changed lifts or trails, from 0 to 1
+    change_rate = Column(Float)
+    last_opened_on = Column(Date)
+    # How watched the resort is (pins + API reads), relative to the most watched: 0 to 1
+    popularity = Column(Float)
+    # Names from `BLOCKED_RESOURCES` that the resort's reports need to load, or "*"
+    allowed_resources = Column(JSONB)
 
 
 class User(Base):
@@ -94,6 +121,61 @@ class User(Base):
     hashed_password = Column(String)
 
 
+class ResortRead(Base):
+    """
+    The number of times a resort's data was read through the API on a given day
+    """
+
+    __tablename__ = "resort_reads"
+    resort_id = Column(ForeignKey("resorts.id"), primary_key=True)
+    read_on = Column(Date, primary_key=True)
+    count = Column(Integer)
+
+
+class ScrapeJob(Base):
+    """
+    A resort's place in the webscraping queue, and which worker (if any) holds its lease
+    """
+
+    __tablename__ = "scrape_jobs"
+    resort_id = Column(ForeignKey("resorts.id"), primary_key=True)
+    worker_id = Column(String)
+    claimed_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    # The job can be claimed by another worker once this has passed
+    leased_until = Column(DateTime)
+
+
+class ScrapeRun(Base):
+    """
+    A single scrape of a resort: how it went, what it found, and how long each phase took
+    """
+
+    __tablename__ = "scrape_runs"
+    id = Column(String, primary_key=True)
+    resort_id = Column(ForeignKey("resorts.id"))
+    started_at = Column(DateTime)
+    status = Column(String)
+    error_class = Column(String)
+    parse_engine = Column(String)
+    # Lifts + trails found in the trail report, and how many of them were written
+    lifts = Column(Integer)
+    trails = Column(Integer)
+    changed_rows = Column(Integer)
+    # Whether the browser had already scraped other resorts, and how many pages it loaded
+    browser_reused = Column(Boolean)
+    browser_pages_loaded = Column(Integer)
+    total_seconds = Column(Float)
+    browser_wait_seconds = Column(Float)
+    page_load_seconds = Column(Float)
+    ready_wait_seconds = Column(Float)
+    capture_seconds = Column(Float)
+    lifts_seconds = Column(Float)
+    trails_seconds = Column(Float)
+    snow_report_seconds = Column(Float)
+    write_seconds = Column(Float)
+
+
 class UserResort(Base):
     """
     A resort that is currently pinned by a particular user
@@ -1,6 +1,8 @@
 """
 Utilities imported by whatever else
 """
+import hashlib
+import json
 import re
 from typing import List, Union
 from types import NoneType
@@ -57,6 +59,15 @@ def get_changes(model) -> dict:
     return changes
 
 
+def get_content_hash(data) -> str:
+    """
+    Return a stable hash of any JSON-serializable data, such that equal data always
+    hashes the same regardless of dict ordering.
+    """
+    serialized = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
 def get_inch_range_from_string(
     range_string: str, separator: str = "-"
 ) -> Union[dict, NoneType]:
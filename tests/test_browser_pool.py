@@ -0,0 +1,238 @@
+"""
+Tests for `BrowserPool`, with stand-ins for Chrome so that nothing is launched.
+"""
+import io
+import unittest
+from contextlib import ExitStack, redirect_stderr, redirect_stdout
+from threading import Event, Thread
+from typing import List
+from unittest.mock import patch
+
+from webscraper.browser_pool import BrowserPool
+
+
+class FakeSwitchTo:
+    """Stands in for `WebDriver.switch_to`."""
+
+    def __init__(self, browser: "FakeBrowser"):
+        self.browser = browser
+
+    def window(self, handle: str) -> None:
+        self.browser.current_window_handle = handle
+
+
+class FakeBrowser:
+    """Stands in for a running Chrome, recording what's asked of it."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.window_handles = ["main"]
+        self.current_window_handle = "main"
+        self.switch_to = FakeSwitchTo(self)
+        self.cdp_commands: List[tuple] = []
+        self.loaded: List[str] = []
+        self.quit_called = False
+
+    def __repr__(self) -> str:
+        return f"FakeBrowser({self.name})"
+
+    def close(self) -> None:
+        self.window_handles.remove(self.current_window_handle)
+
+    def execute_script(self, *_) -> None:
+        pass
+
+    def execute_cdp_cmd(self, command: str, params: dict) -> None:
+        self.cdp_commands.append((command, params))
+
+    def get(self, url: str) -> None:
+        self.loaded.append(url)
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+class BrowserPoolTestCase(unittest.TestCase):
+    """Launches `FakeBrowser`s instead of Chrome, and keeps pool output quiet."""
+
+    def setUp(self):
+        self.launched: List[FakeBrowser] = []
+        # Raised by the next launch only.
+        self.launch_error = None
+        # While cleared, launches wait for it to be set.
+        self.launch_gate = Event()
+        self.launch_gate.set()
+        with ExitStack() as stack:
+            stack.enter_context(
+                patch("webscraper.browser_pool.get_browser", self.get_browser)
+            )
+            output = io.StringIO()
+            stack.enter_context(redirect_stdout(output))
+            stack.enter_context(redirect_stderr(output))
+            self.addCleanup(stack.pop_all().close)
+
+    def get_browser(self, **_) -> FakeBrowser:
+        self.launch_gate.wait()
+        if self.launch_error is not None:
+            error, self.launch_error = self.launch_error, None
+            raise error
+        browser = FakeBrowser(str(len(self.launched)))
+        self.launched.append(browser)
+        return browser
+
+    def acquire_in_thread(self, pool: BrowserPool):
+        """Start acquiring a browser in another thread, and return how to get it."""
+        acquired = []
+        done = Event()
+
+        def acquire():
+            acquired.append(pool.acquire())
+            done.set()
+
+        Thread(target=acquire, daemon=True).start()
+
+        def result(timeout: float = 5):
+            self.assertTrue(done.wait(timeout), "acquire() never returned")
+            return acquired[0]
+
+        return done, result
+
+
+class TestAcquire(BrowserPoolTestCase):
+    """Checking browsers out, and waiting for them once the pool is full."""
+
+    def test_launches_up_to_size(self):
+        pool = BrowserPool(size=2)
+        first, second = pool.acquire(), pool.acquire()
+        self.assertEqual(self.launched, [first, second])
+
+        done, _ = self.acquire_in_thread(pool)
+        self.assertFalse(done.wait(0.1))
+
+    def test_reuses_released_browsers(self):
+        pool = BrowserPool(size=1)
+        browser = pool.acquire()
+        done, result = self.acquire_in_thread(pool)
+        self.assertFalse(done.wait(0.1))
+
+        pool.record_origins(browser, ["https://resort.example.com/trails"])
+        pool.release(browser)
+        self.assertIs(result(), browser)
+        self.assertEqual(len(self.launched), 1)
+        self.assertIn(("Network.clearBrowserCookies", {}), browser.cdp_commands)
+        self.assertIn(
+            (
+                "Storage.clearDataForOrigin",
+                {"origin": "https://resort.example.com", "storageTypes": "all"},
+            ),
+            browser.cdp_commands,
+        )
+
+    def test_wakes_up_when_a_browser_is_discarded(self):
+        pool = BrowserPool(size=1)
+        browser = pool.acquire()
+        done, result = self.acquire_in_thread(pool)
+        self.assertFalse(done.wait(0.1))
+
+        pool.discard(browser)
+        self.assertTrue(browser.quit_called)
+        # The freed slot goes to the waiting worker, which launches its own browser.
+        self.assertIs(result(), self.launched[1])
+
+    def test_wakes_up_when_a_warm_up_launch_fails(self):
+        pool = BrowserPool(size=1)
+        self.launch_error = RuntimeError("Chrome crashed on startup")
+        self.launch_gate.clear()
+        pool.warm()
+        # Every slot is taken by the browser that's warming up, so this waits for it.
+        done, result = self.acquire_in_thread(pool)
+        self.assertFalse(done.wait(0.1))
+
+        # Instead of waiting forever, the worker takes the freed slot and launches.
+        self.launch_gate.set()
+        self.assertIs(result(), self.launched[0])
+
+    def test_discards_browsers_that_raised(self):
+        pool = BrowserPool(size=1)
+        with self.assertRaises(ValueError):
+            with pool.browser() as browser:
+                raise ValueError("Markup changed")
+
+        self.assertTrue(browser.quit_called)
+        self.assertIsNot(pool.acquire(), browser)
+
+    def test_discards_browsers_that_cant_be_reset(self):
+        pool = BrowserPool(size=1)
+        browser = pool.acquire()
+        browser.window_handles = []
+        pool.release(browser)
+
+        self.assertTrue(browser.quit_called)
+        self.assertIsNot(pool.acquire(), browser)
+
+    def test_close_shuts_down_idle_browsers(self):
+        pool = BrowserPool(size=2)
+        pool.warm()
+        pool.close()
+        self.assertEqual(len(self.launched), 2)
+        self.assertTrue(all(browser.quit_called for browser in self.launched))
+
+
+class TestRecycle(BrowserPoolTestCase):
+    """Replacing browsers that outgrow their memory or page limits."""
+
+    def release_and_reacquire(self, pool: BrowserPool, browser: FakeBrowser):
+        """Hand a browser back, and wait for whichever browser the pool offers next."""
+        pool.release(browser)
+        for thread in pool._warming:  # pylint: disable=protected-access
+            thread.join()
+        return pool.acquire()
+
+    def test_recycles_after_max_pages(self):
+        pool = BrowserPool(size=1, max_pages=3)
+        browser = pool.acquire()
+        pool.record_pages(browser, 2)
+        self.assertIs(self.release_and_reacquire(pool, browser), browser)
+        self.assertEqual(pool.pages_loaded(browser), 2)
+
+        pool.record_pages(browser)
+        replacement = self.release_and_reacquire(pool, browser)
+        self.assertTrue(browser.quit_called)
+        self.assertIsNot(replacement, browser)
+        self.assertEqual(pool.pages_loaded(browser), 0)
+        self.assertEqual(pool.pages_loaded(replacement), 0)
+
+    def test_recycles_after_max_rss(self):
+        pool = BrowserPool(size=1, max_rss_mb=512)
+        browser = pool.acquire()
+        with patch(
+            "webscraper.browser_pool.get_browser_rss", return_value=256 * 1024 * 1024
+        ):
+            self.assertIsNone(pool.should_recycle(browser))
+            self.assertIs(self.release_and_reacquire(pool, browser), browser)
+
+        with patch(
+            "webscraper.browser_pool.get_browser_rss", return_value=768 * 1024 * 1024
+        ):
+            self.assertIn("768 MB", pool.should_recycle(browser))
+            self.assertIsNot(self.release_and_reacquire(pool, browser), browser)
+        self.assertTrue(browser.quit_called)
+
+    def test_keeps_browsers_whose_memory_cant_be_measured(self):
+        pool = BrowserPool(size=1, max_rss_mb=512, max_pages=10)
+        browser = pool.acquire()
+        with patch(
+            "webscraper.browser_pool.get_browser_rss",
+            side_effect=FileNotFoundError("/proc"),
+        ):
+            self.assertIsNone(pool.should_recycle(browser))
+            self.assertIs(self.release_and_reacquire(pool, browser), browser)
+
+            # `max_pages` still applies.
+            pool.record_pages(browser, 10)
+            self.assertIsNotNone(pool.should_recycle(browser))
+        self.assertFalse(browser.quit_called)
+
+
+if __name__ == "__main__":
+    unittest.main()
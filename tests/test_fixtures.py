@@ -0,0 +1,136 @@
+"""
+Tests for recording report pages as fixtures, and reading them back.
+"""
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from selenium.webdriver.common.by import By
+
+from lib.models import Resort
+from webscraper.fixtures import (
+    get_fixture_path,
+    list_fixtures,
+    load_fixture,
+    save_fixture,
+)
+from webscraper.static_page import StaticPage
+
+TRAIL_REPORT = '<ul><li class="trail">Bear Trap</li><li class="trail">Cliffs</li></ul>'
+SNOW_REPORT = '<div id="snow"><span class="base">24"</span></div>'
+
+
+def make_resort(resort_id: str) -> Resort:
+    """Return a resort to record fixtures for."""
+    return Resort(
+        id=resort_id,
+        name=f"Resort {resort_id}",
+        parser_name="snow_report.BoltonValley",
+        trail_report_url=f"https://{resort_id}.example.com/trails",
+        snow_report_url=None,
+    )
+
+
+class TestFixtures(unittest.TestCase):
+    """Saving, loading and listing fixtures."""
+
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.fixture_dir = os.path.join(directory.name, "fixtures")
+
+    def test_round_trip(self):
+        resort = make_resort("abc")
+        trail_report = StaticPage(TRAIL_REPORT)
+        saved = save_fixture(
+            self.fixture_dir,
+            resort,
+            {
+                "lifts": trail_report,
+                "trails": trail_report,
+                "snow_report": StaticPage(SNOW_REPORT),
+            },
+        )
+
+        path = get_fixture_path(self.fixture_dir, "abc")
+        self.assertTrue(os.path.exists(path))
+        self.assertFalse(os.path.exists(f"{path}.tmp"))
+
+        loaded = load_fixture(path)
+        self.assertEqual(loaded, saved)
+        self.assertEqual(loaded.name, "Resort abc")
+        self.assertEqual(loaded.parser_name, "snow_report.BoltonValley")
+        self.assertIsNone(loaded.snow_report_url)
+        self.assertIsNotNone(loaded.recorded_at.tzinfo)
+
+        pages = loaded.load_pages()
+        self.assertEqual(set(pages), {"lifts", "trails", "snow_report"})
+        self.assertEqual(
+            [
+                trail.text
+                for trail in pages["trails"].find_elements(By.CSS_SELECTOR, ".trail")
+            ],
+            ["Bear Trap", "Cliffs"],
+        )
+        self.assertEqual(pages["snow_report"].find_element(By.ID, "snow").text, '24"')
+
+    def test_shared_pages_are_stored_once(self):
+        trail_report = StaticPage(TRAIL_REPORT)
+        fixture = save_fixture(
+            self.fixture_dir,
+            make_resort("abc"),
+            {
+                "lifts": trail_report,
+                "trails": trail_report,
+                "snow_report": trail_report,
+            },
+        )
+        self.assertEqual(len(fixture.sources), 1)
+
+        # And stay shared once they're loaded.
+        pages = load_fixture(get_fixture_path(self.fixture_dir, "abc")).load_pages()
+        self.assertIs(pages["lifts"], pages["trails"])
+        self.assertIs(pages["trails"], pages["snow_report"])
+
+    def test_saving_again_replaces_the_fixture(self):
+        save_fixture(
+            self.fixture_dir, make_resort("abc"), {"trails": StaticPage("<p>1</p>")}
+        )
+        save_fixture(
+            self.fixture_dir, make_resort("abc"), {"trails": StaticPage("<p>2</p>")}
+        )
+
+        pages = load_fixture(get_fixture_path(self.fixture_dir, "abc")).load_pages()
+        self.assertEqual(pages["trails"].find_element(By.TAG_NAME, "p").text, "2")
+        self.assertEqual(len(list_fixtures(self.fixture_dir)), 1)
+
+    def test_list_fixtures(self):
+        self.assertEqual(list_fixtures(self.fixture_dir), [])
+
+        for resort_id in ["xyz", "abc"]:
+            save_fixture(
+                self.fixture_dir,
+                make_resort(resort_id),
+                {"trails": StaticPage("<p></p>")},
+            )
+        # Anything that isn't a fixture is ignored.
+        with open(
+            os.path.join(self.fixture_dir, "benchmarks.jsonl"), "w", encoding="utf-8"
+        ):
+            pass
+
+        self.assertEqual(
+            list_fixtures(self.fixture_dir),
+            [
+                get_fixture_path(self.fixture_dir, "abc"),
+                get_fixture_path(self.fixture_dir, "xyz"),
+            ],
+        )
+        self.assertEqual(
+            list_fixtures(self.fixture_dir, ["xyz"]),
+            [get_fixture_path(self.fixture_dir, "xyz")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+Tests for deciding, from validator headers alone, whether a report needs fetching again.
+"""
+import unittest
+
+from webscraper.http_fetch import is_unchanged
+
+
+class TestIsUnchanged(unittest.TestCase):
+    """`is_unchanged` only trusts an ETag or Last-Modified header."""
+
+    def test_matching_etag(self):
+        self.assertTrue(is_unchanged({"etag": '"abc"'}, {"etag": '"abc"'}))
+        self.assertFalse(is_unchanged({"etag": '"abc"'}, {"etag": '"def"'}))
+
+    def test_matching_last_modified(self):
+        validators = {
+            "last-modified": "Sat, 14 Jan 2023 12:00:00 GMT",
+            "content-length": "5120",
+        }
+        self.assertTrue(is_unchanged(validators, dict(validators)))
+        self.assertFalse(
+            is_unchanged(validators, {**validators, "content-length": "5121"})
+        )
+
+    def test_content_length_alone_is_not_trusted(self):
+        validators = {"content-length": "5120"}
+        self.assertFalse(is_unchanged(validators, dict(validators)))
+
+    def test_nothing_to_compare(self):
+        self.assertFalse(is_unchanged(None, {"etag": '"abc"'}))
+        self.assertFalse(is_unchanged({}, {"etag": '"abc"'}))
+        self.assertFalse(is_unchanged({}, {}))
+
+    def test_validators_that_appear_or_disappear(self):
+        self.assertFalse(is_unchanged({"etag": '"abc"'}, {"last-modified": "today"}))
+        self.assertFalse(
+            is_unchanged({"etag": '"abc"'}, {"etag": '"abc"', "last-modified": "today"})
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Tests for leasing resorts out to workers through `scrape_jobs`, checked against the SQL
+that would run on Postgres rather than a live database.
+"""
+import io
+import unittest
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from lib.models import Resort, ScrapeJob
+from webscraper.jobs import LEASE_SECONDS, claim_jobs
+
+
+class FakeSession:
+    """Stands in for a `Session` whose every query turns up `jobs`."""
+
+    def __init__(self, jobs: List[ScrapeJob]):
+        self.jobs = jobs
+        self.statements = []
+        self.committed = False
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def scalars(self):
+        return self
+
+    def all(self) -> List[ScrapeJob]:
+        return self.jobs
+
+    def commit(self) -> None:
+        self.committed = True
+
+
+class TestClaimJobs(unittest.TestCase):
+    """`claim_jobs` leases due resorts to a worker, most popular first."""
+
+    def claim(self, jobs: List[ScrapeJob]):
+        """Claim jobs for "worker", returning the claimed IDs and the SQL that was run."""
+        session = FakeSession(jobs)
+        with redirect_stdout(io.StringIO()):
+            resort_ids = claim_jobs(
+                session, "worker", select(Resort), limit=4, exclude={"done"}
+            )
+        self.assertTrue(session.committed)
+        (statement,) = session.statements
+        return resort_ids, str(statement.compile(dialect=postgresql.dialect()))
+
+    def test_orders_by_current_popularity(self):
+        _, sql = self.claim([])
+        # Scored as they're claimed, not from what was stored when they were last scraped.
+        self.assertIn("ORDER BY popularity.score DESC NULLS LAST", sql)
+        self.assertNotIn("resorts.popularity", sql)
+        self.assertIn("FROM user_resorts GROUP BY user_resorts.resort_id", sql)
+        self.assertIn("sum(resort_reads.count) AS reads", sql)
+
+    def test_skips_jobs_being_claimed(self):
+        _, sql = self.claim([])
+        self.assertTrue(sql.endswith("FOR UPDATE OF scrape_jobs SKIP LOCKED"), sql)
+        self.assertIn("scrape_jobs.leased_until IS NULL", sql)
+
+    def test_leases_claimed_jobs(self):
+        expired = datetime.now(timezone.utc) - timedelta(minutes=1)
+        jobs = [
+            ScrapeJob(resort_id="popular"),
+            ScrapeJob(resort_id="abandoned", worker_id="dead", leased_until=expired),
+        ]
+        resort_ids, _ = self.claim(jobs)
+        self.assertEqual(resort_ids, ["popular", "abandoned"])
+        for job in jobs:
+            self.assertEqual(job.worker_id, "worker")
+            self.assertEqual(
+                job.leased_until - job.claimed_at, timedelta(seconds=LEASE_SECONDS)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+"""
+Tests for `--record` and `--replay`, with the database, browsers and scraping itself
+stubbed out.
+"""
+import io
+import os
+import unittest
+from contextlib import ExitStack, redirect_stderr, redirect_stdout
+from tempfile import TemporaryDirectory
+from typing import List
+from unittest.mock import patch
+
+from sqlalchemy.dialects import postgresql
+
+from lib.models import Resort
+from webscraper.__main__ import record, replay
+from webscraper.fixtures import save_fixture
+from webscraper.parser import Field, Parser
+from webscraper.static_page import StaticPage
+
+TRAIL_REPORT = """
+<ul>
+  <li class="lift"><span class="name">Vista Quad</span><b class="status">Open</b></li>
+  <li class="trail" data-type="blue">
+    <span class="name">Meadows</span><b class="status">Open</b>
+  </li>
+</ul>
+"""
+SNOW_REPORT = '<div id="snow"><span class="base">24"</span></div>'
+
+
+class ReportParser(Parser):
+    """Parses `TRAIL_REPORT` and `SNOW_REPORT`."""
+
+    lift_css_selector = "li.lift"
+    trail_css_selector = "li.trail"
+    snow_report_css_selector = "#snow"
+
+    lift_fields = {"name": Field(".name"), "status": Field(".status")}
+    trail_fields = {
+        "name": Field(".name"),
+        "trail_type": Field(None, "@data-type"),
+        "status": Field(".status"),
+    }
+
+    def get_base_layer(self, snow_report):
+        return {"inches": snow_report.text}
+
+
+class StubPool:
+    """Stands in for a `BrowserPool`, which should always be closed once it's made."""
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class ResortsSession:
+    """Stands in for a `Session` whose queries all turn up `resorts`."""
+
+    def __init__(self, resorts: List[Resort]):
+        self.resorts = resorts
+
+    def __enter__(self) -> "ResortsSession":
+        return self
+
+    def __exit__(self, *_) -> None:
+        pass
+
+    def execute(self, _):
+        return self
+
+    def scalars(self):
+        return self
+
+    def all(self) -> List[Resort]:
+        return self.resorts
+
+    def commit(self) -> None:
+        pass
+
+
+def make_resort(resort_id: str, **kwargs) -> Resort:
+    """Return a resort whose reports are parsed by `ReportParser`."""
+    return Resort(
+        **{
+            "id": resort_id,
+            "name": f"Resort {resort_id}",
+            "parser_name": "report.ReportParser",
+            "trail_report_url": f"https://{resort_id}.example.com/trails",
+            "snow_report_url": f"https://{resort_id}.example.com/snow",
+            **kwargs,
+        }
+    )
+
+
+class MainTestCase(unittest.TestCase):
+    """Records into (and replays from) a temporary directory, keeping output quiet."""
+
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.fixture_dir = os.path.join(directory.name, "fixtures")
+        self.output = io.StringIO()
+        with ExitStack() as stack:
+            stack.enter_context(
+                patch("webscraper.get_parser_class", return_value=ReportParser)
+            )
+            stack.enter_context(redirect_stdout(self.output))
+            stack.enter_context(redirect_stderr(self.output))
+            self.addCleanup(stack.pop_all().close)
+
+
+class TestRecord(MainTestCase):
+    """`record` scrapes the chosen resorts once, saving their reports as fixtures."""
+
+    def setUp(self):
+        super().setUp()
+        self.pool = StubPool()
+        self.queries = []
+        # Each sweep claims the resort once, and then finds nothing left to claim.
+        self.claims = [["resort"], []]
+        with ExitStack() as stack:
+            stack.enter_context(
+                patch("webscraper.get_browser_pool", return_value=self.pool)
+            )
+            stack.enter_context(
+                patch(
+                    "webscraper.get_session",
+                    return_value=ResortsSession([make_resort("resort")]),
+                )
+            )
+            stack.enter_context(patch("webscraper.get_popularity", return_value={}))
+            self.ensure_jobs = stack.enter_context(patch("webscraper.ensure_jobs"))
+            stack.enter_context(patch("webscraper.claim_jobs", self.claim_jobs))
+            self.scrape_resort = stack.enter_context(patch("webscraper.scrape_resort"))
+            self.addCleanup(stack.pop_all().close)
+
+    def claim_jobs(self, _, __, resort_query, **___) -> List[str]:
+        self.queries.append(resort_query)
+        return self.claims.pop(0)
+
+    def compiled_query(self) -> str:
+        """Return the SQL of the query resorts were claimed with."""
+        return str(self.queries[0].compile(dialect=postgresql.dialect()))
+
+    def test_records_every_resort(self):
+        record(self.fixture_dir, [])
+        self.assertTrue(self.pool.closed)
+        self.assertEqual(self.scrape_resort.call_args.args[0], "resort")
+        self.assertEqual(
+            self.scrape_resort.call_args.kwargs["record_dir"], self.fixture_dir
+        )
+        # Every resort, whether or not it's due.
+        self.assertNotIn("WHERE", self.compiled_query())
+
+    def test_records_chosen_resorts(self):
+        record(self.fixture_dir, ["resort"])
+        self.assertTrue(self.pool.closed)
+        self.assertIn("WHERE resorts.id IN", self.compiled_query())
+        self.assertNotIn("next_scrape_at <=", self.compiled_query())
+
+    def test_closes_the_pool_when_claiming_fails(self):
+        self.ensure_jobs.side_effect = ConnectionError("Connection refused")
+        with self.assertRaises(ConnectionError):
+            record(self.fixture_dir, [])
+        self.assertTrue(self.pool.closed)
+        self.scrape_resort.assert_not_called()
+
+
+class TestReplay(MainTestCase):
+    """`replay` parses every fixture, and reports any that can't be parsed."""
+
+    def save(self, resort: Resort, trail_report: str = TRAIL_REPORT) -> None:
+        """Record a fixture of a resort, with its trail report on one page."""
+        page = StaticPage(trail_report)
+        save_fixture(
+            self.fixture_dir,
+            resort,
+            {"lifts": page, "trails": page, "snow_report": StaticPage(SNOW_REPORT)},
+        )
+
+    def test_replays_every_fixture(self):
+        self.save(make_resort("first"))
+        self.save(make_resort("second"))
+        self.assertTrue(replay(self.fixture_dir, []))
+        output = self.output.getvalue()
+        self.assertIn("Resort first: 1 lifts, 1 trails, a snow report", output)
+        self.assertIn("Resort second: 1 lifts, 1 trails, a snow report", output)
+
+    def test_replays_chosen_fixtures(self):
+        self.save(make_resort("first"))
+        self.save(make_resort("second"), "<p>Report unavailable</p>")
+        self.assertTrue(replay(self.fixture_dir, ["first"]))
+        self.assertNotIn("Resort second", self.output.getvalue())
+
+    def test_fails_on_fixtures_that_cant_be_parsed(self):
+        self.save(make_resort("first"))
+        self.save(make_resort("second"), "<p>Report unavailable</p>")
+        self.assertFalse(replay(self.fixture_dir, []))
+        self.assertIn("Failed to replay", self.output.getvalue())
+        self.assertIn("Resort first: 1 lifts", self.output.getvalue())
+
+    def test_fails_on_missing_fixtures(self):
+        self.assertFalse(replay(self.fixture_dir, []))
+        self.assertFalse(replay(self.fixture_dir, ["missing"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,355 @@
+"""
+Tests for the `Parser` base class, through a small parser for a made-up report.
+"""
+import io
+import unittest
+from contextlib import ExitStack, redirect_stderr, redirect_stdout
+from typing import List
+from unittest.mock import patch
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+
+from webscraper.parser import READINESS_SCRIPT, Field, Parser
+from webscraper.records import ScrapedLift, ScrapedTrail
+from webscraper.static_page import StaticPage
+
+REPORT = """
+<ul>
+  <li class="lift"><span class="name">Vista Quad</span><b class="status">open</b></li>
+  <li class="lift"><span class="name">T-Bar</span><b class="status">on hold</b></li>
+  <li class="trail" data-type="blue">
+    <span class="name">Meadows</span><b class="status">Open</b><i class="groomed"></i>
+  </li>
+  <li class="trail" data-type="black">
+    <span class="name">The Wall</span><b class="status">Closed</b>
+  </li>
+</ul>
+"""
+
+
+class ListParser(Parser):
+    """Parses `REPORT`, in bulk or one element at a time."""
+
+    lift_css_selector = "li.lift"
+    trail_css_selector = "li.trail"
+    trail_type_to_rating = {"blue": 1, "black": 2}
+
+    lift_fields = {
+        "name": Field(".name"),
+        "status": Field(".status", "text", str.title),
+    }
+    trail_fields = {
+        "name": Field(".name"),
+        "trail_type": Field(None, "@data-type"),
+        "status": Field(".status"),
+        "groomed": Field(".groomed", "exists"),
+    }
+
+    def get_lift_name(self, lift):
+        return lift.find_element(By.CLASS_NAME, "name").text
+
+    def get_lift_status(self, lift):
+        return lift.find_element(By.CLASS_NAME, "status").text.title()
+
+    def get_trail_name(self, trail):
+        return trail.find_element(By.CLASS_NAME, "name").text
+
+    def get_trail_type(self, trail):
+        return trail.get_attribute("data-type")
+
+    def get_trail_status(self, trail):
+        return trail.find_element(By.CLASS_NAME, "status").text
+
+    def get_trail_groomed(self, trail):
+        return bool(trail.find_elements(By.CLASS_NAME, "groomed"))
+
+    def get_trail_night_skiing(self, trail):
+        return False
+
+
+LIFTS = [
+    ScrapedLift(
+        name="Vista Quad", unique_name="Vista Quad", status="Open", is_open=True
+    ),
+    ScrapedLift(name="T-Bar", unique_name="T-Bar", status="On Hold", is_open=False),
+]
+TRAILS = [
+    ScrapedTrail(
+        name="Meadows",
+        unique_name="Meadows_blue",
+        trail_type="blue",
+        status="open",
+        is_open=True,
+        groomed=True,
+        rating=1,
+    ),
+    ScrapedTrail(
+        name="The Wall",
+        unique_name="The Wall_black",
+        trail_type="black",
+        status="closed",
+        is_open=False,
+        rating=2,
+    ),
+]
+
+
+class ParserTestCase(unittest.TestCase):
+    """Keeps what parsers print out of the test output."""
+
+    def setUp(self):
+        self.output = io.StringIO()
+        with ExitStack() as stack:
+            stack.enter_context(redirect_stdout(self.output))
+            stack.enter_context(redirect_stderr(self.output))
+            self.addCleanup(stack.pop_all().close)
+
+    def load(self, parser: Parser, source: str = REPORT) -> Parser:
+        """Point a parser at a report, as if it had been fetched."""
+        parser.load_static_report(source)
+        parser.use_page("lifts")
+        return parser
+
+
+class TestBulkExtraction(ParserTestCase):
+    """Reading every row of a report in one pass."""
+
+    def test_extract_rows_applies_transforms(self):
+        parser = self.load(ListParser(None))
+        self.assertEqual(
+            parser.extract_rows(parser.lift_css_selector, parser.lift_fields),
+            [
+                {"name": "Vista Quad", "status": "Open"},
+                {"name": "T-Bar", "status": "On Hold"},
+            ],
+        )
+
+    def test_extract_lifts_and_trails(self):
+        parser = self.load(ListParser(None))
+        self.assertEqual(parser.extract_lifts(), LIFTS)
+        self.assertEqual(parser.extract_trails(), TRAILS)
+
+    def test_matches_individual_elements(self):
+        bulk = self.load(ListParser(None))
+        individual = self.load(ListParser(None))
+        individual.lift_fields = individual.trail_fields = {}
+
+        self.assertIsNone(individual.extract_lifts())
+        self.assertEqual(individual.get_lifts(), bulk.get_lifts())
+        self.assertEqual(individual.get_trails(), bulk.get_trails())
+
+    def test_falls_back_to_individual_elements(self):
+        parser = self.load(ListParser(None))
+        # `make_lift` doesn't take a `color`, so every bulk row fails to build.
+        parser.lift_fields = {**parser.lift_fields, "color": Field(".name")}
+
+        self.assertIsNone(parser.extract_lifts())
+        self.assertEqual(parser.get_lifts(), LIFTS)
+        self.assertIn("Bulk lift extraction failed", self.output.getvalue())
+
+    def test_missing_rows(self):
+        parser = self.load(ListParser(None), "<p>Report unavailable</p>")
+        self.assertIsNone(parser.extract_lifts())
+        with self.assertRaises(NoSuchElementException):
+            parser.get_lifts()
+
+
+SECTIONED_REPORT = """
+<div>
+  <h3>Easier</h3>
+  <p class="trail"><span class="name">Meadows</span><b class="status">Open</b></p>
+  <h3>Harder</h3>
+  <p class="trail"><span class="name">The Wall</span><b class="status">Closed</b></p>
+</div>
+"""
+
+
+class SectionedParser(ListParser):
+    """Reads each trail's type from the header it's listed under."""
+
+    trail_css_selector = "p.trail"
+    trail_section_css_selector = "h3"
+    trail_type_to_rating = {"Easier": 1, "Harder": 2}
+    trail_fields = {"name": Field(".name"), "status": Field(".status")}
+
+
+class TestSections(ParserTestCase):
+    """Bulk extraction of trails grouped under headers by difficulty."""
+
+    def test_trail_type_comes_from_the_section(self):
+        parser = self.load(SectionedParser(None), SECTIONED_REPORT)
+        self.assertEqual(
+            [
+                (trail.name, trail.trail_type, trail.rating)
+                for trail in parser.get_trails()
+            ],
+            [("Meadows", "Easier", 1), ("The Wall", "Harder", 2)],
+        )
+
+
+class MarkerParser(ListParser):
+    """Reads grooming from the rows' classes, and night skiing from a child element."""
+
+    row_presence_css_selectors = [".night"]
+
+    def get_trail_groomed(self, trail):
+        return self.has_class(trail, "groomed")
+
+    def get_trail_night_skiing(self, trail):
+        return self.has_child(trail, ".night")
+
+
+class TestRowMarkers(ParserTestCase):
+    """Checking markers on each row against a summary read for every row at once."""
+
+    def test_has_class_and_has_child(self):
+        parser = MarkerParser(StaticPage(REPORT))
+        meadows, wall = parser.get_trail_elements()
+        self.assertTrue(parser.has_class(meadows, "groomed"))
+        self.assertFalse(parser.has_class(wall, "groomed"))
+        # Markers can be on any element within the row, not just the row itself.
+        self.assertTrue(parser.has_class(meadows, "status"))
+        self.assertFalse(parser.has_child(meadows, ".night"))
+        # Selectors that weren't summarized are looked up on the spot.
+        self.assertTrue(parser.has_child(meadows, "i.groomed"))
+        self.assertFalse(parser.has_child(wall, "i.groomed"))
+
+    def test_queued_rows_are_summarized_together(self):
+        parser = MarkerParser(StaticPage(REPORT))
+        parser.lift_fields = parser.trail_fields = {}
+        with patch.object(
+            parser, "summarize_rows", wraps=parser.summarize_rows
+        ) as summarize_rows:
+            trails = parser.get_trails()
+
+        self.assertEqual([trail.groomed for trail in trails], [True, False])
+        self.assertEqual([trail.night_skiing for trail in trails], [False, False])
+        (rows,) = summarize_rows.call_args.args
+        self.assertEqual(len(rows), 2)
+        summarize_rows.assert_called_once()
+
+    def test_rows_that_werent_queued(self):
+        parser = MarkerParser(StaticPage(REPORT))
+        meadows, wall = parser.get_trail_elements()
+        parser.queue_row_summaries([meadows])
+        with patch.object(
+            parser, "summarize_rows", wraps=parser.summarize_rows
+        ) as summarize_rows:
+            self.assertTrue(parser.has_class(meadows, "groomed"))
+            self.assertFalse(parser.has_class(wall, "groomed"))
+            self.assertTrue(parser.has_class(meadows, "name"))
+        self.assertEqual(
+            [call.args[0] for call in summarize_rows.call_args_list],
+            [[meadows], [wall]],
+        )
+
+
+def page_state(
+    counts: List[int], complete: bool = True, idle_ms: int = 0, pending: int = 0
+) -> dict:
+    """Return what `READINESS_SCRIPT` would find on a page."""
+    return {
+        "counts": counts,
+        "complete": complete,
+        "idleMs": idle_ms,
+        "pending": pending,
+    }
+
+
+class ReadinessBrowser:
+    """Stands in for a live browser whose page goes through `states`, one per poll."""
+
+    def __init__(self, *states: dict):
+        self.states = list(states)
+        self.polls = 0
+
+    def execute_script(self, script: str, css_selectors: List[str]) -> dict:
+        assert script == READINESS_SCRIPT
+        state = self.states[min(self.polls, len(self.states) - 1)]
+        assert len(state["counts"]) == len(css_selectors)
+        self.polls += 1
+        return state
+
+
+class TestWaitUntilReady(ParserTestCase):
+    """Polling a freshly loaded report until it can be parsed, or clearly can't be."""
+
+    SELECTORS = ["li.lift", "li.trail"]
+
+    def setUp(self):
+        super().setUp()
+        sleep = patch("webscraper.parser.sleep")
+        sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def wait(self, parser: Parser, **kwargs) -> None:
+        parser.wait_until_ready(self.SELECTORS, **kwargs)
+
+    def test_waits_for_every_selector(self):
+        browser = ReadinessBrowser(
+            page_state([0, 0], complete=False),
+            page_state([3, 0], complete=False),
+            page_state([3, 12]),
+        )
+        self.wait(ListParser(browser))
+        self.assertEqual(browser.polls, 3)
+
+    def test_fails_fast_once_the_page_has_settled(self):
+        browser = ReadinessBrowser(page_state([3, 0], idle_ms=2500))
+        with self.assertRaises(NoSuchElementException) as context:
+            self.wait(ListParser(browser))
+        self.assertIn("li.trail", str(context.exception))
+        self.assertNotIn("li.lift", str(context.exception))
+        self.assertEqual(browser.polls, 1)
+
+    def test_keeps_waiting_while_requests_are_pending(self):
+        browser = ReadinessBrowser(
+            page_state([3, 0], idle_ms=5000, pending=1),
+            page_state([3, 0], idle_ms=5000, pending=1),
+            page_state([3, 12]),
+        )
+        self.wait(ListParser(browser))
+        self.assertEqual(browser.polls, 3)
+
+    def test_keeps_waiting_while_the_page_is_loading(self):
+        browser = ReadinessBrowser(
+            page_state([0, 0], complete=False, idle_ms=5000), page_state([3, 12])
+        )
+        self.wait(ListParser(browser))
+        self.assertEqual(browser.polls, 2)
+
+    def test_extra_grace_seconds(self):
+        browser = ReadinessBrowser(
+            page_state([3, 0], idle_ms=3000), page_state([3, 0], idle_ms=4500)
+        )
+        with self.assertRaises(NoSuchElementException):
+            self.wait(ListParser(browser), extra_grace_seconds=2)
+        self.assertEqual(browser.polls, 2)
+
+    def test_times_out(self):
+        browser = ReadinessBrowser(page_state([0, 0], complete=False))
+        with self.assertRaises(TimeoutException):
+            self.wait(ListParser(browser), timeout=-1)
+
+    def test_waits_for_stable_rows_and_network_idle(self):
+        parser = ListParser(
+            ReadinessBrowser(
+                page_state([3, 5]),
+                page_state([3, 12]),
+                page_state([3, 12], pending=1),
+                page_state([3, 12], idle_ms=100),
+                page_state([3, 12], idle_ms=600),
+            )
+        )
+        parser.wait_for_stable_rows = parser.wait_for_network_idle = True
+        self.wait(parser)
+        self.assertEqual(parser.browser.polls, 5)
+
+    def test_captured_pages_are_always_ready(self):
+        parser = ListParser(StaticPage("<p>Report unavailable</p>"))
+        self.wait(parser)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,417 @@
+"""
+Tests for each parser against a small snippet of its resort's trail report, parsed from
+a `StaticPage` the same way a captured or fetched report would be.
+
+Parsers that declare `lift_fields`/`trail_fields` are also checked with bulk extraction
+turned off, so that the fallback of reading elements one at a time agrees with it.
+"""
+import io
+import unittest
+from contextlib import redirect_stdout
+from typing import List, Tuple, Type
+
+from webscraper import Parser, Rating
+from webscraper.parsers.bromley import Bromley
+from webscraper.parsers.burke_mountain import BurkeMountain
+from webscraper.parsers.killington import Killington
+from webscraper.parsers.saskadena_six import SaskadenaSix
+from webscraper.parsers.smuggs import Smuggs
+from webscraper.parsers.snow_report import BoltonValley, JayPeak
+from webscraper.parsers.sugarbush import Sugarbush
+from webscraper.parsers.vail_resorts import Vail
+from webscraper.records import ScrapedLift, ScrapedTrail
+
+
+def parse_report(
+    parser_class: Type[Parser], source: str, bulk: bool = True
+) -> Tuple[List[ScrapedLift], List[ScrapedTrail]]:
+    """Parse the lifts + trails out of a report, optionally without bulk extraction."""
+    parser = parser_class(None)
+    if not bulk:
+        parser.lift_fields = {}
+        parser.trail_fields = {}
+    parser.load_static_report(source)
+    # Parsers report what they find with `print`.
+    with redirect_stdout(io.StringIO()):
+        return parser.get_lifts(), parser.get_trails()
+
+
+def lift(name: str, status: str) -> ScrapedLift:
+    """Build the lift a parser should find."""
+    return ScrapedLift(
+        name=name, unique_name=name, status=status, is_open=status.lower() == "open"
+    )
+
+
+def trail(
+    name: str, trail_type: str, status: str, rating: int, **kwargs
+) -> ScrapedTrail:
+    """Build the trail a parser should find."""
+    return ScrapedTrail(
+        name=name,
+        unique_name=f"{name}_{trail_type}",
+        trail_type=trail_type,
+        status=status,
+        is_open="open" in status,
+        rating=rating,
+        **kwargs,
+    )
+
+
+class ParserTestCase(unittest.TestCase):
+    """Check that a parser finds the expected lifts + trails in a report."""
+
+    parser_class: Type[Parser] = None
+    source = ""
+    lifts: List[ScrapedLift] = []
+    trails: List[ScrapedTrail] = []
+
+    def test_lifts_and_trails(self):
+        if self.parser_class is None:
+            return
+        lifts, trails = parse_report(self.parser_class, self.source)
+        self.assertEqual(lifts, self.lifts)
+        self.assertEqual(trails, self.trails)
+
+    def test_bulk_extraction(self):
+        if self.parser_class is None:
+            return
+        parser = self.parser_class(None)
+        parser.load_static_report(self.source)
+        parser.use_page("lifts")
+        with redirect_stdout(io.StringIO()):
+            lifts, trails = parser.extract_lifts(), parser.extract_trails()
+        # Without a fallback to hide behind, bulk extraction has to work on its own.
+        self.assertEqual(lifts, self.lifts if parser.lift_fields else None)
+        self.assertEqual(trails, self.trails if parser.trail_fields else None)
+
+    def test_individual_elements(self):
+        if self.parser_class is None:
+            return
+        lifts, trails = parse_report(self.parser_class, self.source, bulk=False)
+        self.assertEqual(lifts, self.lifts)
+        self.assertEqual(trails, self.trails)
+
+
+class TestBromley(ParserTestCase):
+    """Lifts + trails share markup, with trails grouped under difficulty titles."""
+
+    parser_class = Bromley
+    source = """
+    <div class="tab-box">Lifts</div>
+    <div class="tab-box">Trails</div>
+    <div id="lifts">
+      <div class="lift-status-section">
+        <div class="lift-status-info">
+          <span class="lift-name"> Sun Mountain Flyer </span>
+          <svg class="icon_snowreport_open"></svg>
+        </div>
+        <div class="lift-status-info">
+          <span class="lift-name">Blue Ribbon Quad</span>
+          <svg class="icon_snowreport_closed"></svg>
+        </div>
+      </div>
+    </div>
+    <div id="trails">
+      <div class="difficulty-info"><h3 class="difficulty-level-title">Easiest</h3></div>
+      <div class="lift-status-section">
+        <div class="lift-status-info">
+          <span class="trail-name">Lord's Prayer</span>
+          <svg class="icon_snowreport_open"></svg>
+        </div>
+      </div>
+      <div class="difficulty-info">
+        <h3 class="difficulty-level-title">Most Difficult</h3>
+      </div>
+      <div class="lift-status-section">
+        <div class="lift-status-info"><span class="trail-name">Avalanche</span></div>
+        <div class="lift-status-info">
+          <span class="trail-name">Corkscrew</span>
+          <svg class="icon_snowreport_open"></svg>
+        </div>
+      </div>
+    </div>
+    """
+    lifts = [lift("Sun Mountain Flyer", "Open"), lift("Blue Ribbon Quad", "Closed")]
+    trails = [
+        trail("Lord's Prayer", "Easiest", "open", Rating.GREEN.value),
+        trail("Avalanche", "Most Difficult", "closed", Rating.BLACK.value),
+        trail("Corkscrew", "Most Difficult", "open", Rating.BLACK.value),
+    ]
+
+
+class TestBurkeMountain(ParserTestCase):
+    """Statuses, trail types and grooming are all read from CSS classes."""
+
+    parser_class = BurkeMountain
+    source = """
+    <div id="lifts"><table><tbody>
+      <tr>
+        <td data-label="Lift Name">Sherburne Express</td>
+        <td data-label="Status"><span class="open"></span></td>
+      </tr>
+      <tr>
+        <td data-label="Lift Name">J-Bar</td>
+        <td data-label="Status"><span class="closed"></span></td>
+      </tr>
+    </tbody></table></div>
+    <div id="trails"><table><tbody>
+      <tr>
+        <td data-label="Trail Name">
+          <div class="label">Willoughby<span class="level-1"></span></div>
+        </td>
+        <td data-label="Status"><span class="open"></span></td>
+        <td data-label="Groomed"><span class="open"></span></td>
+      </tr>
+      <tr>
+        <td data-label="Trail Name">
+          <div class="label">Big Dipper<span class="level-4"></span></div>
+        </td>
+        <td data-label="Status"><span class="closed"></span></td>
+        <td data-label="Groomed"><span class="closed"></span></td>
+      </tr>
+    </tbody></table></div>
+    """
+    lifts = [lift("Sherburne Express", "open"), lift("J-Bar", "closed")]
+    trails = [
+        trail("Willoughby", "level-1", "open", Rating.GREEN.value, groomed=True),
+        trail("Big Dipper", "level-4", "closed", Rating.DOUBLE_BLACK.value),
+    ]
+
+
+class TestKillington(ParserTestCase):
+    """Lifts + trails share tables, and only trails have a difficulty."""
+
+    parser_class = Killington
+    source = """
+    <div class="panel-body"><table><tbody>
+      <tr><td class="name">Skipped Gondola</td><td class="status"></td></tr>
+    </tbody></table></div>
+    <div class="panel-body"><table><tbody>
+      <tr>
+        <td class="name"> Snowdon Six </td>
+        <td class="status"><svg><path fill="#7ED321"></path></svg></td>
+      </tr>
+      <tr>
+        <td class="name">Great Eastern</td>
+        <td class="difficulty"><div class="icon difficulty-level-green"></div></td>
+        <td class="groomed"><div class="icon"></div></td>
+        <td class="status"><svg><path fill="#7ED321"></path></svg></td>
+      </tr>
+      <tr>
+        <td class="name">Outer Limits</td>
+        <td class="difficulty"><div class="icon difficulty-level-black-2"></div></td>
+        <td class="groomed"></td>
+        <td class="status"><svg><path fill="#D0021B"></path></svg></td>
+      </tr>
+    </tbody></table></div>
+    """
+    lifts = [lift("Snowdon Six", "Open")]
+    trails = [
+        trail(
+            "Great Eastern",
+            "difficulty-level-green",
+            "open",
+            Rating.GREEN.value,
+            groomed=True,
+        ),
+        trail(
+            "Outer Limits",
+            "difficulty-level-black-2",
+            "closed",
+            Rating.DOUBLE_BLACK.value,
+        ),
+    ]
+
+
+class TestSaskadenaSix(ParserTestCase):
+    """Lifts + trails share markup, and only trails have a level."""
+
+    parser_class = SaskadenaSix
+    source = """
+    <div class="node--type-lift-trail">
+      <h3 class="title">Summit Double</h3>
+      <div class="field--name-field-status">Open</div>
+    </div>
+    <div class="node--type-lift-trail">
+      <h3 class="title">Pogo</h3>
+      <div class="field--name-field-status">Closed</div>
+      <div class="level">Intermediate</div>
+    </div>
+    """
+    lifts = [lift("Summit Double", "Open")]
+    trails = [trail("Pogo", "Intermediate", "closed", Rating.BLUE.value, groomed=None)]
+
+
+class TestSmuggs(ParserTestCase):
+    """Lifts are told apart by name, and everything else is read from CSS classes."""
+
+    parser_class = Smuggs
+    source = """
+    <div id="sterling-report">
+      <div class="report"><span class="open">Sterling Lift</span></div>
+      <div class="report">
+        <span class="more-difficult groomed-now">Exhibition</span>
+      </div>
+    </div>
+    <div id="madonna-report">
+      <div class="report"><span class="closed">Madonna I Lift</span></div>
+    </div>
+    <div id="morse-report">
+      <div class="report"><span class="closed easier">Lower Rumrunner</span></div>
+    </div>
+    """
+    lifts = [lift("Sterling Lift", "Open"), lift("Madonna I Lift", "Closed")]
+    trails = [
+        trail("Exhibition", "more-difficult", "open", Rating.BLUE.value, groomed=True),
+        trail("Lower Rumrunner", "easier", "closed", Rating.GREEN.value),
+    ]
+
+
+class TestSugarbush(ParserTestCase):
+    """Grooming is one of a list of trail features."""
+
+    parser_class = Sugarbush
+    source = """
+    <ul class="Lifts_list__3PwcO">
+      <li>
+        <h3 class="Lifts_name__1YvQ1">Super Bravo</h3>
+        <p class="Lifts_status__z9n5V">Open</p>
+      </li>
+      <li>
+        <h3 class="Lifts_name__1YvQ1">Castlerock</h3>
+        <p class="Lifts_status__z9n5V">Closed</p>
+      </li>
+    </ul>
+    <ul class="Trails_trailsList__3gYwp">
+      <li>
+        <dl>
+          <dd><h4 class="Trails_trailName__1_oua">Jester</h4></dd>
+          <dd><p class="Trails_trailStatus__jJDvi">Open</p></dd>
+        </dl>
+        <div class="Trails_trailDetailDifficulty__2n1p-">
+          <dd><span>More Difficult</span></dd>
+        </div>
+        <ul class="Trails_trailFeatures__2pFdC"><li>Snowmaking</li><li>Grooming</li></ul>
+      </li>
+      <li>
+        <dl>
+          <dd><h4 class="Trails_trailName__1_oua">Rumble</h4></dd>
+          <dd><p class="Trails_trailStatus__jJDvi">Closed</p></dd>
+        </dl>
+        <div class="Trails_trailDetailDifficulty__2n1p-">
+          <dd><span>Expert</span></dd>
+        </div>
+      </li>
+    </ul>
+    """
+    lifts = [lift("Super Bravo", "Open"), lift("Castlerock", "Closed")]
+    trails = [
+        trail("Jester", "More Difficult", "open", Rating.BLUE.value, groomed=True),
+        trail("Rumble", "Expert", "closed", Rating.DOUBLE_BLACK.value),
+    ]
+
+
+class TestVail(ParserTestCase):
+    """Statuses, trail types and grooming are all read from icons."""
+
+    parser_class = Vail
+    source = """
+    <div class="liftStatus__lifts__row">
+      <span class="liftStatus__lifts__row__title">Sunburst Six</span>
+      <div class="icon-status-open"></div>
+    </div>
+    <div class="liftStatus__lifts__row">
+      <span class="liftStatus__lifts__row__title">Toll House</span>
+      <div class="icon-status-closed"></div>
+    </div>
+    <div class="trailStatus__trails__row">
+      <span class="trailStatus__trails__row--name">Upper Lord</span>
+      <div class="trailStatus__trails__row--icon icon-status-open"></div>
+      <div class="trailStatus__trails__row--icon icon-difficulty-intermediate"></div>
+      <div class="trailStatus__trails__row--icon icon-status-snowcat"></div>
+    </div>
+    <div class="trailStatus__trails__row">
+      <span class="trailStatus__trails__row--name">Goat</span>
+      <div class="trailStatus__trails__row--icon icon-status-closed"></div>
+      <div class="trailStatus__trails__row--icon icon-difficulty-expert"></div>
+    </div>
+    """
+    lifts = [lift("Sunburst Six", "Open"), lift("Toll House", "Closed")]
+    trails = [
+        trail("Upper Lord", "intermediate", "open", Rating.BLUE.value, groomed=True),
+        trail("Goat", "expert", "closed", Rating.DOUBLE_BLACK.value),
+    ]
+
+
+# Bolton Valley + Jay Peak share their markup, grouping trails into a section per
+# difficulty.
+SNOW_REPORT_SOURCE = """
+<section>
+  <h2>Lifts</h2>
+  <article class="SnowReport-Lift SnowReport-feature">
+    <h3 class="SnowReport-feature-title">Vista Quad</h3>
+    <div class="SnowReport-item-status">
+      <i class="pti-open"></i><span class="SnowReport-sr-label">Open</span>
+    </div>
+  </article>
+</section>
+<section>
+  <h2>{easy}</h2>
+  <article class="SnowReport-Trail SnowReport-feature">
+    <h3 class="SnowReport-feature-title">Sherman's Pass</h3>
+    <div class="SnowReport-item-status"><span>Open</span></div>
+    <i class="pti-groomed"></i>
+    <i class="pti-moon-mining"></i>
+  </article>
+</section>
+<section>
+  <h2>ADVANCED</h2>
+  <article class="SnowReport-Trail SnowReport-feature">
+    <h3 class="SnowReport-feature-title">Spillway</h3>
+    <div class="SnowReport-item-status"><span>Closed</span></div>
+  </article>
+</section>
+"""
+
+
+class TestBoltonValley(ParserTestCase):
+    """Trail types come from the section each trail is in."""
+
+    parser_class = BoltonValley
+    source = SNOW_REPORT_SOURCE.format(easy="EASIER")
+    lifts = [lift("Vista Quad", "Open")]
+    trails = [
+        trail(
+            "Sherman's Pass",
+            "EASIER",
+            "open",
+            Rating.GREEN.value,
+            groomed=True,
+            night_skiing=True,
+        ),
+        trail("Spillway", "ADVANCED", "closed", Rating.BLACK.value),
+    ]
+
+
+class TestJayPeak(ParserTestCase):
+    """Trail types come from the section each trail is in."""
+
+    parser_class = JayPeak
+    source = SNOW_REPORT_SOURCE.format(easy="BEGINNER")
+    lifts = [lift("Vista Quad", "Open")]
+    trails = [
+        trail(
+            "Sherman's Pass",
+            "BEGINNER",
+            "open",
+            Rating.GREEN.value,
+            groomed=True,
+            night_skiing=True,
+        ),
+        trail("Spillway", "ADVANCED", "closed", Rating.BLACK.value),
+    ]
+
+
+if __name__ == "__main__":
+    unittest.main()
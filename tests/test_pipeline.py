@@ -0,0 +1,96 @@
+"""
+Tests for `BatchWriter`, which writes scrape results from a single background thread.
+"""
+import io
+import unittest
+from contextlib import ExitStack, redirect_stderr, redirect_stdout
+from threading import Event, get_ident
+from typing import Any, List
+
+from webscraper.pipeline import BatchWriter
+
+
+class TestBatchWriter(unittest.TestCase):
+    """Batching, and carrying on after failures."""
+
+    def setUp(self):
+        self.written: List[List[Any]] = []
+        self.finished: List[List[Any]] = []
+        # Failures are printed, which would clutter the test output.
+        self.output = io.StringIO()
+        with ExitStack() as stack:
+            stack.enter_context(redirect_stdout(self.output))
+            stack.enter_context(redirect_stderr(self.output))
+            self.addCleanup(stack.pop_all().close)
+
+    def test_writes_everything_in_batches(self):
+        # Nothing is written until the `with` block ends, so every batch fills up.
+        release = Event()
+
+        def write(batch):
+            release.wait()
+            self.written.append(batch)
+
+        with BatchWriter(write, batch_size=3, batch_wait_seconds=5) as writer:
+            for record in range(7):
+                writer.put(record)
+            release.set()
+
+        self.assertEqual(sum(self.written, []), list(range(7)))
+        self.assertTrue(all(len(batch) <= 3 for batch in self.written))
+        self.assertEqual(self.written[0], [0, 1, 2])
+
+    def test_writes_a_partial_batch_after_waiting(self):
+        written = Event()
+
+        def write(batch):
+            self.written.append(batch)
+            written.set()
+
+        with BatchWriter(write, batch_size=8, batch_wait_seconds=0.01) as writer:
+            writer.put("only")
+            # The batch is written without waiting for more records, or for the end.
+            self.assertTrue(written.wait(timeout=5))
+
+        self.assertEqual(self.written, [["only"]])
+
+    def test_writes_from_one_background_thread(self):
+        threads = set()
+        with BatchWriter(
+            lambda batch: threads.add(get_ident()), batch_size=1
+        ) as writer:
+            for record in range(3):
+                writer.put(record)
+
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn(get_ident(), threads)
+
+    def test_on_written_follows_a_failed_write(self):
+        def write(batch):
+            if "bad" in batch:
+                raise RuntimeError("Database went away")
+            self.written.append(batch)
+
+        with BatchWriter(write, self.finished.append, batch_size=1) as writer:
+            for record in ["good", "bad", "also good"]:
+                writer.put(record)
+
+        self.assertEqual(self.written, [["good"], ["also good"]])
+        self.assertEqual(self.finished, [["good"], ["bad"], ["also good"]])
+        self.assertIn("Failed to write a batch of 1", self.output.getvalue())
+
+    def test_failing_on_written_does_not_stop_the_writer(self):
+        def on_written(batch):
+            self.finished.append(batch)
+            raise RuntimeError("Heartbeat failed")
+
+        with BatchWriter(self.written.append, on_written, batch_size=1) as writer:
+            for record in range(3):
+                writer.put(record)
+
+        self.assertEqual(self.written, [[0], [1], [2]])
+        self.assertEqual(self.finished, [[0], [1], [2]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+"""
+Tests for how `ResortWriter` writes scraped lifts and trails, checked against the SQL it
+would run on Postgres rather than a live database.
+"""
+import io
+import re
+import unittest
+from collections import namedtuple
+from contextlib import ExitStack, redirect_stderr, redirect_stdout
+from datetime import date, datetime, timezone
+from typing import List
+
+from sqlalchemy.dialects import postgresql
+
+from lib.models import Lift, Resort, Trail
+from webscraper import ResortWriter
+from webscraper.records import ScrapedLift, ScrapedTrail
+
+SCRAPED_AT = datetime(2023, 1, 14, 12, tzinfo=timezone.utc)
+
+UpsertedRow = namedtuple("UpsertedRow", ["name", "is_open", "was_open", "inserted"])
+
+
+class FakeSession:
+    """Stands in for a `Session`, keeping what it's asked to run instead of running it."""
+
+    def __init__(self, rows: List[UpsertedRow] = ()):
+        self.rows = list(rows)
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def all(self) -> List[UpsertedRow]:
+        return self.rows
+
+
+def compile_statement(statement):
+    """Return the SQL and parameters of a statement, as they would be sent to Postgres."""
+    compiled = statement.compile(dialect=postgresql.dialect())
+    return str(compiled), compiled.params
+
+
+class WriterTestCase(unittest.TestCase):
+    """Writes for a single resort, with what the writer prints kept out of test output."""
+
+    def setUp(self):
+        self.session = FakeSession()
+        self.writer = ResortWriter(self.session, Resort(id="resort", name="Resort"))
+        self.output = io.StringIO()
+        with ExitStack() as stack:
+            stack.enter_context(redirect_stdout(self.output))
+            stack.enter_context(redirect_stderr(self.output))
+            self.addCleanup(stack.pop_all().close)
+
+    def upsert(self, model, scraped_data):
+        """Bulk upsert scraped items, and return the SQL + parameters it would run."""
+        self.writer.bulk_upsert(model, scraped_data, SCRAPED_AT)
+        (statement,) = self.session.statements
+        return compile_statement(statement)
+
+
+class TestBulkUpsert(WriterTestCase):
+    """`ResortWriter.bulk_upsert` writes every lift or trail in one statement."""
+
+    LIFTS = [
+        ScrapedLift(
+            name="Vista Quad", unique_name="Vista Quad", status="Open", is_open=True
+        ),
+        ScrapedLift(name="T-Bar", unique_name="T-Bar", status="Closed", is_open=False),
+    ]
+
+    def test_only_updates_rows_that_changed(self):
+        sql, _ = self.upsert(Lift, self.LIFTS)
+        self.assertIn("ON CONFLICT (resort_id, unique_name) DO UPDATE", sql)
+        self.assertIn(
+            "WHERE lifts.name IS DISTINCT FROM excluded.name"
+            " OR lifts.status IS DISTINCT FROM excluded.status"
+            " OR lifts.is_open IS DISTINCT FROM excluded.is_open",
+            sql,
+        )
+
+    def test_records_when_is_open_flips(self):
+        sql, params = self.upsert(Lift, self.LIFTS)
+        opened = re.search(
+            r"last_opened_on = CASE WHEN \(excluded\.is_open AND lifts\.is_open IS NOT"
+            r" true\) THEN %\((\w+)\)s ELSE lifts\.last_opened_on END",
+            sql,
+        )
+        closed = re.search(
+            r"last_closed_on = CASE WHEN \(NOT excluded\.is_open AND lifts\.is_open IS"
+            r" NOT false\) THEN %\((\w+)\)s ELSE lifts\.last_closed_on END",
+            sql,
+        )
+        self.assertIsNotNone(opened, sql)
+        self.assertIsNotNone(closed, sql)
+        self.assertEqual(params[opened.group(1)], date(2023, 1, 14))
+        self.assertEqual(params[closed.group(1)], date(2023, 1, 14))
+
+    def test_returns_previous_state(self):
+        sql, _ = self.upsert(
+            Trail,
+            [
+                ScrapedTrail(
+                    name="Meadows",
+                    unique_name="Meadows_blue",
+                    trail_type="blue",
+                    status="open",
+                    is_open=True,
+                )
+            ],
+        )
+        self.assertIn("RETURNING trails.id, trails.name, trails.is_open", sql)
+        self.assertIn("previous.is_open AS was_open", sql)
+        self.assertIn("previous.id IS NULL AS inserted", sql)
+
+    def test_last_duplicate_wins(self):
+        _, params = self.upsert(
+            Lift,
+            [
+                *self.LIFTS,
+                ScrapedLift(
+                    name="T-Bar", unique_name="T-Bar", status="Open", is_open=True
+                ),
+                ScrapedLift(
+                    name="Unnamed", unique_name=None, status="Open", is_open=True
+                ),
+            ],
+        )
+        unique_names = [
+            value for key, value in params.items() if key.startswith("unique_name_m")
+        ]
+        self.assertEqual(unique_names, ["Vista Quad", "T-Bar"])
+        self.assertEqual(params["status_m1"], "Open")
+        self.assertIn("Skipping items", self.output.getvalue())
+
+    def test_nothing_to_write(self):
+        self.assertEqual(self.writer.bulk_upsert(Lift, [], SCRAPED_AT), [])
+        self.assertEqual(self.session.statements, [])
+
+
+class TestWriteItems(WriterTestCase):
+    """`ResortWriter.write_items` counts and reports what the upsert changed."""
+
+    def test_counts_changed_rows(self):
+        self.session.rows = [
+            UpsertedRow("Vista Quad", True, False, False),
+            UpsertedRow("Gondola", True, None, True),
+            UpsertedRow("T-Bar", False, False, False),
+        ]
+        self.writer.write_items(Lift, TestBulkUpsert.LIFTS, SCRAPED_AT)
+        self.assertEqual(self.writer.changed_items, 3)
+        output = self.output.getvalue()
+        self.assertIn("new item Gondola", output)
+        self.assertIn("UPDATE:  Vista Quad {'is_open': (False, True)}", output)
+        self.assertNotIn("T-Bar", output)
+
+    def test_examine_changes(self):
+        lift = Lift(name="Vista Quad")
+        self.writer.examine_changes(lift, {"is_open": (False, True)}, SCRAPED_AT)
+        self.assertEqual(lift.last_opened_on, date(2023, 1, 14))
+        self.assertIsNone(lift.last_closed_on)
+
+        self.writer.examine_changes(lift, {"is_open": (True, False)}, SCRAPED_AT)
+        self.assertEqual(lift.last_closed_on, date(2023, 1, 14))
+        self.assertEqual(self.writer.changed_items, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
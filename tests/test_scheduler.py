@@ -0,0 +1,194 @@
+"""
+Tests for how often each resort is scraped, through the day and out of season.
+"""
+import unittest
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from lib.models import Resort
+from webscraper.scheduler import (
+    MAX_INTERVAL_MINUTES,
+    MIN_INTERVAL_MINUTES,
+    OFF_SEASON_INTERVAL_MINUTES,
+    OVERNIGHT_INTERVAL_MINUTES,
+    get_next_scrape_at,
+    get_scrape_interval,
+    is_off_season,
+    update_change_rate,
+)
+
+EASTERN = ZoneInfo("America/New_York")
+
+
+def at(hour: int, minute: int = 0, tz: ZoneInfo = EASTERN) -> datetime:
+    """Return a time on the day the tests are set on, in the given timezone."""
+    return datetime(2023, 1, 14, hour, minute, tzinfo=tz)
+
+
+def open_resort(**kwargs) -> Resort:
+    """Return a resort in the middle of its season, with a couple of lifts turning."""
+    return Resort(
+        **{
+            "timezone": "America/New_York",
+            "open_lifts": 2,
+            "open_trails": 10,
+            "last_opened_on": date(2023, 1, 14),
+            **kwargs,
+        }
+    )
+
+
+def closed_resort(**kwargs) -> Resort:
+    """Return a resort that hasn't opened in weeks."""
+    return open_resort(
+        **{
+            "open_lifts": 0,
+            "open_trails": 0,
+            "last_opened_on": date(2022, 12, 1),
+            **kwargs,
+        }
+    )
+
+
+class TestScrapeInterval(unittest.TestCase):
+    """`get_scrape_interval` at each time of day, in and out of season."""
+
+    def test_opening_hours_are_as_frequent_as_allowed(self):
+        for hour in (7, 8, 9):
+            self.assertEqual(
+                get_scrape_interval(open_resort(change_rate=0.0), at(hour, 30)),
+                timedelta(minutes=MIN_INTERVAL_MINUTES),
+            )
+
+    def test_daytime_backs_off_with_change_rate(self):
+        self.assertEqual(
+            get_scrape_interval(open_resort(change_rate=0.0), at(12)),
+            timedelta(minutes=MAX_INTERVAL_MINUTES),
+        )
+        self.assertEqual(
+            get_scrape_interval(open_resort(change_rate=1.0), at(12)),
+            timedelta(minutes=MIN_INTERVAL_MINUTES),
+        )
+        # Resorts that haven't been scraped yet are assumed to be changing.
+        self.assertEqual(
+            get_scrape_interval(open_resort(change_rate=None), at(12)),
+            timedelta(minutes=MIN_INTERVAL_MINUTES),
+        )
+
+    def test_popularity_shortens_the_daytime_interval(self):
+        unwatched = get_scrape_interval(open_resort(change_rate=0.0), at(12))
+        watched = get_scrape_interval(
+            open_resort(change_rate=0.0, popularity=1.0), at(12)
+        )
+        self.assertEqual(watched, unwatched / 2)
+        # But never below the minimum.
+        self.assertEqual(
+            get_scrape_interval(open_resort(change_rate=1.0, popularity=1.0), at(12)),
+            timedelta(minutes=MIN_INTERVAL_MINUTES),
+        )
+
+    def test_overnight(self):
+        self.assertEqual(
+            get_scrape_interval(open_resort(), at(22)),
+            timedelta(minutes=OVERNIGHT_INTERVAL_MINUTES),
+        )
+        # Overnight scrapes don't sleep through opening.
+        self.assertEqual(get_scrape_interval(open_resort(), at(5)), timedelta(hours=2))
+        self.assertEqual(
+            get_scrape_interval(open_resort(), at(5, 30)), timedelta(minutes=90)
+        )
+
+    def test_off_season(self):
+        self.assertEqual(
+            get_scrape_interval(closed_resort(), at(11)),
+            timedelta(minutes=OFF_SEASON_INTERVAL_MINUTES),
+        )
+        # Out of season scrapes are capped at the next opening too, so a resort that
+        # opens for the season is caught that morning.
+        self.assertEqual(
+            get_scrape_interval(closed_resort(), at(19)), timedelta(hours=12)
+        )
+        self.assertEqual(
+            get_scrape_interval(closed_resort(), at(23)), timedelta(hours=8)
+        )
+        self.assertEqual(
+            get_scrape_interval(closed_resort(), at(7)),
+            timedelta(minutes=OFF_SEASON_INTERVAL_MINUTES),
+        )
+        self.assertEqual(
+            get_scrape_interval(closed_resort(), at(6, 59)), timedelta(minutes=1)
+        )
+
+    def test_uses_the_resorts_timezone(self):
+        # 8:00 in Denver is 10:00 in New York, which is past opening hours there.
+        denver = ZoneInfo("America/Denver")
+        resort = open_resort(change_rate=0.0, timezone="America/Denver")
+        self.assertEqual(
+            get_scrape_interval(resort, at(8, tz=denver).astimezone(EASTERN)),
+            timedelta(minutes=MIN_INTERVAL_MINUTES),
+        )
+        resort = open_resort(change_rate=0.0, timezone=None)
+        self.assertEqual(
+            get_scrape_interval(resort, at(8, tz=denver)),
+            timedelta(minutes=MAX_INTERVAL_MINUTES),
+        )
+
+    def test_next_scrape_at(self):
+        resort = open_resort(change_rate=1.0)
+        now = at(12)
+        self.assertEqual(
+            get_next_scrape_at(resort, changed=True, now=now),
+            now + timedelta(minutes=MIN_INTERVAL_MINUTES),
+        )
+
+
+class TestOffSeason(unittest.TestCase):
+    """`is_off_season` only looks at the resort, and never changes it."""
+
+    def test_open_resort(self):
+        self.assertFalse(is_off_season(open_resort(open_trails=0), at(12)))
+        self.assertFalse(is_off_season(open_resort(open_lifts=0), at(12)))
+
+    def test_recently_open_resort(self):
+        resort = closed_resort(last_opened_on=date(2023, 1, 11))
+        self.assertFalse(is_off_season(resort, at(12)))
+        resort = closed_resort(last_opened_on=date(2023, 1, 10))
+        self.assertTrue(is_off_season(resort, at(12)))
+
+    def test_never_opened(self):
+        resort = closed_resort(last_opened_on=None)
+        self.assertTrue(is_off_season(resort, at(12)))
+        self.assertIsNone(resort.last_opened_on)
+
+    def test_does_not_record_openings(self):
+        resort = open_resort(last_opened_on=date(2022, 12, 1))
+        self.assertFalse(is_off_season(resort, at(12)))
+        self.assertEqual(resort.last_opened_on, date(2022, 12, 1))
+
+
+class TestChangeRate(unittest.TestCase):
+    """`update_change_rate` is a moving average of whether scrapes found changes."""
+
+    def test_starts_out_changing(self):
+        resort = Resort()
+        self.assertAlmostEqual(update_change_rate(resort, False), 0.7)
+        self.assertAlmostEqual(resort.change_rate, 0.7)
+
+    def test_moves_towards_the_latest_scrape(self):
+        resort = Resort(change_rate=0.5)
+        self.assertAlmostEqual(update_change_rate(resort, True), 0.65)
+        self.assertAlmostEqual(update_change_rate(resort, False), 0.455)
+
+    def test_stays_between_0_and_1(self):
+        resort = Resort(change_rate=0.0)
+        for _ in range(50):
+            update_change_rate(resort, False)
+        self.assertEqual(resort.change_rate, 0.0)
+        for _ in range(50):
+            update_change_rate(resort, True)
+        self.assertLessEqual(resort.change_rate, 1.0)
+        self.assertGreater(resort.change_rate, 0.99)
+
+
+if __name__ == "__main__":
+    unittest.main()
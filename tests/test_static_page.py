@@ -0,0 +1,190 @@
+"""
+Tests for `StaticPage` + `StaticElement`, which stand in for Selenium's `WebDriver` and
+`WebElement` when parsing captured pages.
+"""
+import unittest
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+from webscraper.static_page import StaticPage, to_css_selector
+
+PAGE = """
+<html>
+  <body>
+    <div id="report" class="report open">
+      <h2 class="title">  Lower
+         Mountain  </h2>
+      <ul>
+        <li class="trail"><span class="name">Bear Trap</span>
+          <i class="icon groomed"></i></li>
+        <li class="trail"><span class="name">Cliffs</span></li>
+      </ul>
+      <input name="season" value="2023">
+    </div>
+  </body>
+</html>
+"""
+
+
+class TestToCssSelector(unittest.TestCase):
+    """Translating Selenium locators into CSS selectors."""
+
+    def test_locators(self):
+        self.assertEqual(to_css_selector(By.CSS_SELECTOR, "div > p"), "div > p")
+        self.assertEqual(to_css_selector(By.CLASS_NAME, "name"), ".name")
+        self.assertEqual(to_css_selector(By.TAG_NAME, "li"), "li")
+        self.assertEqual(to_css_selector(By.ID, "report"), '[id="report"]')
+        self.assertEqual(to_css_selector(By.NAME, "season"), '[name="season"]')
+        self.assertIsNone(to_css_selector(By.XPATH, "//div"))
+
+
+class TestStaticElement(unittest.TestCase):
+    """Reading elements the way a `WebElement` would."""
+
+    def setUp(self):
+        self.page = StaticPage(PAGE)
+
+    def test_text_collapses_whitespace(self):
+        title = self.page.find_element(By.CLASS_NAME, "title")
+        self.assertEqual(title.text, "Lower Mountain")
+
+    def test_text_keeps_lines(self):
+        trails = self.page.find_element(By.TAG_NAME, "ul")
+        self.assertEqual(trails.text, "Bear Trap\nCliffs")
+
+    def test_text_breaks_lines_like_a_browser(self):
+        page = StaticPage(
+            """
+            <div id="lift">
+              <table><tr><td>Vista</td><td>Open</td></tr></table>
+              <p>Wind <b>hold</b>
+                 likely<br>after noon</p>
+              <script>var status = "hidden";</script>
+            </div>
+            """
+        )
+        self.assertEqual(
+            page.find_element(By.ID, "lift").text,
+            "Vista Open\nWind hold likely\nafter noon",
+        )
+
+    def test_get_attribute(self):
+        report = self.page.find_element(By.ID, "report")
+        self.assertEqual(report.get_attribute("class"), "report open")
+        self.assertIsNone(report.get_attribute("data-missing"))
+        self.assertEqual(report.tag_name, "div")
+
+        title = self.page.find_element(By.CLASS_NAME, "title")
+        self.assertIn("\n", title.get_attribute("textContent"))
+        self.assertEqual(title.get_attribute("innerText"), "Lower Mountain")
+
+    def test_find_elements(self):
+        trails = self.page.find_elements(By.CSS_SELECTOR, "li.trail")
+        self.assertEqual(
+            [trail.find_element(By.CLASS_NAME, "name").text for trail in trails],
+            ["Bear Trap", "Cliffs"],
+        )
+        self.assertEqual(self.page.find_elements(By.CLASS_NAME, "missing"), [])
+        self.assertEqual(len(self.page.find_elements(By.NAME, "season")), 1)
+
+    def test_find_element_raises_when_missing(self):
+        with self.assertRaises(NoSuchElementException):
+            self.page.find_element(By.CLASS_NAME, "missing")
+
+    def test_find_elements_by_xpath(self):
+        trail = self.page.find_elements(By.CSS_SELECTOR, "li.trail")[0]
+        report = trail.find_element(By.XPATH, "ancestor::div[@id='report']")
+        self.assertEqual(report.get_attribute("id"), "report")
+
+    def test_invalid_xpath_raises_no_such_element(self):
+        with self.assertRaises(NoSuchElementException):
+            self.page.find_elements(By.XPATH, "ancestor::[")
+
+    def test_unsupported_locator(self):
+        with self.assertRaises(NotImplementedError):
+            self.page.find_elements(By.LINK_TEXT, "Cliffs")
+
+    def test_elements_are_equal_when_they_wrap_the_same_node(self):
+        first = self.page.find_element(By.CSS_SELECTOR, "li.trail")
+        again = self.page.find_elements(By.CSS_SELECTOR, "li.trail")[0]
+        other = self.page.find_elements(By.CSS_SELECTOR, "li.trail")[1]
+        self.assertEqual(first, again)
+        self.assertEqual(hash(first), hash(again))
+        self.assertNotEqual(first, other)
+        self.assertIn(again, {first})
+
+    def test_summarize(self):
+        first, second = self.page.find_elements(By.CSS_SELECTOR, "li.trail")
+        summary = first.summarize(["i.groomed", "b"])
+        self.assertEqual(set(summary["classes"]), {"name", "icon", "groomed"})
+        self.assertEqual(summary["present"], [True, False])
+        # Like the browser script, only elements within the row are summarized.
+        self.assertNotIn("trail", second.summarize([])["classes"])
+
+
+class TestExtractRows(unittest.TestCase):
+    """Bulk extraction, matching `EXTRACT_ROWS_SCRIPT`."""
+
+    def test_fields(self):
+        page = StaticPage(PAGE)
+        rows = page.extract_rows(
+            "li.trail",
+            {
+                "name": [".name", "text"],
+                "groomed": [".groomed", "exists"],
+                "icons": ["i", "all"],
+                "icon_class": ["i", "@class"],
+                "missing": [".missing", "text"],
+                "row_class": [None, "class"],
+            },
+        )
+        self.assertEqual(
+            rows,
+            [
+                {
+                    "name": "Bear Trap",
+                    "groomed": True,
+                    "icons": [""],
+                    "icon_class": "icon groomed",
+                    "missing": None,
+                    "row_class": "trail",
+                },
+                {
+                    "name": "Cliffs",
+                    "groomed": False,
+                    "icons": [],
+                    "icon_class": None,
+                    "missing": None,
+                    "row_class": "trail",
+                },
+            ],
+        )
+
+    def test_sections_follow_document_order(self):
+        page = StaticPage(
+            """
+            <div>
+              <div class="row">Before any section</div>
+              <h2>Easier</h2>
+              <div class="row">Bunny Slope</div>
+              <div class="row">Meadows</div>
+              <div><h2>Harder</h2></div>
+              <div class="row">The Wall</div>
+            </div>
+            """
+        )
+        rows = page.extract_rows(".row", {"name": [None, "text"]}, "h2")
+        self.assertEqual(
+            rows,
+            [
+                {"name": "Before any section", "section": None},
+                {"name": "Bunny Slope", "section": "Easier"},
+                {"name": "Meadows", "section": "Easier"},
+                {"name": "The Wall", "section": "Harder"},
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
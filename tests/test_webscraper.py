@@ -0,0 +1,549 @@
+"""
+Tests for scraping a single resort with `Webscraper`, with a stand-in for Chrome that
+serves made-up reports, so that nothing is launched or fetched.
+"""
+import io
+import os
+import unittest
+from contextlib import ExitStack, redirect_stderr, redirect_stdout
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from unittest.mock import patch
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+from lib.models import Resort
+import webscraper
+from webscraper import (
+    Webscraper,
+    capture_in_browser,
+    record_scrape_status,
+    scrape_resort,
+)
+from webscraper.browser_pool import BrowserPool
+from webscraper.parser import READINESS_SCRIPT, Field, Parser
+from webscraper.records import ScrapedLift
+from webscraper.static_page import StaticPage
+
+TRAIL_REPORT_URL = "https://resort.example.com/trails"
+SNOW_REPORT_URL = "https://resort.example.com/snow"
+
+TRAIL_REPORT = """
+<ul>
+  <li class="lift"><span class="name">Vista Quad</span><b class="status">Open</b></li>
+  <li class="trail" data-type="blue">
+    <span class="name">Meadows</span><b class="status">Open</b>
+  </li>
+</ul>
+"""
+SNOW_REPORT = '<div id="snow"><span class="base">24"</span></div>'
+
+
+class ReportParser(Parser):
+    """Parses `TRAIL_REPORT` and `SNOW_REPORT`."""
+
+    lift_css_selector = "li.lift"
+    trail_css_selector = "li.trail"
+    snow_report_css_selector = "#snow"
+    trail_type_to_rating = {"blue": 1}
+
+    lift_fields = {"name": Field(".name"), "status": Field(".status")}
+    trail_fields = {
+        "name": Field(".name"),
+        "trail_type": Field(None, "@data-type"),
+        "status": Field(".status"),
+    }
+
+    def get_base_layer(self, snow_report):
+        return {"inches": snow_report.find_element(By.CLASS_NAME, "base").text}
+
+
+class FakeSwitchTo:
+    """Stands in for `WebDriver.switch_to`."""
+
+    def __init__(self, browser: "FakeBrowser"):
+        self.browser = browser
+
+    def window(self, handle: str) -> None:
+        self.browser.current_window_handle = handle
+
+
+class FakeBrowser:
+    """
+    Stands in for a running Chrome that serves `sites` (by URL), in as many tabs as it's
+    asked to open. Pages are always fully loaded, with the network long idle.
+    """
+
+    def __init__(self, sites: Dict[str, str]):
+        self.sites = sites
+        self.tabs: Dict[str, Optional[str]] = {"main": None}
+        self.current_window_handle = "main"
+        self.switch_to = FakeSwitchTo(self)
+        self.quit_called = False
+        self.loaded = []
+
+    @property
+    def window_handles(self):
+        return list(self.tabs)
+
+    @property
+    def page_source(self) -> str:
+        return self.sites.get(self.tabs[self.current_window_handle], "<html></html>")
+
+    def get(self, url: str) -> None:
+        self.tabs[self.current_window_handle] = url
+        self.loaded.append(url)
+
+    def execute_script(self, script: str, *args):
+        if script == READINESS_SCRIPT:
+            page = StaticPage(self.page_source)
+            return {
+                "counts": [
+                    len(page.find_elements(By.CSS_SELECTOR, selector))
+                    for selector in args[0]
+                ],
+                "complete": True,
+                "idleMs": 60_000,
+                "pending": 0,
+            }
+        if script.startswith("window.open("):
+            self.tabs[f"tab{len(self.tabs)}"] = None
+        elif script.startswith("window.location.href"):
+            self.get(args[0])
+        return None
+
+    def execute_cdp_cmd(self, *_) -> None:
+        pass
+
+    def set_page_load_timeout(self, _) -> None:
+        pass
+
+    def set_script_timeout(self, _) -> None:
+        pass
+
+    def close(self) -> None:
+        del self.tabs[self.current_window_handle]
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+class ResortSession:
+    """Stands in for a `Session` that only knows about one resort."""
+
+    def __init__(self, resort: Resort):
+        self.resort = resort
+
+    def __enter__(self) -> "ResortSession":
+        return self
+
+    def __exit__(self, *_) -> None:
+        pass
+
+    def get(self, _, resort_id: str) -> Resort:
+        assert resort_id == self.resort.id
+        return self.resort
+
+    def expunge(self, _) -> None:
+        pass
+
+
+class RecordCollector:
+    """Stands in for a `BatchWriter`, keeping every `ScrapeRecord` it's handed."""
+
+    def __init__(self):
+        self.records = []
+
+    def put(self, record) -> None:
+        self.records.append(record)
+
+
+def make_resort(**kwargs) -> Resort:
+    """Return a resort whose reports are served by `FakeBrowser`."""
+    return Resort(
+        **{
+            "id": "resort",
+            "name": "Resort",
+            "parser_name": "report.ReportParser",
+            "trail_report_url": TRAIL_REPORT_URL,
+            "snow_report_url": SNOW_REPORT_URL,
+            **kwargs,
+        }
+    )
+
+
+class WebscraperTestCase(unittest.TestCase):
+    """Hands out `ReportParser`s for every resort, and keeps scraper output quiet."""
+
+    def setUp(self):
+        with ExitStack() as stack:
+            stack.enter_context(
+                patch("webscraper.get_parser_class", return_value=ReportParser)
+            )
+            self.output = io.StringIO()
+            stack.enter_context(redirect_stdout(self.output))
+            stack.enter_context(redirect_stderr(self.output))
+            self.addCleanup(stack.pop_all().close)
+
+
+class TestCaptureReports(WebscraperTestCase):
+    """Capturing reports in the browser, to be parsed once it has been given back."""
+
+    def capture(self, sites: Dict[str, str], resort: Resort) -> Webscraper:
+        """Capture a resort's reports in a one-browser pool, then parse them."""
+        browser = FakeBrowser(sites)
+        pool = BrowserPool(size=1)
+        with patch("webscraper.browser_pool.get_browser", return_value=browser):
+            webscraper = Webscraper(None, resort, "html")
+            capture_in_browser(webscraper, pool)
+            # The browser is handed back in one piece, ready for the next resort.
+            self.assertFalse(browser.quit_called)
+            self.assertIs(pool.acquire(), browser)
+
+        webscraper.scrape_trail_report()
+        webscraper.scrape_snow_report()
+        return webscraper
+
+    def test_captures_both_reports(self):
+        resort = make_resort()
+        webscraper = self.capture(
+            {TRAIL_REPORT_URL: TRAIL_REPORT, SNOW_REPORT_URL: SNOW_REPORT}, resort
+        )
+        self.assertEqual(webscraper.errors, [])
+        self.assertEqual(webscraper.snow_report_errors, [])
+        self.assertEqual(
+            [lift.name for lift in webscraper.scraped_lifts], ["Vista Quad"]
+        )
+        self.assertEqual(
+            [trail.name for trail in webscraper.scraped_trails], ["Meadows"]
+        )
+        self.assertEqual(resort.snow_report["baseLayer"], {"inches": '24"'})
+
+    def test_missing_trail_report_still_captures_the_snow_report(self):
+        resort = make_resort()
+        webscraper = self.capture(
+            {
+                TRAIL_REPORT_URL: "<p>Report unavailable</p>",
+                SNOW_REPORT_URL: SNOW_REPORT,
+            },
+            resort,
+        )
+        self.assertTrue(webscraper.captured)
+        # The failure is only recorded once, not again when parsing.
+        self.assertEqual(len(webscraper.errors), 1)
+        self.assertIsInstance(webscraper.errors[0], NoSuchElementException)
+        self.assertIsNone(webscraper.scraped_lifts)
+        self.assertEqual(webscraper.snow_report_errors, [])
+        self.assertEqual(resort.snow_report["baseLayer"], {"inches": '24"'})
+
+    def test_missing_snow_report_doesnt_fail_the_scrape(self):
+        resort = make_resort()
+        webscraper = self.capture(
+            {TRAIL_REPORT_URL: TRAIL_REPORT, SNOW_REPORT_URL: "<p>No snow</p>"}, resort
+        )
+        self.assertEqual(webscraper.errors, [])
+        self.assertEqual(len(webscraper.snow_report_errors), 1)
+        self.assertIsInstance(webscraper.snow_report_errors[0], NoSuchElementException)
+        self.assertEqual(len(webscraper.scraped_trails), 1)
+        self.assertIsNone(resort.snow_report)
+
+    def test_snow_report_on_the_trail_report(self):
+        resort = make_resort(snow_report_url=None)
+        webscraper = self.capture(
+            {TRAIL_REPORT_URL: "<p>Report unavailable</p>" + SNOW_REPORT}, resort
+        )
+        self.assertEqual(len(webscraper.errors), 1)
+        self.assertEqual(webscraper.snow_report_errors, [])
+        self.assertEqual(resort.snow_report["baseLayer"], {"inches": '24"'})
+
+
+class TestTrailReportHash(WebscraperTestCase):
+    """Leaving lifts + trails unwritten when the trail report hasn't changed."""
+
+    def scrape(self, resort: Resort, trail_report: str = TRAIL_REPORT) -> Webscraper:
+        """Parse a captured trail report, as if it had just been loaded."""
+        webscraper = Webscraper(None, resort, "html")
+        webscraper.use_fetched_reports({TRAIL_REPORT_URL: trail_report})
+        webscraper.probed_validators = {TRAIL_REPORT_URL: {"etag": '"v2"'}}
+        webscraper.scrape_trail_report()
+        self.assertEqual(webscraper.errors, [])
+        return webscraper
+
+    def test_hash_ignores_order(self):
+        lifts = [
+            ScrapedLift(name="A", unique_name="A", status="Open", is_open=True),
+            ScrapedLift(name="B", unique_name="B", status="Closed", is_open=False),
+        ]
+        self.assertEqual(
+            Webscraper.hash_trail_report(lifts, []),
+            Webscraper.hash_trail_report(lifts[::-1], []),
+        )
+        self.assertNotEqual(
+            Webscraper.hash_trail_report(lifts, []),
+            Webscraper.hash_trail_report([lifts[0]._replace(is_open=False)], []),
+        )
+
+    def test_first_scrape_is_written(self):
+        resort = make_resort(snow_report_url=None)
+        webscraper = self.scrape(resort)
+        self.assertEqual(len(webscraper.scraped_lifts), 1)
+        self.assertEqual(len(webscraper.scraped_trails), 1)
+        self.assertEqual(
+            resort.trail_report_hash,
+            Webscraper.hash_trail_report(
+                webscraper.scraped_lifts, webscraper.scraped_trails
+            ),
+        )
+        self.assertEqual((resort.open_lifts, resort.total_trails), (1, 1))
+        self.assertEqual(resort.report_validators, {TRAIL_REPORT_URL: {"etag": '"v2"'}})
+
+    def test_unchanged_report_isnt_written(self):
+        first = self.scrape(make_resort(snow_report_url=None))
+        resort = make_resort(
+            snow_report_url=None,
+            trail_report_hash=first.resort.trail_report_hash,
+            report_validators={TRAIL_REPORT_URL: {"etag": '"v1"'}},
+        )
+        webscraper = self.scrape(resort)
+        self.assertIsNone(webscraper.scraped_lifts)
+        self.assertIsNone(webscraper.scraped_trails)
+        self.assertIsNotNone(resort.updated_at)
+        # The report is still known to be unchanged as of these validators.
+        self.assertEqual(resort.report_validators, {TRAIL_REPORT_URL: {"etag": '"v2"'}})
+
+    def test_changed_report_is_written(self):
+        resort = make_resort(snow_report_url=None)
+        resort.trail_report_hash = self.scrape(resort).resort.trail_report_hash
+        webscraper = self.scrape(
+            resort, TRAIL_REPORT.replace("Open</b></li>", "Closed</b></li>")
+        )
+        self.assertEqual(webscraper.scraped_lifts[0].status, "Closed")
+        self.assertEqual(resort.open_lifts, 0)
+
+
+class TestProbeReports(WebscraperTestCase):
+    """Skipping reports whose server says they haven't changed since the last scrape."""
+
+    PROBED = {TRAIL_REPORT_URL: {"etag": '"v1"'}, SNOW_REPORT_URL: {"etag": '"s1"'}}
+
+    def make_resort(self, **kwargs) -> Resort:
+        """Return a resort that has been scraped before, with these validators."""
+        return make_resort(
+            **{
+                "probe_reports": True,
+                "trail_report_hash": "hash",
+                "snow_report": {"baseLayer": {}},
+                "report_validators": self.PROBED,
+                **kwargs,
+            }
+        )
+
+    def probe(self, resort: Resort, probed: dict) -> Webscraper:
+        """Probe a resort's reports, with the server answering `probed`."""
+        webscraper = Webscraper(None, resort, "html")
+        with patch("webscraper.probe_pages_sync", return_value=probed) as probe:
+            webscraper.probe_reports()
+        probe.assert_called_once_with(webscraper.report_urls())
+        return webscraper
+
+    def test_unchanged_reports_are_skipped(self):
+        webscraper = self.probe(self.make_resort(), self.PROBED)
+        self.assertTrue(webscraper.skip_trail_report)
+        self.assertTrue(webscraper.skip_snow_report)
+
+    def test_changed_reports_are_scraped(self):
+        webscraper = self.probe(
+            self.make_resort(), {**self.PROBED, SNOW_REPORT_URL: {"etag": '"s2"'}}
+        )
+        self.assertTrue(webscraper.skip_trail_report)
+        self.assertFalse(webscraper.skip_snow_report)
+        self.assertEqual(
+            webscraper.probed_validators[SNOW_REPORT_URL], {"etag": '"s2"'}
+        )
+
+    def test_snow_report_on_the_trail_report(self):
+        resort = self.make_resort(
+            snow_report_url=None, report_validators={TRAIL_REPORT_URL: {"etag": '"v1"'}}
+        )
+        webscraper = self.probe(resort, {TRAIL_REPORT_URL: {"etag": '"v1"'}})
+        self.assertTrue(webscraper.skip_trail_report)
+        self.assertTrue(webscraper.skip_snow_report)
+
+    def test_reports_never_scraped_are_scraped(self):
+        resort = self.make_resort(trail_report_hash=None, snow_report=None)
+        webscraper = self.probe(resort, self.PROBED)
+        self.assertFalse(webscraper.skip_trail_report)
+        self.assertFalse(webscraper.skip_snow_report)
+
+    def test_failed_probes_are_scraped(self):
+        webscraper = self.probe(
+            self.make_resort(),
+            {**self.PROBED, TRAIL_REPORT_URL: ConnectionError("Connection refused")},
+        )
+        self.assertFalse(webscraper.skip_trail_report)
+        self.assertTrue(webscraper.skip_snow_report)
+
+    def test_unchanged_resort_skips_the_browser(self):
+        resort = self.make_resort()
+        writer = RecordCollector()
+        browser_pool = BrowserPool(size=1)
+        with patch("webscraper.get_session", return_value=ResortSession(resort)), patch(
+            "webscraper.probe_pages_sync", return_value=self.PROBED
+        ), patch("webscraper.browser_pool.get_browser") as get_browser:
+            scrape_resort(resort.id, browser_pool=browser_pool, writer=writer)
+
+        get_browser.assert_not_called()
+        (record,) = writer.records
+        self.assertEqual(record.status, "ok")
+        self.assertIsNone(record.lifts)
+        self.assertIn("updated_at", record.resort_changes)
+
+    def test_resorts_that_dont_opt_in_arent_probed(self):
+        resort = self.make_resort(probe_reports=False)
+        writer = RecordCollector()
+        browser = FakeBrowser(
+            {TRAIL_REPORT_URL: TRAIL_REPORT, SNOW_REPORT_URL: SNOW_REPORT}
+        )
+        with patch("webscraper.get_session", return_value=ResortSession(resort)), patch(
+            "webscraper.probe_pages_sync"
+        ) as probe, patch("webscraper.browser_pool.get_browser", return_value=browser):
+            scrape_resort(resort.id, parse_engine="html", writer=writer)
+
+        probe.assert_not_called()
+        (record,) = writer.records
+        self.assertEqual(record.status, "ok")
+        self.assertEqual(len(record.lifts), 1)
+
+
+class TestScrapeStatus(WebscraperTestCase):
+    """Scheduling the next scrape after one succeeds, fails, or keeps failing."""
+
+    def assert_next_scrape_in(self, resort: Resort, minutes: float) -> None:
+        """Check that `record_scrape_status` just scheduled the resort `minutes` out."""
+        expected = datetime.now(timezone.utc) + timedelta(minutes=minutes)
+        self.assertAlmostEqual(
+            resort.next_scrape_at, expected, delta=timedelta(seconds=5)
+        )
+
+    def test_failures_back_off_exponentially(self):
+        resort = make_resort()
+        for failures, minutes in enumerate([10, 20, 40, 80], start=1):
+            record_scrape_status(resort, "failed")
+            self.assertEqual(resort.consecutive_failures, failures)
+            self.assertEqual(resort.last_scrape_status, "failed")
+            self.assert_next_scrape_in(resort, minutes)
+
+    def test_backoff_is_capped(self):
+        resort = make_resort(consecutive_failures=6)
+        with patch("webscraper.BREAKER_THRESHOLD", 10):
+            record_scrape_status(resort, "timed_out")
+        self.assert_next_scrape_in(resort, 240)
+
+    def test_breaker_opens_after_repeated_failures(self):
+        resort = make_resort(consecutive_failures=4)
+        record_scrape_status(resort, "failed")
+        self.assertEqual(resort.consecutive_failures, 5)
+        self.assert_next_scrape_in(resort, 360)
+        self.assertIn("breaker open", self.output.getvalue())
+
+    def test_success_resets_failures(self):
+        resort = make_resort(
+            consecutive_failures=7,
+            timezone="America/New_York",
+            open_lifts=2,
+            open_trails=10,
+        )
+        with patch(
+            "webscraper.get_next_scrape_at", return_value="next"
+        ) as get_next_scrape_at:
+            record_scrape_status(resort, "ok", changed=True)
+        self.assertEqual(resort.consecutive_failures, 0)
+        self.assertEqual(resort.last_scrape_status, "ok")
+        self.assertEqual(resort.next_scrape_at, "next")
+        self.assertIs(get_next_scrape_at.call_args.args[1], True)
+        self.assertIsNotNone(resort.last_opened_on)
+
+    def scrape(self, resort: Resort, sites: Dict[str, str], **kwargs):
+        """Scrape a resort in a `FakeBrowser`, returning the browser and its record."""
+        writer = RecordCollector()
+        browser = FakeBrowser(sites)
+        with patch("webscraper.get_session", return_value=ResortSession(resort)), patch(
+            "webscraper.browser_pool.get_browser", return_value=browser
+        ):
+            scrape_resort(resort.id, writer=writer, **kwargs)
+        (record,) = writer.records
+        return browser, record
+
+    def test_open_breaker_only_probes_the_trail_report(self):
+        resort = make_resort(consecutive_failures=5)
+        browser, record = self.scrape(
+            resort,
+            {TRAIL_REPORT_URL: TRAIL_REPORT, SNOW_REPORT_URL: SNOW_REPORT},
+            parse_engine="html",
+        )
+        self.assertEqual(record.status, "ok")
+        self.assertEqual(len(record.lifts), 1)
+        self.assertNotIn(SNOW_REPORT_URL, browser.loaded)
+        self.assertIsNone(resort.snow_report)
+
+    def test_broken_snow_report_doesnt_fail_the_scrape(self):
+        resort = make_resort()
+        _, record = self.scrape(
+            resort,
+            {TRAIL_REPORT_URL: TRAIL_REPORT, SNOW_REPORT_URL: "<p>No snow</p>"},
+            parse_engine="html",
+        )
+        self.assertEqual(record.status, "ok")
+        self.assertEqual(len(record.trails), 1)
+        self.assertEqual(record.run["error_class"], "NoSuchElementException")
+
+    def test_broken_trail_report_fails_the_scrape(self):
+        resort = make_resort()
+        _, record = self.scrape(
+            resort,
+            {
+                TRAIL_REPORT_URL: "<p>Report unavailable</p>",
+                SNOW_REPORT_URL: SNOW_REPORT,
+            },
+            parse_engine="html",
+        )
+        self.assertEqual(record.status, "failed")
+        self.assertIsNone(record.lifts)
+        self.assertEqual(resort.snow_report["baseLayer"], {"inches": '24"'})
+
+
+class TestSettings(unittest.TestCase):
+    """Settings come from `.env`, then the environment, then their defaults."""
+
+    def setUp(self):
+        # Whatever a test loads, the rest of the suite runs with the usual settings.
+        self.addCleanup(webscraper.load_config)
+
+    def test_get_setting(self):
+        with patch("webscraper.CONFIG", {"SCRAPER_WORKERS": "8"}), patch.dict(
+            os.environ, {"SCRAPER_WORKERS": "2", "BROWSER_MAX_PAGES": "20"}
+        ):
+            self.assertEqual(webscraper.get_setting("SCRAPER_WORKERS", 4), 8)
+            self.assertEqual(webscraper.get_setting("BROWSER_MAX_PAGES", 50), 20)
+            self.assertEqual(webscraper.get_setting("BROWSER_MAX_RSS_MB", 1024), 1024)
+
+    def test_types(self):
+        config = {"BULK_UPSERT": "False", "PROBE_REPORTS": "yes", "TIMEOUT": "1.5"}
+        with patch("webscraper.CONFIG", config):
+            self.assertIs(webscraper.get_setting("BULK_UPSERT", True), False)
+            self.assertIs(webscraper.get_setting("PROBE_REPORTS", True), False)
+            self.assertEqual(webscraper.get_setting("TIMEOUT", 1, float), 1.5)
+            self.assertEqual(
+                webscraper.get_setting("PARSE_ENGINE", "browser"), "browser"
+            )
+
+    def test_reload(self):
+        with patch("webscraper.dotenv_values", return_value={"PARSE_ENGINE": "html"}):
+            webscraper.load_config()
+        self.assertEqual(webscraper.PARSE_ENGINE, "html")
+        self.assertEqual(webscraper.BREAKER_THRESHOLD, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
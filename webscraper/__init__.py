@@ -3,27 +3,147 @@
 Webscraper
 """
 from datetime import datetime, timedelta, timezone
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from enum import Enum
+from functools import lru_cache
 from importlib import import_module
-import sys
-from time import sleep
+from os import getenv
+from threading import Event
+from time import monotonic
 from traceback import print_exception
-from typing import List, Optional, Union, Tuple, Type
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Union, Tuple, Type
 
 from dotenv import dotenv_values
 from nanoid import generate as generate_id
-from selenium.webdriver import Chrome
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.webdriver import WebDriver
-from sqlalchemy import select, or_
+from sqlalchemy import and_, case, select, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Query
 from sqlalchemy.orm.session import Session
 
-from lib.models import Resort, Lift, Trail
+from lib.models import Resort, Lift, ScrapeRun, Trail
 from lib.postgres import get_session
-from lib.util import get_key_value_pairs, get_changes
-from webscraper.parser import Parser
+from lib.util import get_content_hash, get_key_value_pairs, get_changes
+from webscraper.browser_pool import (
+    BrowserPool,
+    Deadline,
+    block_resources,
+    get_browser,
+)
+from webscraper.http_fetch import (
+    FETCH_STRATEGY_HTTP,
+    fetch_pages_sync,
+    is_unchanged,
+    probe_pages_sync,
+)
+from webscraper.fixtures import Fixture, save_fixture
+from webscraper.pipeline import BatchWriter
+from webscraper.jobs import Heartbeat, claim_jobs, ensure_jobs, get_worker_id
+from webscraper.scheduler import get_local_time, get_next_scrape_at, get_popularity
+from webscraper.records import ScrapedLift, ScrapedTrail
+from webscraper.runs import Spans
+from webscraper.parser import (
+    READY_TIMEOUT_SECONDS,
+    REQUEST_TRACKER_SCRIPT,
+    Field,
+    Parser,
+    open_if_present,
+)
+
+
+def get_setting(name: str, default: Any, value_type: Optional[type] = None) -> Any:
+    """
+    Read a setting from `.env`, falling back to an environment variable and then to
+    `default`. The value is converted to `value_type` (the type of `default`, unless
+    given), where booleans are only `True` if they're set to "true".
+    """
+    value = CONFIG.get(name, getenv(name))
+    if value is None:
+        return default
+
+    value_type = value_type or type(default)
+    if value_type is bool:
+        return value.lower() == "true"
+    return value_type(value)
+
+
+def load_config() -> None:
+    """
+    Read settings from `.env`, falling back to environment variables. Called on import,
+    and again by the daemon when it's asked to reload.
+    """
+    # pylint: disable=global-statement
+    global CONFIG, SCRAPER_WORKERS, BROWSER_MAX_RSS_MB, BROWSER_MAX_PAGES, PARSE_ENGINE
+    global BULK_UPSERT, RESORT_TIMEOUT_SECONDS, PAGE_LOAD_TIMEOUT_SECONDS
+    global SCRIPT_TIMEOUT_SECONDS, BACKOFF_BASE_MINUTES, BACKOFF_MAX_MINUTES
+    global BREAKER_THRESHOLD, BREAKER_PROBE_MINUTES, BREAKER_PROBE_TIMEOUT_SECONDS
+    global PROBE_REPORTS, BLOCK_RESOURCES, DAEMON_SWEEP_SECONDS, FIXTURE_DIR
+
+    CONFIG = dotenv_values()
+
+    # Number of resorts scraped concurrently, each with its own browser + DB session.
+    SCRAPER_WORKERS = get_setting("SCRAPER_WORKERS", 4)
+
+    # Limits after which a pooled browser is shut down and replaced with a fresh one.
+    BROWSER_MAX_RSS_MB = get_setting("BROWSER_MAX_RSS_MB", 1024)
+    BROWSER_MAX_PAGES = get_setting("BROWSER_MAX_PAGES", 50)
+
+    # "browser" parses reports through the live browser, while "html" snapshots each rendered
+    # report and parses it offline, so that the browser can be handed back right away.
+    PARSE_ENGINE = get_setting("PARSE_ENGINE", "browser")
+
+    # Write lifts + trails with one `INSERT ... ON CONFLICT` per table instead of merging
+    # each row through the ORM. Requires a unique index on (resort_id, unique_name).
+    BULK_UPSERT = get_setting("BULK_UPSERT", True)
+
+    # Wall-clock budget for scraping a single resort, and for the individual page loads +
+    # scripts within it. A browser that's still busy when the budget runs out is killed.
+    RESORT_TIMEOUT_SECONDS = get_setting("RESORT_TIMEOUT_SECONDS", 120)
+    PAGE_LOAD_TIMEOUT_SECONDS = get_setting("PAGE_LOAD_TIMEOUT_SECONDS", 45)
+    SCRIPT_TIMEOUT_SECONDS = get_setting("SCRIPT_TIMEOUT_SECONDS", 15)
+
+    # Resorts that keep failing are retried after exponentially growing delays, and after
+    # `BREAKER_THRESHOLD` failures in a row only get a quick, trail-report-only probe every
+    # `BREAKER_PROBE_MINUTES`, until one succeeds.
+    BACKOFF_BASE_MINUTES = get_setting("BACKOFF_BASE_MINUTES", 10)
+    BACKOFF_MAX_MINUTES = get_setting("BACKOFF_MAX_MINUTES", 240)
+    BREAKER_THRESHOLD = get_setting("BREAKER_THRESHOLD", 5)
+    BREAKER_PROBE_MINUTES = get_setting("BREAKER_PROBE_MINUTES", 360)
+    BREAKER_PROBE_TIMEOUT_SECONDS = get_setting("BREAKER_PROBE_TIMEOUT_SECONDS", 45)
+
+    # Send a `HEAD` request for each report before loading it in a browser, and skip
+    # reports that the resort's server says haven't changed since the last scrape. Only
+    # resorts with `probe_reports` set are probed, since most browser resorts load their
+    # lifts + trails with scripts, which doesn't change the page's own headers.
+    PROBE_REPORTS = get_setting("PROBE_REPORTS", True)
+
+    # Keep images, fonts, media and trackers from loading along with the reports.
+    BLOCK_RESOURCES = get_setting("BLOCK_RESOURCES", True)
+
+    # Seconds the daemon waits between sweeps for resorts that are due.
+    DAEMON_SWEEP_SECONDS = get_setting("DAEMON_SWEEP_SECONDS", 30)
+
+    # Where `--record` saves rendered reports, and `--replay` reads them back from.
+    FIXTURE_DIR = get_setting("FIXTURE_DIR", "fixtures")
+
+
+load_config()
+
+
+# Columns holding scraped data, which are compared to decide if a row has changed.
+SCRAPED_COLUMNS = {
+    Lift: ["name", "status", "is_open"],
+    Trail: [
+        "name",
+        "trail_type",
+        "status",
+        "is_open",
+        "groomed",
+        "night_skiing",
+        "rating",
+    ],
+}
 
 
 class Rating(Enum):
@@ -42,16 +162,399 @@ class Rating(Enum):
     TERRAIN_PARK = 8
 
 
+@lru_cache(maxsize=None)
+def get_parser_class(parser_name: str) -> Type[Parser]:
+    """
+    Find the `Parser` named like "module.ClassName" in `webscraper/parsers/`. Each one is
+    only looked up once per process.
+    """
+    items = parser_name.split(".")
+    module_name, class_name = items[0], items[1]
+
+    # Import the file in `webscraper/parsers/` that contains the implementation of the parser
+    module = import_module(f"webscraper.parsers.{module_name}")
+
+    # Find the class definition within the imported module
+    return getattr(module, class_name)
+
+
+class ResortTimeout(Exception):
+    """Raised when a resort takes longer to scrape than `RESORT_TIMEOUT_SECONDS`."""
+
+
+class ScrapeRecord(NamedTuple):
+    """
+    Everything that scraping a resort turned up, held until it can be written along with
+    other resorts' records. `lifts` and `trails` are `None` unless they need writing.
+    """
+
+    resort_id: str
+    status: str
+    resort_changes: Dict[str, Any]
+    lifts: Optional[List[ScrapedLift]]
+    trails: Optional[List[ScrapedTrail]]
+    scraped_at: datetime
+    # `scrape_runs` columns describing how the scrape went, other than its write.
+    run: Optional[Dict[str, Any]] = None
+
+
 class Webscraper:
     """
     Webscraper
     """
 
-    def __init__(self, browser: WebDriver, resort: Resort):
+    def __init__(
+        self, browser: WebDriver, resort: Resort, parse_engine: str = "browser"
+    ):
         self.browser = browser
         self.resort = resort
-        self.db_session: Session = Session.object_session(resort)
+        self.parse_engine = parse_engine
         self.parser = self.get_parser()
+        self.pages_loaded = 0
+        self.captured = False
+        self.skip_trail_report = False
+        self.skip_snow_report = False
+        self.probed_validators: Dict[str, dict] = {}
+        self.trail_report_window: Optional[str] = None
+        self.snow_report_window: Optional[str] = None
+        self.started_at = monotonic()
+        self.timeout_seconds = RESORT_TIMEOUT_SECONDS
+        # Only trail report errors fail the scrape (and count towards backoff + the
+        # breaker), so that a broken snow report doesn't hold back lifts + trails.
+        self.errors: List[Exception] = []
+        self.snow_report_errors: List[Exception] = []
+        self.scraped_lifts: Optional[List[ScrapedLift]] = None
+        self.scraped_trails: Optional[List[ScrapedTrail]] = None
+        self.scraped_at = datetime.now(timezone.utc)
+        # How long each phase took, and what was found along the way, for `scrape_runs`.
+        self.spans = Spans()
+        self.lift_count: Optional[int] = None
+        self.trail_count: Optional[int] = None
+        self.browser_pages_loaded: Optional[int] = None
+
+    @classmethod
+    def hash_trail_report(
+        cls, lifts: List[ScrapedLift], trails: List[ScrapedTrail]
+    ) -> str:
+        """Return a hash of the scraped columns of every lift + trail, in a stable order."""
+
+        def normalize(model: Type[Union[Lift, Trail]], items: List) -> List[dict]:
+            columns = ["unique_name", *SCRAPED_COLUMNS[model]]
+            rows = [
+                {column: getattr(item, column) for column in columns} for item in items
+            ]
+            return sorted(rows, key=lambda row: str(row["unique_name"]))
+
+        return get_content_hash(
+            {"lifts": normalize(Lift, lifts), "trails": normalize(Trail, trails)}
+        )
+
+    def load_page(self, url: str) -> None:
+        """Navigate the browser to `url`, and keep count of how many pages it has loaded."""
+        self.pages_loaded += 1
+        self.browser.get(url)
+
+    def open_report(self, url: str, css_selectors: List[str]) -> None:
+        """
+        Load a report page, and wait until the parser's readiness conditions are met.
+        Resorts that need extra time to render get `additional_wait_seconds` added to
+        the timeout, rather than waiting that long unconditionally.
+        """
+        with self.spans.span("page_load"):
+            self.load_page(url)
+        print("Loaded", url)
+        self.wait_until_ready(css_selectors)
+
+    def wait_until_ready(self, css_selectors: List[str]) -> None:
+        """
+        Wait for the page in the current tab to be ready to parse, giving resorts that
+        render slowly their `additional_wait_seconds` on top of the usual timeout, and
+        before deciding that a selector isn't coming.
+        """
+        additional_wait_seconds = self.resort.additional_wait_seconds or 0
+        with self.spans.span("ready_wait"):
+            self.parser.wait_until_ready(
+                css_selectors,
+                timeout=READY_TIMEOUT_SECONDS + additional_wait_seconds,
+                extra_grace_seconds=additional_wait_seconds,
+            )
+
+    def open_trail_report(self, include_snow_report: bool = False) -> None:
+        """Load the trail report, optionally also waiting for a snow report on the same page."""
+        self.open_report(
+            self.resort.trail_report_url,
+            self.parser.get_ready_css_selectors(include_snow_report),
+        )
+
+    def start_snow_report(self) -> None:
+        """
+        Start loading a separate snow report in a new tab without waiting for it, so that
+        it loads at the same time as the trail report in the original tab.
+        """
+        if not self.has_separate_snow_report() or self.skip_snow_report:
+            return
+
+        self.trail_report_window = self.browser.current_window_handle
+        existing_windows = set(self.browser.window_handles)
+        self.browser.execute_script("window.open('about:blank', '_blank');")
+        self.snow_report_window = next(
+            window
+            for window in self.browser.window_handles
+            if window not in existing_windows
+        )
+
+        # Blocking + request tracking apply per tab, so they have to be set up before the
+        # new tab navigates.
+        self.browser.switch_to.window(self.snow_report_window)
+        self.prepare_tab()
+        self.browser.execute_script(
+            "window.location.href = arguments[0];", self.resort.snow_report_url
+        )
+        self.pages_loaded += 1
+        self.browser.switch_to.window(self.trail_report_window)
+        print("Loading", self.resort.snow_report_url, "in a new tab")
+
+    def prepare_tab(self) -> None:
+        """
+        Set up the current tab before it loads a report: count its requests that are
+        still in flight, so readiness checks can tell a page that's still loading data
+        from one that never will, and keep it from loading resources that the parser
+        doesn't need, other than those in the resort's `allowed_resources`.
+        """
+        self.browser.execute_cdp_cmd(
+            "Page.addScriptToEvaluateOnNewDocument", {"source": REQUEST_TRACKER_SCRIPT}
+        )
+        if BLOCK_RESOURCES:
+            block_resources(self.browser, self.resort.allowed_resources or [])
+
+    def open_snow_report(self) -> None:
+        """
+        Load the snow report from its own page, or switch to the tab where it's already
+        been loading.
+        """
+        snow_report_css_selector = self.parser.snow_report_css_selector
+        css_selectors = [snow_report_css_selector] if snow_report_css_selector else []
+        if self.snow_report_window is None:
+            self.open_report(self.resort.snow_report_url, css_selectors)
+            return
+
+        self.browser.switch_to.window(self.snow_report_window)
+        self.wait_until_ready(css_selectors)
+
+    def close_snow_report(self) -> None:
+        """Close the snow report's tab, if it has one, and go back to the trail report."""
+        if self.snow_report_window is None:
+            return
+
+        self.browser.switch_to.window(self.snow_report_window)
+        self.browser.close()
+        self.browser.switch_to.window(self.trail_report_window)
+        self.snow_report_window = None
+
+    def has_separate_snow_report(self) -> bool:
+        """Return `True` if the snow report lives at a different URL than the trail report."""
+        return bool(
+            self.resort.snow_report_url
+            and self.resort.snow_report_url != self.resort.trail_report_url
+        )
+
+    def report_urls(self) -> List[str]:
+        """Return the URL of every page this resort's reports are spread across."""
+        if self.has_separate_snow_report():
+            return [self.resort.trail_report_url, self.resort.snow_report_url]
+        return [self.resort.trail_report_url]
+
+    def use_fetched_reports(self, pages: Dict[str, Union[str, Exception]]) -> None:
+        """
+        Parse reports that were fetched over HTTP (as returned by `fetch_pages`),
+        instead of loading them in a browser.
+        """
+        sources = [pages[url] for url in self.report_urls()]
+        for source in sources:
+            if isinstance(source, Exception):
+                raise source
+
+        with self.spans.span("capture"):
+            self.parser.load_static_report(*sources)
+        self.captured = True
+
+    def use_browser(self, browser: Optional[WebDriver]) -> None:
+        """Hand a (different) browser to the webscraper + its parser, or take it away."""
+        self.browser = self.parser.browser = browser
+
+    def probe_reports(self) -> None:
+        """
+        Ask the resort's server whether each report page has changed since it was last
+        scraped, and mark any that haven't to be skipped. Reports that have never been
+        scraped, or whose server doesn't send validators, are always scraped.
+        """
+        previous_validators = self.resort.report_validators or {}
+        for url, validators in probe_pages_sync(self.report_urls()).items():
+            if isinstance(validators, Exception):
+                print("Failed to probe", url, validators)
+                continue
+
+            self.probed_validators[url] = validators
+            if not is_unchanged(previous_validators.get(url), validators):
+                continue
+
+            if url == self.resort.trail_report_url:
+                self.skip_trail_report = self.resort.trail_report_hash is not None
+                if not self.has_separate_snow_report():
+                    self.skip_snow_report = self.skip_trail_report
+            else:
+                self.skip_snow_report = self.resort.snow_report is not None
+
+    def save_validators(self, url: str) -> None:
+        """Remember the validators of a page that has been scraped successfully."""
+        if url in self.probed_validators:
+            self.resort.report_validators = {
+                **(self.resort.report_validators or {}),
+                url: self.probed_validators[url],
+            }
+
+    def capture_reports(self) -> None:
+        """
+        Load the trail report (and snow report, if it's separate), and snapshot them so that
+        they can be parsed after the browser has been released.
+
+        Like parsing them in the browser, a report that fails to load or capture doesn't
+        stop the other one from being captured, and a failed snow report doesn't fail
+        the scrape.
+        """
+        if not self.skip_trail_report:
+            try:
+                self.open_trail_report(
+                    include_snow_report=not self.has_separate_snow_report()
+                )
+                with self.spans.span("capture"):
+                    self.parser.capture_report()
+            except Exception as exception:
+                print_exception(exception)
+                self.errors.append(exception)
+
+        if not self.skip_snow_report:
+            try:
+                if self.has_separate_snow_report():
+                    self.open_snow_report()
+                with self.spans.span("capture"):
+                    self.parser.capture_snow_report(self.has_separate_snow_report())
+            except Exception as exception:
+                print_exception(exception)
+                self.snow_report_errors.append(exception)
+
+        self.close_snow_report()
+        self.captured = True
+
+    def get_parser(self) -> Parser:
+        """
+        Construct and return an instance of a `Parser` based on the
+        `parser_name` column in the database.
+        """
+        ParserClass = get_parser_class(  # pylint: disable=invalid-name
+            self.resort.parser_name
+        )
+
+        # Return an initialized `Parser` that can access the browser
+        return ParserClass(self.browser)
+
+    def scrape_trail_report(self):
+        """Trigger the end-to-end webscraping session."""
+        print("\n", f"scraping {self.resort.name}...")
+        try:
+            now = datetime.now(timezone.utc)
+            if self.skip_trail_report:
+                print("Trail report unchanged since the last scrape")
+                self.resort.updated_at = now
+                return
+
+            if not self.captured:
+                self.open_trail_report()
+            elif self.errors:
+                # The trail report failed to capture, which has already been recorded.
+                return
+
+            with self.spans.span("lifts"):
+                scraped_lifts = self.parser.get_lifts()
+            with self.spans.span("trails"):
+                scraped_trails = self.parser.get_trails()
+            self.lift_count, self.trail_count = len(scraped_lifts), len(scraped_trails)
+
+            # Most scrapes find exactly what the last one did, so there's nothing to write.
+            trail_report_hash = self.hash_trail_report(scraped_lifts, scraped_trails)
+            if trail_report_hash == self.resort.trail_report_hash:
+                print("No changes since the last scrape")
+                self.resort.updated_at = now
+                self.save_validators(self.resort.trail_report_url)
+                return
+
+            # Written later, by whoever drains the `ScrapeRecord`s.
+            self.scraped_lifts, self.scraped_trails = scraped_lifts, scraped_trails
+            self.scraped_at = now
+            self.resort.trail_report_hash = trail_report_hash
+            self.save_validators(self.resort.trail_report_url)
+
+            self.resort.total_lifts = len(scraped_lifts)
+            self.resort.open_lifts = len([l for l in scraped_lifts if l.is_open])
+
+            self.resort.total_trails = len(scraped_trails)
+            self.resort.open_trails = len([t for t in scraped_trails if t.is_open])
+            self.resort.updated_at = now
+
+        except Exception as exception:
+            print_exception(exception)
+            self.errors.append(exception)
+
+    def scrape_snow_report(self):
+        """
+        Scrape any/all information about the snow report.
+        """
+
+        try:
+            if self.skip_snow_report:
+                return
+            if self.captured and self.snow_report_errors:
+                # The snow report failed to capture, which has already been recorded.
+                return
+
+            # If there's a different URL for the snow report, navigate to that first.
+            if not self.captured and self.has_separate_snow_report():
+                self.open_snow_report()
+
+            with self.spans.span("snow_report"):
+                self.resort.snow_report = self.parser.parse_snow_report()
+            if self.has_separate_snow_report():
+                self.save_validators(self.resort.snow_report_url)
+
+        except Exception as exception:
+            print_exception(exception)
+            self.snow_report_errors.append(exception)
+
+        finally:
+            if not self.captured:
+                self.close_snow_report()
+
+
+class ResortWriter:
+    """
+    Write the results of scraping a resort (as a `ScrapeRecord`) to the database, within
+    a `Session` that may be writing several other resorts in the same transaction.
+    """
+
+    def __init__(self, db_session: Session, resort: Resort):
+        self.db_session = db_session
+        self.resort = resort
+        self.changed_items = 0
+
+    def write(self, record: ScrapeRecord) -> None:
+        """Apply the resort's own changes, write its lifts + trails, and save its status."""
+        for column, value in record.resort_changes.items():
+            setattr(self.resort, column, value)
+        if record.lifts is not None:
+            self.write_items(Lift, record.lifts, record.scraped_at)
+        if record.trails is not None:
+            self.write_items(Trail, record.trails, record.scraped_at)
+        record_scrape_status(self.resort, record.status, self.changed_items > 0)
 
     def add_or_update(
         self, db_rows: List, scraped_data: List, updated_at: datetime
@@ -77,24 +580,112 @@ class Webscraper:
                 scraped_item.updated_at = updated_at
                 self.db_session.add(scraped_item)
 
-    def get_parser(self) -> Parser:
+    def bulk_upsert(
+        self,
+        model: Type[Union[Lift, Trail]],
+        scraped_data: List[Union[ScrapedLift, ScrapedTrail]],
+        updated_at: datetime,
+    ) -> List[Row]:
         """
-        Construct and return an instance of a `Parser` based on the
-        `parser_name` column in the database.
+        Add or update every scraped lift or trail with a single statement. Existing rows
+        are only touched if a scraped column actually changed, and `last_opened_on` or
+        `last_closed_on` is set in the same statement when `is_open` flips.
+
+        Return a row for each lift or trail that was written, with its previous `is_open`
+        as `was_open` and whether it was newly `inserted`.
         """
-        items = self.resort.parser_name.split(".")
-        module_name, class_name = items[0], items[1]
+        table = model.__table__
+        columns = SCRAPED_COLUMNS[model]
 
-        # Import the file in `webscraper/parsers/` that contains the implementation of the parser
-        import_module(f"webscraper.parsers.{module_name}")
+        # Postgres can't update the same row twice in one statement, so the last
+        # scraped item wins if a resort lists the same name twice.
+        values = {
+            item.unique_name: {
+                "id": generate_id(),
+                "resort_id": self.resort.id,
+                "unique_name": item.unique_name,
+                "updated_at": updated_at,
+                **{column: getattr(item, column) for column in columns},
+            }
+            for item in scraped_data
+            if item.unique_name is not None
+        }
+        if len(values) < len(scraped_data):
+            print("Skipping items without a unique name or with duplicate names")
+        if not values:
+            return []
 
-        # Find the class definition within the imported module
-        ParserClass: Type[Parser] = getattr(  # pylint: disable=invalid-name
-            sys.modules[f"webscraper.parsers.{module_name}"], class_name
+        today = updated_at.date()
+        insert = pg_insert(table).values(list(values.values()))
+        excluded = insert.excluded
+        previous = (
+            select(table.c.id, table.c.is_open)
+            .where(table.c.resort_id == self.resort.id)
+            .cte("previous")
+        )
+        upserted = (
+            insert.on_conflict_do_update(
+                index_elements=[table.c.resort_id, table.c.unique_name],
+                set_={
+                    **{column: excluded[column] for column in columns},
+                    "updated_at": excluded.updated_at,
+                    "last_opened_on": case(
+                        (
+                            and_(excluded.is_open, table.c.is_open.isnot(True)),
+                            today,
+                        ),
+                        else_=table.c.last_opened_on,
+                    ),
+                    "last_closed_on": case(
+                        (
+                            and_(~excluded.is_open, table.c.is_open.isnot(False)),
+                            today,
+                        ),
+                        else_=table.c.last_closed_on,
+                    ),
+                },
+                where=or_(
+                    *(
+                        table.c[column].is_distinct_from(excluded[column])
+                        for column in columns
+                    )
+                ),
+            )
+            .returning(table.c.id, table.c.name, table.c.is_open)
+            .cte("upserted")
         )
 
-        # Return an initialized `Parser` that can access the browser
-        return ParserClass(self.browser)
+        return self.db_session.execute(
+            select(
+                upserted.c.name,
+                upserted.c.is_open,
+                previous.c.is_open.label("was_open"),
+                previous.c.id.is_(None).label("inserted"),
+            ).select_from(upserted.outerjoin(previous, previous.c.id == upserted.c.id))
+        ).all()
+
+    def write_items(
+        self,
+        model: Type[Union[Lift, Trail]],
+        scraped_data: List[Union[ScrapedLift, ScrapedTrail]],
+        updated_at: datetime,
+    ) -> None:
+        """
+        Save scraped lifts or trails, with a bulk upsert if it's enabled, or else by
+        merging a model built from each one through the ORM.
+        """
+        if not BULK_UPSERT:
+            db_rows = self.get_lifts() if model is Lift else self.get_trails()
+            scraped_items = [model(**item._asdict()) for item in scraped_data]
+            self.add_or_update(db_rows, scraped_items, updated_at)
+            return
+
+        for row in self.bulk_upsert(model, scraped_data, updated_at):
+            self.changed_items += 1
+            if row.inserted:
+                print("new item", row.name)
+            elif row.is_open != row.was_open:
+                print("UPDATE: ", row.name, {"is_open": (row.was_open, row.is_open)})
 
     def get_lifts(self) -> List["Lift"]:
         """Return a `Lift` for each row in the `lifts` table that belongs to this resort."""
@@ -108,36 +699,10 @@ class Webscraper:
             select(Trail).where(Trail.resort_id == self.resort.id)
         ).scalars()
 
-    def scrape_trail_report(self):
-        """Trigger the end-to-end webscraping session."""
-        print("\n", f"scraping {self.resort.name}...")
-        try:
-            now = datetime.now(timezone.utc)
-            self.browser.get(self.resort.trail_report_url)
-            print("Loaded", self.resort.trail_report_url)
-            if self.resort.additional_wait_seconds:
-                print("Additional wait: ", self.resort.additional_wait_seconds)
-                sleep(self.resort.additional_wait_seconds)
-
-            db_lifts, scraped_lifts = self.get_lifts(), self.parser.get_lifts()
-            db_trails, scraped_trails = self.get_trails(), self.parser.get_trails()
-
-            self.add_or_update(db_lifts, scraped_lifts, now)
-            self.add_or_update(db_trails, scraped_trails, now)
-
-            self.resort.total_lifts = len(scraped_lifts)
-            self.resort.open_lifts = len([l for l in scraped_lifts if l.is_open])
-
-            self.resort.total_trails = len(scraped_trails)
-            self.resort.open_trails = len([t for t in scraped_trails if t.is_open])
-            self.resort.updated_at = now
-
-        except Exception as exception:
-            print_exception(exception)
-
     def examine_changes(self, item, changes: dict, updated_at: datetime) -> None:
         """Handle additional actions to be taken when specific columns are updated."""
         print("UPDATE: ", item.name, changes)
+        self.changed_items += 1
         is_open_change: Union[Tuple, None] = changes.get("is_open")
         if is_open_change:
             is_open = is_open_change[1]
@@ -146,79 +711,455 @@ class Webscraper:
             else:
                 item.last_closed_on = updated_at.date()
 
-    def scrape_snow_report(self):
-        """
-        Scrape any/all information about the snow report.
-        """
 
-        try:
-            # If there's a different URL for the snow report, navigate to that first.
-            if (
-                self.resort.snow_report_url
-                and self.resort.snow_report_url != self.resort.trail_report_url
-            ):
-                self.browser.get(self.resort.snow_report_url)
-                if self.resort.additional_wait_seconds:
-                    print("Additional wait: ", self.resort.additional_wait_seconds)
-                    sleep(self.resort.additional_wait_seconds)
+def write_records(records: List[ScrapeRecord]) -> None:
+    """
+    Write the results of several scrapes in a single transaction. Each resort is written
+    under its own savepoint, so that one that can't be written doesn't hold back the rest.
+    """
+    with get_session() as session:
+        resorts = {
+            resort.id: resort
+            for resort in session.execute(
+                select(Resort).where(
+                    Resort.id.in_([record.resort_id for record in records])
+                )
+            ).scalars()
+        }
+        for record in records:
+            resort = resorts[record.resort_id]
+            resort_writer = ResortWriter(session, resort)
+            started_at = monotonic()
+            error = None
+            try:
+                with session.begin_nested():
+                    resort_writer.write(record)
+            except Exception as exception:
+                print("Failed to write", resort.name)
+                print_exception(exception)
+                record_scrape_status(resort, "failed")
+                error = exception
+            session.add(
+                get_scrape_run(
+                    record, resort_writer.changed_items, monotonic() - started_at, error
+                )
+            )
+        session.commit()
+
+
+def get_scrape_run(
+    record: ScrapeRecord,
+    changed_rows: int,
+    write_seconds: float,
+    error: Optional[Exception] = None,
+) -> ScrapeRun:
+    """Return a `ScrapeRun` for a scrape that has just been written (or failed to be)."""
+    run = dict(record.run or {})
+    if error is not None:
+        run["error_class"] = run.get("error_class") or type(error).__name__
+    run["total_seconds"] = run.get("total_seconds", 0.0) + write_seconds
+    return ScrapeRun(
+        **run,
+        id=generate_id(),
+        resort_id=record.resort_id,
+        status="failed" if error is not None else record.status,
+        changed_rows=changed_rows,
+        write_seconds=write_seconds,
+    )
 
-            self.resort.snow_report = self.parser.parse_snow_report()
 
+def capture_in_browser(webscraper: Webscraper, browser_pool: BrowserPool) -> None:
+    """
+    Check out a browser and load the resort's reports in it. With the "browser"
+    `parse_engine` they are also parsed right away, while with "html" they are only
+    captured, and the browser is given back before any parsing happens.
+    """
+    waiting_since = monotonic()
+    with browser_pool.browser() as browser:
+        webscraper.spans.add("browser_wait", monotonic() - waiting_since)
+        webscraper.browser_pages_loaded = browser_pool.pages_loaded(browser)
+        webscraper.use_browser(browser)
+        webscraper.prepare_tab()
+        browser.set_page_load_timeout(PAGE_LOAD_TIMEOUT_SECONDS)
+        browser.set_script_timeout(SCRIPT_TIMEOUT_SECONDS)
+        remaining = webscraper.timeout_seconds - (monotonic() - webscraper.started_at)
+        deadline = Deadline(browser, max(remaining, 0))
+        try:
+            with deadline:
+                # A separate snow report loads in its own tab, alongside the trail report.
+                with webscraper.spans.span("page_load"):
+                    webscraper.start_snow_report()
+                if webscraper.parse_engine == "html":
+                    webscraper.capture_reports()
+                else:
+                    webscraper.scrape_trail_report()
+                    webscraper.scrape_snow_report()
         except Exception as exception:
-            print_exception(exception)
+            if deadline.expired:
+                raise ResortTimeout(webscraper.resort.name) from exception
+            raise
+        finally:
+            browser_pool.record_pages(browser, webscraper.pages_loaded)
+            browser_pool.record_origins(browser, webscraper.report_urls())
+            webscraper.use_browser(None)
+
+        # Errors caused by killing the browser may have been caught along the way.
+        if deadline.expired:
+            raise ResortTimeout(webscraper.resort.name)
+
+
+def record_scrape_status(resort: Resort, status: str, changed: bool = False) -> None:
+    """
+    Save how the latest scrape went, and when the resort should next be scraped: on the
+    adaptive schedule if it succeeded, or if it failed, after an exponentially growing
+    delay, or after `BREAKER_PROBE_MINUTES` once the circuit breaker has opened.
+    """
+    now = datetime.now(timezone.utc)
+    resort.last_scrape_status = status
+    if status == "ok":
+        resort.consecutive_failures = 0
+        if resort.open_lifts or resort.open_trails:
+            resort.last_opened_on = get_local_time(resort, now).date()
+        resort.next_scrape_at = get_next_scrape_at(resort, changed, now)
+        return
+
+    failures = (resort.consecutive_failures or 0) + 1
+    if failures >= BREAKER_THRESHOLD:
+        print(f"{resort.name} has failed {failures} times in a row, breaker open")
+        delay_minutes = BREAKER_PROBE_MINUTES
+    else:
+        delay_minutes = min(
+            BACKOFF_BASE_MINUTES * 2 ** (failures - 1), BACKOFF_MAX_MINUTES
+        )
 
+    resort.consecutive_failures = failures
+    resort.next_scrape_at = now + timedelta(minutes=delay_minutes)
 
-def get_browser(
-    options: Optional[List[str]] = None, headless: bool = False
-) -> WebDriver:
-    """Return a running instance of (optionally headless) Google Chrome."""
-    chrome_options = Options()
-    if options:
-        for option in options:
-            chrome_options.add_argument(option)
 
-    if headless:
-        chrome_options.add_argument("--headless")
+def scrape_resort(
+    resort_id: str,
+    headless: bool = False,
+    browser_pool: Optional[BrowserPool] = None,
+    parse_engine: Optional[str] = None,
+    fetched_pages: Optional[Dict[str, Union[str, Exception]]] = None,
+    writer: Optional[BatchWriter] = None,
+    record_dir: Optional[str] = None,
+) -> None:
+    """
+    Carry out a webscrape for a single resort, using a browser that belongs to this
+    call alone.
+
+    Resorts with the "http" `fetch_strategy` skip the browser, and parse `fetched_pages`
+    (or else pages fetched just for this resort). For everything else, the browser is
+    checked out of `browser_pool` if one is provided, or else launched just for this resort.
+    Unless the resort has `probe_reports` set and its reports haven't changed since the
+    last scrape, in which case no browser is needed at all.
 
-    return Chrome(options=chrome_options)
+    The resort is read up front and then detached, so no database connection is held
+    while the reports load. What the scrape found is handed to `writer` as a
+    `ScrapeRecord`, or written right away if there's no `writer`.
 
+    A resort that's still using its browser after `RESORT_TIMEOUT_SECONDS` has the browser
+    killed (and replaced in the pool), nothing but its status saved, and is marked as
+    "timed_out". Resorts whose circuit breaker is open only get a quick probe of their
+    trail report.
 
-def scrape_resort(resort_id: str, headless: bool = False) -> None:
-    """Carry out a webscrape for a single resort."""
-    browser = get_browser(headless=headless)
+    With a `record_dir`, every report is loaded whether or not it has changed, and the
+    rendered pages are saved there as a fixture before they're parsed.
+    """
     with get_session() as session:
         resort = session.get(Resort, resort_id)
-        webscraper = Webscraper(browser, resort)
-        webscraper.scrape_trail_report()
-        webscraper.scrape_snow_report()
-        session.commit()
+        session.expunge(resort)
+
+    started_at = datetime.now(timezone.utc)
+    webscraper: Optional[Webscraper] = None
+    pool = None
+    try:
+        if resort.fetch_strategy == FETCH_STRATEGY_HTTP:
+            webscraper = Webscraper(None, resort, "html")
+            with webscraper.spans.span("page_load"):
+                pages = fetched_pages or fetch_pages_sync(webscraper.report_urls())
+            webscraper.use_fetched_reports(pages)
+        else:
+            # Recording needs snapshots of every page, whether or not it has changed.
+            webscraper = Webscraper(
+                None, resort, "html" if record_dir else parse_engine or PARSE_ENGINE
+            )
+            if PROBE_REPORTS and resort.probe_reports and not record_dir:
+                webscraper.probe_reports()
+
+            breaker_open = (resort.consecutive_failures or 0) >= BREAKER_THRESHOLD
+            # Fixtures need the snow report too, so recording skips the breaker's probe.
+            if breaker_open and not record_dir:
+                print("\n", f"Probing {resort.name} with its breaker open")
+                webscraper.timeout_seconds = BREAKER_PROBE_TIMEOUT_SECONDS
+                webscraper.skip_trail_report = False
+                webscraper.skip_snow_report = True
+
+            if webscraper.skip_trail_report and webscraper.skip_snow_report:
+                print("\n", f"{resort.name} reports unchanged, skipping the browser")
+                resort.updated_at = datetime.now(timezone.utc)
+            else:
+                pool = browser_pool or BrowserPool(size=1, headless=headless)
+                capture_in_browser(webscraper, pool)
 
-    browser.close()
+        # A fixture without its trail report couldn't be replayed.
+        if record_dir and webscraper.captured and not webscraper.errors:
+            record_fixture(record_dir, webscraper)
+        if webscraper.captured:
+            webscraper.scrape_trail_report()
+            webscraper.scrape_snow_report()
+        record = ScrapeRecord(
+            resort_id=resort_id,
+            status="failed" if webscraper.errors else "ok",
+            resort_changes={
+                column: new_value
+                for column, (_, new_value) in get_changes(resort).items()
+            },
+            lifts=webscraper.scraped_lifts,
+            trails=webscraper.scraped_trails,
+            scraped_at=webscraper.scraped_at,
+            run=describe_run(webscraper, started_at),
+        )
+
+    except ResortTimeout as exception:
+        print("\n", f"{resort.name} timed out")
+        record = ScrapeRecord(
+            resort_id,
+            "timed_out",
+            {},
+            None,
+            None,
+            datetime.now(timezone.utc),
+            describe_run(webscraper, started_at, exception),
+        )
+        if browser_pool is not None:
+            browser_pool.warm(1)
+
+    except Exception as exception:
+        print_exception(exception)
+        record = ScrapeRecord(
+            resort_id,
+            "failed",
+            {},
+            None,
+            None,
+            datetime.now(timezone.utc),
+            describe_run(webscraper, started_at, exception),
+        )
 
+    finally:
+        if pool is not None and browser_pool is None:
+            pool.close()
 
-def scrape_resorts(query: Optional[Query] = None, headless: bool = False) -> None:
+    if writer is None:
+        write_records([record])
+    else:
+        writer.put(record)
+
+
+def describe_run(
+    webscraper: Optional[Webscraper],
+    started_at: datetime,
+    error: Optional[Exception] = None,
+) -> Dict[str, Any]:
+    """
+    Return the `scrape_runs` columns describing how a scrape went, up until it's written:
+    what it found, the first error it ran into, the browser it used, and how long each
+    phase took.
+    """
+    if webscraper is None:
+        return {
+            "started_at": started_at,
+            "error_class": type(error).__name__ if error else None,
+        }
+
+    error = error or next(iter(webscraper.errors + webscraper.snow_report_errors), None)
+    pages_loaded = webscraper.browser_pages_loaded
+    return {
+        "started_at": started_at,
+        "error_class": type(error).__name__ if error else None,
+        "parse_engine": webscraper.parse_engine,
+        "lifts": webscraper.lift_count,
+        "trails": webscraper.trail_count,
+        "browser_reused": pages_loaded > 0 if pages_loaded is not None else None,
+        "browser_pages_loaded": pages_loaded,
+        "total_seconds": webscraper.spans.elapsed(),
+        **webscraper.spans.columns(),
+    }
+
+
+def record_fixture(record_dir: str, webscraper: Webscraper) -> None:
+    """Save the pages a webscraper captured. Failing to doesn't fail the scrape."""
+    try:
+        save_fixture(record_dir, webscraper.resort, webscraper.parser.pages)
+        print("Recorded", webscraper.resort.name, "in", record_dir)
+    except Exception as exception:
+        print("Failed to record", webscraper.resort.name)
+        print_exception(exception)
+
+
+def parse_fixture(
+    fixture: Fixture,
+) -> Tuple[List[ScrapedLift], List[ScrapedTrail], dict]:
+    """
+    Run a resort's parser over its recorded pages, without a browser, the network or the
+    database, and return the lifts, trails and snow report it finds.
+    """
+    parser = get_parser_class(fixture.parser_name)(None)
+    parser.pages = fixture.load_pages()
+    return parser.get_lifts(), parser.get_trails(), parser.parse_snow_report()
+
+
+def get_browser_pool(size: int, headless: bool = False) -> BrowserPool:
+    """Return a `BrowserPool` for `size` workers, with browsers already launching."""
+    browser_pool = BrowserPool(
+        size=size,
+        headless=headless,
+        max_rss_mb=BROWSER_MAX_RSS_MB,
+        max_pages=BROWSER_MAX_PAGES,
+    )
+    browser_pool.warm()
+    return browser_pool
+
+
+def scrape_resorts(
+    query: Optional[Query] = None,
+    headless: bool = False,
+    max_workers: Optional[int] = None,
+    parse_engine: Optional[str] = None,
+    browser_pool: Optional[BrowserPool] = None,
+    stop: Optional[Event] = None,
+    record_dir: Optional[str] = None,
+) -> None:
     """
     Carry out a webscrape for all resorts, or all resorts
     matching an optionally provided `Query`.
+
+    Up to `max_workers` (or `SCRAPER_WORKERS`) resorts are scraped at once. Only resort
+    IDs are shared with the workers, which hand what they scrape to a single `BatchWriter`
+    that writes several resorts per transaction.
+    Browsers are launched while the resorts are being queried, and reused between resorts
+    until they outgrow `BROWSER_MAX_RSS_MB` or `BROWSER_MAX_PAGES`. Reports for resorts
+    that can be scraped over plain HTTP are all fetched concurrently, while the browser
+    resorts are being scraped.
+
+    Resorts are claimed in batches through `scrape_jobs`, so that any number of processes
+    can run this at once without scraping the same resort twice. Within each batch, they
+    are scraped in order of how watched they are, so that the resorts users are pinning
+    and reading go first.
+
+    Long-running callers can pass in a `browser_pool` that outlives the sweep, and a
+    `stop` event, which stops new batches from being claimed once it's set. With a
+    `record_dir`, each resort's rendered reports are also saved there as a fixture.
     """
-    resort_query = query or select(Resort).where(
-        or_(
-            Resort.updated_at == None,  # pylint: disable=singleton-comparison
-            Resort.updated_at < datetime.now(timezone.utc) - timedelta(minutes=10),
+    max_workers = max_workers or SCRAPER_WORKERS
+    owns_browser_pool = browser_pool is None
+
+    resort_query = query
+    if resort_query is None:
+        # Every scrape schedules the resort's next one, so anything past due (or never
+        # scraped) is what needs scraping now.
+        resort_query = select(Resort).where(
+            or_(
+                Resort.next_scrape_at == None,  # pylint: disable=singleton-comparison
+                Resort.next_scrape_at <= datetime.now(timezone.utc),
+            ),
         )
-    )
 
-    with get_session() as session:
+    worker_id = get_worker_id()
+    claimed: Set[str] = set()
+    try:
+        if owns_browser_pool:
+            browser_pool = get_browser_pool(max_workers, headless)
 
-        def _scrape_trail_report(resort):
-            browser = get_browser(headless=headless)
-            webscraper = Webscraper(browser, resort)
-            webscraper.scrape_trail_report()
-            webscraper.scrape_snow_report()
-            browser.close()
-            session.commit()
+        with get_session() as session:
+            ensure_jobs(session)
+
+        with Heartbeat(worker_id) as heartbeat, BatchWriter(
+            write_records,
+            # Leases are held until the resorts are written, not just scraped.
+            on_written=lambda records: heartbeat.release(
+                record.resort_id for record in records
+            ),
+        ) as writer, ThreadPoolExecutor(max_workers=max_workers) as scrape_executor:
+            while stop is None or not stop.is_set():
+                # Claim a couple of resorts per worker at a time, leaving the rest for
+                # other processes to claim in the meantime.
+                with get_session() as session:
+                    resort_ids = claim_jobs(
+                        session,
+                        worker_id,
+                        resort_query,
+                        limit=max_workers * 2,
+                        exclude=claimed,
+                    )
+                    if not resort_ids:
+                        break
+                    claimed.update(resort_ids)
+                    heartbeat.hold(resort_ids)
+
+                    resorts: List[Resort] = (
+                        session.execute(select(Resort).where(Resort.id.in_(resort_ids)))
+                        .scalars()
+                        .all()
+                    )
+                    popularity = get_popularity(session)
+                    for resort in resorts:
+                        resort.popularity = popularity.get(resort.id, 0.0)
+                    resorts.sort(key=lambda resort: resort.popularity, reverse=True)
+
+                    browser_resort_ids = [
+                        resort.id
+                        for resort in resorts
+                        if resort.fetch_strategy != FETCH_STRATEGY_HTTP
+                    ]
+                    http_resort_ids = [
+                        resort.id
+                        for resort in resorts
+                        if resort.fetch_strategy == FETCH_STRATEGY_HTTP
+                    ]
+                    http_urls = [
+                        url
+                        for resort in resorts
+                        if resort.fetch_strategy == FETCH_STRATEGY_HTTP
+                        for url in (resort.trail_report_url, resort.snow_report_url)
+                        if url
+                    ]
+                    session.commit()
+
+                futures = {
+                    scrape_executor.submit(
+                        scrape_resort,
+                        resort_id,
+                        headless,
+                        browser_pool,
+                        parse_engine,
+                        writer=writer,
+                        record_dir=record_dir,
+                    ): resort_id
+                    for resort_id in browser_resort_ids
+                }
+
+                if http_resort_ids:
+                    fetched_pages = fetch_pages_sync(http_urls)
+                    for resort_id in http_resort_ids:
+                        future = scrape_executor.submit(
+                            scrape_resort,
+                            resort_id,
+                            fetched_pages=fetched_pages,
+                            writer=writer,
+                            record_dir=record_dir,
+                        )
+                        futures[future] = resort_id
 
-        resorts: List[Resort] = session.execute(resort_query).scalars()
-        with ThreadPoolExecutor(max_workers=1) as scrape_executor:
-            for resort in resorts:
-                scrape_executor.submit(_scrape_trail_report, resort)
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as exception:
+                        print("Failed to scrape", futures[future])
+                        print_exception(exception)
+                        heartbeat.release([futures[future]])
+    finally:
+        if owns_browser_pool and browser_pool is not None:
+            browser_pool.close()
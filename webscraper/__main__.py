@@ -0,0 +1,224 @@
+# pylint: disable=broad-except
+"""
+Run the webscraper as a long-lived daemon, with `python -m webscraper`.
+
+The database engine, parser classes and browsers stay warm between sweeps, so each sweep
+only pays for the resorts it actually scrapes. SIGTERM (or Ctrl+C) lets the current
+batch of resorts finish before exiting, and SIGHUP reloads settings from `.env` and
+the environment before the next sweep.
+
+`--record` instead scrapes every resort once, regardless of when it's due, saving its
+rendered reports as fixtures along the way. `--replay` runs the parsers over those
+fixtures, with no browser, network or database, and reports what they found.
+`--summary` prints the slowest resorts and phases from recent `scrape_runs`.
+"""
+import argparse
+import signal
+import sys
+from threading import Event
+from time import monotonic
+from traceback import print_exception
+from typing import List, Optional
+
+from sqlalchemy import select
+
+import webscraper
+from lib.models import Resort
+from lib.postgres import get_session
+from webscraper.browser_pool import BrowserPool
+from webscraper.fixtures import list_fixtures, load_fixture
+from webscraper.runs import PHASES, get_slowest_phases, get_slowest_resorts
+
+
+class Daemon:
+    """Sweep for resorts that are due, every `DAEMON_SWEEP_SECONDS`, until stopped."""
+
+    def __init__(self, headless: bool = False):
+        self.headless = headless
+        self.browser_pool: Optional[BrowserPool] = None
+        self.stopping = Event()
+        self.reload_requested = Event()
+        self._wake = Event()
+
+    def stop(self, signum: int, _frame) -> None:
+        """Finish the batch in progress, then exit."""
+        print(f"Received {signal.Signals(signum).name}, stopping after this batch")
+        self.stopping.set()
+        self._wake.set()
+
+    def request_reload(self, *_) -> None:
+        """Reload settings before the next sweep."""
+        print("Received SIGHUP, reloading settings before the next sweep")
+        self.reload_requested.set()
+        self._wake.set()
+
+    def reload(self) -> None:
+        """
+        Re-read settings, and replace the browser pool, since its size and limits may
+        have changed.
+        """
+        self.reload_requested.clear()
+        webscraper.load_config()
+        if self.browser_pool is not None:
+            self.browser_pool.close()
+        self.browser_pool = webscraper.get_browser_pool(
+            webscraper.SCRAPER_WORKERS, self.headless
+        )
+
+    def sweep(self) -> None:
+        """Scrape every resort that's due right now."""
+        try:
+            webscraper.scrape_resorts(
+                headless=self.headless,
+                max_workers=webscraper.SCRAPER_WORKERS,
+                browser_pool=self.browser_pool,
+                stop=self.stopping,
+            )
+        except Exception as exception:
+            print("Sweep failed")
+            print_exception(exception)
+
+    def run(self) -> None:
+        """Sweep until a SIGTERM or SIGINT arrives."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGHUP, self.request_reload)
+
+        self.browser_pool = webscraper.get_browser_pool(
+            webscraper.SCRAPER_WORKERS, self.headless
+        )
+        try:
+            while not self.stopping.is_set():
+                if self.reload_requested.is_set():
+                    self.reload()
+                self.sweep()
+                self._wake.wait(webscraper.DAEMON_SWEEP_SECONDS)
+                self._wake.clear()
+        finally:
+            self.browser_pool.close()
+            print("Webscraper stopped")
+
+
+def record(fixture_dir: str, resort_ids: List[str], headless: bool = False) -> None:
+    """Scrape every resort (or just `resort_ids`) once, recording fixtures as it goes."""
+    query = select(Resort)
+    if resort_ids:
+        query = query.where(Resort.id.in_(resort_ids))
+    webscraper.scrape_resorts(
+        query,
+        headless=headless,
+        max_workers=webscraper.SCRAPER_WORKERS,
+        record_dir=fixture_dir,
+    )
+
+
+def replay(fixture_dir: str, resort_ids: List[str]) -> bool:
+    """
+    Parse every fixture (or just those for `resort_ids`), and print what was found in
+    each. Return `False` if any of them couldn't be parsed.
+    """
+    paths = list_fixtures(fixture_dir, resort_ids)
+    if not paths:
+        print("No fixtures found in", fixture_dir)
+        return False
+
+    succeeded = True
+    for path in paths:
+        try:
+            fixture = load_fixture(path)
+            started_at = monotonic()
+            lifts, trails, snow_report = webscraper.parse_fixture(fixture)
+            print(
+                f"{fixture.name}: {len(lifts)} lifts, {len(trails)} trails,",
+                "a snow report" if snow_report else "no snow report",
+                f"in {(monotonic() - started_at) * 1000:.0f}ms",
+                f"(recorded {fixture.recorded_at:%Y-%m-%d %H:%M})",
+            )
+        except Exception as exception:
+            print("Failed to replay", path)
+            print_exception(exception)
+            succeeded = False
+    return succeeded
+
+
+def summarize(days: int) -> None:
+    """Print the slowest resorts, and the slowest phases across all resorts."""
+    with get_session() as session:
+        resorts = get_slowest_resorts(session, days)
+        phases = get_slowest_phases(session, days)
+
+    print(f"Slowest resorts over the past {days} days:")
+    for resort in resorts:
+        phase_seconds = {phase: getattr(resort, phase) or 0.0 for phase in PHASES}
+        slowest_phase = max(phase_seconds, key=phase_seconds.get)
+        print(
+            f"  {resort.name}: avg {resort.avg_seconds or 0:.1f}s,",
+            f"p95 {resort.p95_seconds or 0:.1f}s over {resort.runs} runs",
+            f"({resort.errors} with errors), mostly {slowest_phase}",
+            f"({phase_seconds[slowest_phase]:.1f}s)",
+        )
+
+    print("Slowest phases:")
+    for phase, average, p95 in phases:
+        print(f"  {phase}: avg {average:.2f}s, p95 {p95:.2f}s")
+
+
+def main() -> None:
+    """Parse command line arguments, and run the daemon, or record or replay fixtures."""
+    parser = argparse.ArgumentParser(
+        prog="python -m webscraper",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--headless", action="store_true", help="Run Chrome without a window"
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--record",
+        action="store_true",
+        help="Scrape every resort once, saving its rendered reports as fixtures",
+    )
+    mode.add_argument(
+        "--replay",
+        action="store_true",
+        help="Parse saved fixtures, without a browser, network or database",
+    )
+    mode.add_argument(
+        "--summary",
+        action="store_true",
+        help="Print the slowest resorts and phases from recent scrape runs",
+    )
+    parser.add_argument(
+        "--fixtures",
+        default=webscraper.FIXTURE_DIR,
+        help="Directory of fixtures (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--resort",
+        action="append",
+        default=[],
+        dest="resort_ids",
+        metavar="RESORT_ID",
+        help="Only record or replay this resort (can be repeated)",
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=7,
+        help="Days of scrape runs to summarize (default: %(default)s)",
+    )
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.fixtures, args.resort_ids, headless=args.headless)
+    elif args.replay:
+        sys.exit(0 if replay(args.fixtures, args.resort_ids) else 1)
+    elif args.summary:
+        summarize(args.days)
+    else:
+        Daemon(headless=args.headless).run()
+
+
+if __name__ == "__main__":
+    main()
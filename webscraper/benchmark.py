@@ -0,0 +1,291 @@
+# pylint: disable=broad-except
+"""
+Benchmark the parsers against recorded fixtures (see `webscraper.fixtures`), in-process,
+with `python -m webscraper.benchmark`.
+
+Each fixture is parsed `--rounds` times, timing every phase: building the page snapshots
+("load"), then parsing lifts, trails and the snow report. For each resort this reports
+rows parsed per second, how many WebDriver round trips each row would cost in a live
+browser, and the p50/p95 time of each phase.
+
+Every run is appended to a results file, and compared to the run before it, so that a
+parser that's gotten slower (or chattier with the browser) stands out.
+"""
+import argparse
+import json
+import os
+import subprocess
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from datetime import datetime, timezone
+from math import ceil
+from statistics import median
+from time import perf_counter
+from traceback import print_exception
+from typing import Callable, Dict, Iterator, List, Optional
+
+import webscraper
+from webscraper.fixtures import Fixture, list_fixtures, load_fixture
+from webscraper.parser import Parser
+from webscraper.static_page import StaticElement, StaticPage
+
+PHASES = ["load", "lifts", "trails", "snow_report"]
+ROUNDS = 20
+# A phase whose p50 grows by more than this fraction since the last run is flagged.
+REGRESSION_THRESHOLD = 0.2
+
+# Everything a parser can ask of a page that would be a round trip to a live browser.
+# Calls made from within one of these (like `find_element` using `find_elements`) are
+# part of the same round trip.
+ROUND_TRIPS = [
+    (StaticElement, "find_element"),
+    (StaticElement, "find_elements"),
+    (StaticElement, "get_attribute"),
+    (StaticElement, "click"),
+    (StaticElement, "text"),
+    (StaticElement, "tag_name"),
+    (StaticPage, "extract_rows"),
+    (Parser, "summarize_rows"),
+]
+
+
+class RoundTripCounter:
+    """Count the round trips a parser would make to a live browser."""
+
+    def __init__(self):
+        self.count = 0
+        self._depth = 0
+
+    def wrap(self, function: Callable) -> Callable:
+        """Return `function`, counting calls to it that aren't part of another round trip."""
+
+        def counted(*args, **kwargs):
+            if self._depth == 0:
+                self.count += 1
+            self._depth += 1
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._depth -= 1
+
+        return counted
+
+    @contextmanager
+    def counting(self) -> Iterator["RoundTripCounter"]:
+        """Count round trips for as long as the `with` block lasts."""
+        originals = [(cls, name, cls.__dict__[name]) for cls, name in ROUND_TRIPS]
+        try:
+            for cls, name, original in originals:
+                if isinstance(original, property):
+                    setattr(cls, name, property(self.wrap(original.fget)))
+                else:
+                    setattr(cls, name, self.wrap(original))
+            yield self
+        finally:
+            for cls, name, original in originals:
+                setattr(cls, name, original)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the nearest-rank percentile of `values`."""
+    ordered = sorted(values)
+    return ordered[max(ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def parse_once(
+    fixture: Fixture,
+    timings: Dict[str, List[float]],
+    counter: Optional[RoundTripCounter] = None,
+) -> dict:
+    """
+    Parse the fixture once, adding the seconds spent in each phase to `timings`. Round
+    trips made while parsing lifts and trails are added to `counter`, if there is one.
+    """
+    started_at = perf_counter()
+    pages = fixture.load_pages()
+    timings["load"].append(perf_counter() - started_at)
+
+    parser = webscraper.get_parser_class(fixture.parser_name)(None)
+    parser.pages = pages
+    results = {}
+    for phase, parse in [
+        ("lifts", parser.get_lifts),
+        ("trails", parser.get_trails),
+        ("snow_report", parser.parse_snow_report),
+    ]:
+        with counter.counting() if counter and phase != "snow_report" else nullcontext():
+            started_at = perf_counter()
+            results[phase] = parse()
+            timings[phase].append(perf_counter() - started_at)
+    return results
+
+
+def benchmark_fixture(fixture: Fixture, rounds: int = ROUNDS) -> dict:
+    """Parse a fixture `rounds` times, and summarize how long it took."""
+    timings: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+    # Parsers report what they find with `print`, which would swamp the timings.
+    with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+        counter = RoundTripCounter()
+        results = parse_once(fixture, timings, counter)
+        for _ in range(rounds - 1):
+            parse_once(fixture, timings)
+
+    rows = len(results["lifts"]) + len(results["trails"])
+    row_seconds = median(
+        lifts + trails for lifts, trails in zip(timings["lifts"], timings["trails"])
+    )
+    return {
+        "name": fixture.name,
+        "parser_name": fixture.parser_name,
+        "lifts": len(results["lifts"]),
+        "trails": len(results["trails"]),
+        "rows_per_second": rows / row_seconds if row_seconds else None,
+        "round_trips_per_row": counter.count / rows if rows else None,
+        "phases": {
+            phase: {
+                "p50_ms": percentile(seconds, 50) * 1000,
+                "p95_ms": percentile(seconds, 95) * 1000,
+            }
+            for phase, seconds in timings.items()
+        },
+    }
+
+
+def get_revision() -> Optional[str]:
+    """Return the commit being benchmarked, if this is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def load_last_run(results_path: str) -> Optional[dict]:
+    """Return the most recent run saved to the results file, if there is one."""
+    if not os.path.exists(results_path):
+        return None
+    with open(results_path, encoding="utf-8") as file:
+        lines = [line for line in file if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def save_run(results_path: str, run: dict) -> None:
+    """Append a run to the results file."""
+    os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+    with open(results_path, "a", encoding="utf-8") as file:
+        file.write(json.dumps(run) + "\n")
+
+
+def format_change(current: float, previous: Optional[float]) -> str:
+    """Describe how a p50 moved since the last run, flagging regressions."""
+    if not previous:
+        return ""
+    change = (current - previous) / previous
+    flag = " !" if change > REGRESSION_THRESHOLD else ""
+    return f" ({change:+.0%}{flag})"
+
+
+def print_result(result: dict, previous: Optional[dict]) -> None:
+    """Print one resort's results, next to its results from the last run."""
+    previous_phases = (previous or {}).get("phases", {})
+    rows_per_second = result["rows_per_second"]
+    round_trips_per_row = result["round_trips_per_row"]
+    print(
+        f"{result['name']} ({result['parser_name']}): "
+        f"{result['lifts']} lifts, {result['trails']} trails, "
+        + (f"{rows_per_second:,.0f} rows/s, " if rows_per_second else "")
+        + (
+            f"{round_trips_per_row:.2f} round trips/row"
+            if round_trips_per_row is not None
+            else "no rows"
+        )
+    )
+    for phase, times in result["phases"].items():
+        previous_p50 = previous_phases.get(phase, {}).get("p50_ms")
+        print(
+            f"  {phase:<12} p50 {times['p50_ms']:8.2f}ms"
+            f"{format_change(times['p50_ms'], previous_p50):<10}"
+            f"  p95 {times['p95_ms']:8.2f}ms"
+        )
+
+
+def run_benchmark(
+    fixture_dir: str,
+    results_path: str,
+    resort_ids: Optional[List[str]] = None,
+    rounds: int = ROUNDS,
+) -> dict:
+    """Benchmark every fixture (or just those for `resort_ids`), and save the run."""
+    last_run = load_last_run(results_path) or {}
+    results = {}
+    for path in list_fixtures(fixture_dir, resort_ids):
+        try:
+            fixture = load_fixture(path)
+            results[fixture.resort_id] = benchmark_fixture(fixture, rounds)
+        except Exception as exception:
+            print("Failed to benchmark", path)
+            print_exception(exception)
+            continue
+        print_result(
+            results[fixture.resort_id],
+            last_run.get("results", {}).get(fixture.resort_id),
+        )
+
+    run = {
+        "run_at": datetime.now(timezone.utc).isoformat(),
+        "revision": get_revision(),
+        "rounds": rounds,
+        "results": results,
+    }
+    if results:
+        save_run(results_path, run)
+        print("Saved results to", results_path)
+    else:
+        print("No fixtures benchmarked from", fixture_dir)
+    return run
+
+
+def main() -> None:
+    """Parse command line arguments, and run the benchmark."""
+    parser = argparse.ArgumentParser(
+        prog="python -m webscraper.benchmark",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--fixtures",
+        default=webscraper.FIXTURE_DIR,
+        help="Directory of fixtures (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--results",
+        help="File that runs are appended to (default: benchmarks.jsonl in --fixtures)",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=ROUNDS,
+        help="Times to parse each fixture (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--resort",
+        action="append",
+        default=[],
+        dest="resort_ids",
+        metavar="RESORT_ID",
+        help="Only benchmark this resort (can be repeated)",
+    )
+    args = parser.parse_args()
+    run_benchmark(
+        args.fixtures,
+        args.results or os.path.join(args.fixtures, "benchmarks.jsonl"),
+        args.resort_ids,
+        max(args.rounds, 1),
+    )
+
+
+if __name__ == "__main__":
+    main()
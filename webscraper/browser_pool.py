@@ -0,0 +1,426 @@
+# pylint: disable=broad-except
+"""
+A pool of warm Chrome instances that can be shared by webscraping workers.
+"""
+from collections import deque
+from contextlib import contextmanager
+import os
+import signal
+from threading import Condition, Lock, Thread, Timer
+from traceback import print_exception
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from selenium.webdriver import Chrome
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+
+# Requests for anything that doesn't end up in the lift + trail DOM (images, fonts, media,
+# analytics and ads) are blocked, in Chrome's URL pattern syntax, where `*` is a wildcard.
+# Inline SVG icons are part of the page itself, so status + difficulty icons still render.
+# Patterns match anywhere in the URL, so each one is anchored to the end of the path or
+# to the host, to keep them from matching (and breaking) scripts like `app.icons.js`.
+BLOCKED_EXTENSIONS = [
+    # Images
+    "jpg",
+    "jpeg",
+    "png",
+    "gif",
+    "webp",
+    "avif",
+    "ico",
+    # Fonts
+    "woff",
+    "woff2",
+    "ttf",
+    "otf",
+    "eot",
+    # Media
+    "mp4",
+    "webm",
+    "m3u8",
+    "mp3",
+    "mov",
+]
+# Analytics, ads, and embeds, along with their subdomains.
+BLOCKED_HOSTS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "hotjar.com",
+    "segment.com",
+    "segment.io",
+    "nr-data.net",
+    "newrelic.com",
+    "optimizely.com",
+    "quantserve.com",
+    "bat.bing.com",
+    "player.vimeo.com",
+]
+# Patterns for each blocked resource, keyed by the name a resort's `allowed_resources`
+# can use to let it load anyway.
+BLOCKED_RESOURCES: Dict[str, List[str]] = {
+    **{
+        extension: [f"*.{extension}", f"*.{extension}?*"]
+        for extension in BLOCKED_EXTENSIONS
+    },
+    **{host: [f"*://{host}/*", f"*://*.{host}/*"] for host in BLOCKED_HOSTS},
+    "facebook.com/tr": ["*://*.facebook.com/tr?*", "*://*.facebook.com/tr/*"],
+    "youtube.com/embed": ["*://*.youtube.com/embed/*"],
+}
+
+
+def block_resources(browser: WebDriver, allowed_resources: Iterable[str] = ()) -> None:
+    """
+    Block requests for the `BLOCKED_RESOURCES` in the browser's current tab, other than
+    any that are explicitly allowed by name. Allowing "*" turns blocking off altogether.
+    """
+    allowed = set(allowed_resources)
+    patterns = (
+        []
+        if "*" in allowed
+        else [
+            pattern
+            for name, patterns in BLOCKED_RESOURCES.items()
+            if name not in allowed
+            for pattern in patterns
+        ]
+    )
+    browser.execute_cdp_cmd("Network.enable", {})
+    browser.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+
+def get_browser(
+    options: Optional[List[str]] = None, headless: bool = False
+) -> WebDriver:
+    """Return a running instance of (optionally headless) Google Chrome."""
+    chrome_options = Options()
+    if options:
+        for option in options:
+            chrome_options.add_argument(option)
+
+    if headless:
+        chrome_options.add_argument("--headless")
+
+    return Chrome(options=chrome_options)
+
+
+def read_process_table() -> Tuple[Dict[int, List[int]], Dict[int, int]]:
+    """
+    Return a mapping from each process ID to its children, and from each process ID to
+    its resident memory in pages, as reported by `/proc`.
+    """
+    children: Dict[int, List[int]] = {}
+    rss_pages: Dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as stat_file:
+                stat = stat_file.read()
+        except OSError:
+            continue
+
+        # Fields after the parenthesized command name start with the state (field 3),
+        # so ppid (field 4) and rss (field 24) are at indexes 1 and 21.
+        fields = stat[stat.rindex(")") + 2 :].split()
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        rss_pages[int(entry)] = int(fields[21])
+
+    return children, rss_pages
+
+
+def get_process_tree(pid: int, children: Dict[int, List[int]]) -> List[int]:
+    """Return a process ID followed by the IDs of all of its descendants."""
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, []))
+    return tree
+
+
+def get_process_tree_rss(pid: int) -> int:
+    """
+    Return the resident memory (in bytes) of a process and all of its descendants.
+    Chrome spreads a single browser across many processes, so the driver's process
+    alone doesn't say much.
+    """
+    children, rss_pages = read_process_table()
+    total = sum(
+        rss_pages.get(process, 0) for process in get_process_tree(pid, children)
+    )
+    return total * os.sysconf("SC_PAGE_SIZE")
+
+
+def kill_browser(browser: WebDriver) -> None:
+    """
+    Forcibly kill chromedriver and every Chrome process under it, for browsers that
+    are stuck and won't respond to `quit()`.
+    """
+    children, _ = read_process_table()
+    for process in get_process_tree(browser.service.process.pid, children):
+        try:
+            os.kill(process, signal.SIGKILL)
+        except OSError:
+            continue
+
+
+def get_browser_rss(browser: WebDriver) -> int:
+    """Return the resident memory (in bytes) of chromedriver and every Chrome process under it."""
+    return get_process_tree_rss(browser.service.process.pid)
+
+
+class Deadline:
+    """
+    Kill a browser that's still in use after `seconds`, so that whatever is blocked on
+    it (a page that never finishes loading, a tab that never renders) fails right away
+    instead of tying up the worker indefinitely.
+    """
+
+    def __init__(self, browser: WebDriver, seconds: float):
+        self.browser = browser
+        self.seconds = seconds
+        self.expired = False
+        self._timer = Timer(seconds, self.expire)
+        self._timer.daemon = True
+
+    def expire(self) -> None:
+        """Give up on the browser."""
+        self.expired = True
+        print(f"Deadline of {self.seconds} seconds exceeded, killing browser")
+        kill_browser(self.browser)
+
+    def __enter__(self) -> "Deadline":
+        self._timer.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._timer.cancel()
+
+
+class BrowserPool:
+    """
+    Hand out running browsers to webscraping workers, and take them back when the workers
+    are done with them, so that Chrome only has to be started once per pool slot.
+
+    Browsers are retired and replaced once their process tree grows past `max_rss_mb`
+    of resident memory, or once they've loaded `max_pages` pages.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        options: Optional[List[str]] = None,
+        headless: bool = False,
+        max_rss_mb: Optional[int] = None,
+        max_pages: Optional[int] = None,
+    ):
+        self.size = size
+        self.options = options
+        self.headless = headless
+        self.max_rss_mb = max_rss_mb
+        self.max_pages = max_pages
+        self._pages_loaded: Dict[WebDriver, int] = {}
+        # Origins each browser has loaded since it was last reset, to clear storage for.
+        self._origins: Dict[WebDriver, Set[str]] = {}
+        self._idle: "deque[WebDriver]" = deque()
+        self._lock = Lock()
+        # Notified whenever a browser goes idle or a slot frees up, either of which a
+        # worker waiting in `acquire` can use.
+        self._available = Condition(self._lock)
+        self._launched = 0
+        self._warming: List[Thread] = []
+
+    def _reserve_slot(self) -> bool:
+        """Claim room in the pool for one more browser, if there is any."""
+        with self._lock:
+            if self._launched < self.size:
+                self._launched += 1
+                return True
+            return False
+
+    def _free_slot(self) -> None:
+        with self._available:
+            self._launched -= 1
+            self._available.notify()
+
+    def _put_idle(self, browser: WebDriver) -> None:
+        """Make a browser available to the next worker that asks for one."""
+        with self._available:
+            self._idle.append(browser)
+            self._available.notify()
+
+    def _take_idle(self) -> Optional[WebDriver]:
+        """Take an idle browser out of the pool, if there is one."""
+        with self._lock:
+            return self._idle.popleft() if self._idle else None
+
+    def _launch(self) -> WebDriver:
+        """Start a browser in a slot that has already been reserved."""
+        try:
+            return get_browser(options=self.options, headless=self.headless)
+        except Exception:
+            self._free_slot()
+            raise
+
+    def _launch_idle(self) -> None:
+        try:
+            self._put_idle(self._launch())
+        except Exception as exception:
+            print("Failed to pre-launch a browser")
+            print_exception(exception)
+
+    def warm(self, count: Optional[int] = None) -> None:
+        """
+        Start launching up to `count` browsers (or enough to fill the pool) in the
+        background, so they're ready by the time the first workers ask for one.
+        """
+        self._warming = [thread for thread in self._warming if thread.is_alive()]
+        for _ in range(count or self.size):
+            if not self._reserve_slot():
+                break
+            thread = Thread(target=self._launch_idle, daemon=True)
+            thread.start()
+            self._warming.append(thread)
+
+    def acquire(self) -> WebDriver:
+        """
+        Check out an idle browser, launching a new one if the pool isn't full yet,
+        or else wait until another worker gives one back, or a slot frees up because a
+        browser was discarded or failed to launch.
+        """
+        with self._available:
+            while not self._idle and self._launched >= self.size:
+                self._available.wait()
+            if self._idle:
+                return self._idle.popleft()
+            self._launched += 1
+
+        return self._launch()
+
+    def record_pages(self, browser: WebDriver, count: int = 1) -> None:
+        """Count pages loaded by this browser towards its `max_pages` limit."""
+        with self._lock:
+            self._pages_loaded[browser] = self._pages_loaded.get(browser, 0) + count
+
+    def record_origins(self, browser: WebDriver, urls: Iterable[str]) -> None:
+        """Remember the origins of pages this browser loaded, so their storage is cleared."""
+        origins = {
+            f"{parts.scheme}://{parts.netloc}"
+            for parts in map(urlsplit, urls)
+            if parts.scheme and parts.netloc
+        }
+        with self._lock:
+            self._origins.setdefault(browser, set()).update(origins)
+
+    def pages_loaded(self, browser: WebDriver) -> int:
+        """Return how many pages this browser has loaded since it was launched."""
+        with self._lock:
+            return self._pages_loaded.get(browser, 0)
+
+    def should_recycle(self, browser: WebDriver) -> Optional[str]:
+        """Return the reason this browser has outgrown its limits, if it has."""
+        pages_loaded = self._pages_loaded.get(browser, 0)
+        if self.max_pages and pages_loaded >= self.max_pages:
+            return f"loaded {pages_loaded} pages"
+
+        if self.max_rss_mb:
+            try:
+                rss_mb = get_browser_rss(browser) / (1024 * 1024)
+            except Exception as exception:
+                # Without `/proc` (like outside of Linux), only `max_pages` applies.
+                print("Unable to measure browser memory usage:", exception)
+                return None
+            if rss_mb > self.max_rss_mb:
+                return f"using {rss_mb:.0f} MB RSS after {pages_loaded} pages"
+
+        return None
+
+    def recycle(self, browser: WebDriver, reason: str) -> None:
+        """Shut down a browser that outgrew its limits, and start a fresh one in its place."""
+        print("Recycling browser:", reason)
+        self.discard(browser)
+        self.warm(1)
+
+    def release(self, browser: WebDriver) -> None:
+        """Wipe any state left behind by the last worker, and make the browser available."""
+        reason = self.should_recycle(browser)
+        if reason:
+            self.recycle(browser, reason)
+            return
+
+        with self._lock:
+            origins = self._origins.pop(browser, set())
+        try:
+            self.reset(browser, origins)
+        except Exception as exception:
+            print("Failed to reset browser, discarding it")
+            print_exception(exception)
+            self.discard(browser)
+            return
+
+        self._put_idle(browser)
+
+    def discard(self, browser: WebDriver) -> None:
+        """Shut down a browser that shouldn't be reused, and free its slot in the pool."""
+        try:
+            browser.quit()
+        except Exception as exception:
+            print_exception(exception)
+        with self._lock:
+            self._pages_loaded.pop(browser, None)
+            self._origins.pop(browser, None)
+        self._free_slot()
+
+    @contextmanager
+    def browser(self) -> Iterator[WebDriver]:
+        """
+        Check out a browser for the duration of a `with` block. Browsers that were in use
+        when an exception was raised are thrown away rather than returned to the pool.
+        """
+        browser = self.acquire()
+        try:
+            yield browser
+        except BaseException:
+            self.discard(browser)
+            raise
+        self.release(browser)
+
+    def close(self) -> None:
+        """Shut down every idle browser in the pool, including any still being launched."""
+        for thread in self._warming:
+            thread.join()
+        self._warming = []
+
+        while True:
+            browser = self._take_idle()
+            if browser is None:
+                break
+            self.discard(browser)
+
+    @classmethod
+    def reset(cls, browser: WebDriver, origins: Iterable[str] = ()) -> None:
+        """
+        Close any extra tabs, and clear every cookie, along with the storage of each of
+        the `origins` that were loaded since the last reset.
+        """
+        handles = browser.window_handles
+        for handle in handles[1:]:
+            browser.switch_to.window(handle)
+            browser.close()
+        browser.switch_to.window(handles[0])
+
+        browser.execute_script(
+            "try { window.localStorage.clear(); window.sessionStorage.clear(); }"
+            " catch (e) {}"
+        )
+        browser.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        for origin in origins:
+            browser.execute_cdp_cmd(
+                "Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"}
+            )
+        browser.get("about:blank")
@@ -0,0 +1,103 @@
+"""
+A store of rendered report pages, recorded from live scrapes so that parsers can be run
+against them later without a browser or the network.
+
+Each resort's fixture is a gzipped JSON file in the fixture directory, named after the
+resort's ID. It holds the page source behind each of the parser's snapshots ("lifts",
+"trails" and "snow_report"), so reports with tabs keep one page per tab. Snapshots of
+the same page are only stored once.
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+from lib.models import Resort
+from webscraper.static_page import StaticPage
+
+FIXTURE_SUFFIX = ".json.gz"
+
+
+class Fixture(NamedTuple):
+    """The rendered pages of one resort's reports, as they were when recorded."""
+
+    resort_id: str
+    name: str
+    parser_name: str
+    trail_report_url: str
+    snow_report_url: Optional[str]
+    recorded_at: datetime
+    # Index into `sources` for each snapshot the parser was given.
+    pages: Dict[str, int]
+    sources: List[str]
+
+    def load_pages(self) -> Dict[str, StaticPage]:
+        """Return the snapshots, ready to hand to a parser, sharing pages between them."""
+        static_pages = [StaticPage(source) for source in self.sources]
+        return {name: static_pages[index] for name, index in self.pages.items()}
+
+
+def get_fixture_path(fixture_dir: str, resort_id: str) -> str:
+    """Return where the fixture for a resort lives."""
+    return os.path.join(fixture_dir, f"{resort_id}{FIXTURE_SUFFIX}")
+
+
+def save_fixture(
+    fixture_dir: str, resort: Resort, pages: Dict[str, StaticPage]
+) -> Fixture:
+    """
+    Record the pages a parser captured for a resort, replacing any earlier fixture. The
+    file is written under a temporary name first, so a fixture is never left half written.
+    """
+    sources: List[str] = []
+    indexes: Dict[int, int] = {}
+    page_indexes: Dict[str, int] = {}
+    for name, page in pages.items():
+        if id(page) not in indexes:
+            indexes[id(page)] = len(sources)
+            sources.append(page.page_source)
+        page_indexes[name] = indexes[id(page)]
+
+    fixture = Fixture(
+        resort_id=resort.id,
+        name=resort.name,
+        parser_name=resort.parser_name,
+        trail_report_url=resort.trail_report_url,
+        snow_report_url=resort.snow_report_url,
+        recorded_at=datetime.now(timezone.utc),
+        pages=page_indexes,
+        sources=sources,
+    )
+
+    os.makedirs(fixture_dir, exist_ok=True)
+    path = get_fixture_path(fixture_dir, resort.id)
+    with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as file:
+        json.dump(
+            {**fixture._asdict(), "recorded_at": fixture.recorded_at.isoformat()}, file
+        )
+    os.replace(f"{path}.tmp", path)
+    return fixture
+
+
+def load_fixture(path: str) -> Fixture:
+    """Read a fixture file."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        data = json.load(file)
+    data["recorded_at"] = datetime.fromisoformat(data["recorded_at"])
+    return Fixture(**data)
+
+
+def list_fixtures(
+    fixture_dir: str, resort_ids: Optional[List[str]] = None
+) -> List[str]:
+    """Return the path of every fixture in the directory, or just those for `resort_ids`."""
+    if resort_ids:
+        return [get_fixture_path(fixture_dir, resort_id) for resort_id in resort_ids]
+    if not os.path.isdir(fixture_dir):
+        return []
+    return sorted(
+        os.path.join(fixture_dir, file_name)
+        for file_name in os.listdir(fixture_dir)
+        if file_name.endswith(FIXTURE_SUFFIX)
+    )
@@ -0,0 +1,100 @@
+"""
+Fetch reports that are rendered server-side over plain HTTP, without launching a browser.
+"""
+import asyncio
+from typing import Dict, Iterable, Optional, Union
+
+import httpx
+
+# Resorts that render their reports server-side are scraped with plain HTTP requests,
+# while everything else needs a browser to run the page's JavaScript first.
+FETCH_STRATEGY_BROWSER = "browser"
+FETCH_STRATEGY_HTTP = "http"
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml",
+}
+TIMEOUT_SECONDS = 10
+MAX_CONNECTIONS = 20
+
+# Response headers that identify a version of a page, for deciding if it has changed.
+VALIDATOR_HEADERS = ["etag", "last-modified", "content-length"]
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return an HTTP client that shares a bounded pool of connections."""
+    return httpx.AsyncClient(
+        headers=HEADERS,
+        timeout=TIMEOUT_SECONDS,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS),
+    )
+
+
+async def fetch_pages(urls: Iterable[str]) -> Dict[str, Union[str, Exception]]:
+    """
+    Fetch every URL concurrently over a shared pool of connections, and return a mapping
+    from each URL to either its HTML or the exception that was raised fetching it.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    async with get_client() as client:
+
+        async def fetch(url: str) -> str:
+            response = await client.get(url)
+            response.raise_for_status()
+            return response.text
+
+        results = await asyncio.gather(
+            *(fetch(url) for url in unique_urls), return_exceptions=True
+        )
+
+    return dict(zip(unique_urls, results))
+
+
+def fetch_pages_sync(urls: Iterable[str]) -> Dict[str, Union[str, Exception]]:
+    """Run `fetch_pages` to completion from synchronous code."""
+    return asyncio.run(fetch_pages(urls))
+
+
+async def probe_pages(urls: Iterable[str]) -> Dict[str, Union[dict, Exception]]:
+    """
+    Send a `HEAD` request to every URL concurrently, and return a mapping from each URL
+    to the validator headers it responded with, or the exception that was raised.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    async with get_client() as client:
+
+        async def probe(url: str) -> dict:
+            response = await client.head(url)
+            response.raise_for_status()
+            return {
+                header: response.headers[header]
+                for header in VALIDATOR_HEADERS
+                if header in response.headers
+            }
+
+        results = await asyncio.gather(
+            *(probe(url) for url in unique_urls), return_exceptions=True
+        )
+
+    return dict(zip(unique_urls, results))
+
+
+def probe_pages_sync(urls: Iterable[str]) -> Dict[str, Union[dict, Exception]]:
+    """Run `probe_pages` to completion from synchronous code."""
+    return asyncio.run(probe_pages(urls))
+
+
+def is_unchanged(previous: Optional[dict], current: dict) -> bool:
+    """
+    Return `True` if the origin says a page hasn't changed since `previous` validators
+    were stored. A matching content length alone isn't trusted, since a lift going from
+    "Open" to "Hold" could easily leave the size of the page the same.
+    """
+    if not previous or not ("etag" in current or "last-modified" in current):
+        return False
+    return previous == current
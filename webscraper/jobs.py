@@ -0,0 +1,179 @@
+# pylint: disable=broad-except
+"""
+Lease resorts out to webscraping workers through the `scrape_jobs` table, so that any
+number of processes (on any number of machines) can scrape without doing the same work.
+
+A worker claims due resorts with `SELECT ... FOR UPDATE SKIP LOCKED`, which skips rows
+that another worker is in the middle of claiming, and holds each claim for
+`LEASE_SECONDS`. A `Heartbeat` keeps extending the leases while the resorts are being
+scraped, so a lease only runs out if its worker died, at which point the resort is
+claimed again by whichever worker gets to it next.
+"""
+from datetime import datetime, timedelta, timezone
+from os import getpid
+from socket import gethostname
+from threading import Event, Lock, Thread
+from traceback import print_exception
+from typing import Iterable, List, Optional, Set
+
+from nanoid import generate as generate_id
+from sqlalchemy import select, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Query
+from sqlalchemy.orm.session import Session
+
+from lib.models import Resort, ScrapeJob
+from lib.postgres import get_session
+from webscraper.scheduler import get_popularity_scores
+
+LEASE_SECONDS = 300
+HEARTBEAT_SECONDS = 30
+
+
+def get_worker_id() -> str:
+    """Return a name for this process that's unique across every machine running workers."""
+    return f"{gethostname()}-{getpid()}-{generate_id(size=8)}"
+
+
+def ensure_jobs(session: Session) -> None:
+    """Add a job for every resort that doesn't have one yet."""
+    session.execute(
+        pg_insert(ScrapeJob)
+        .from_select(["resort_id"], select(Resort.id))
+        .on_conflict_do_nothing(index_elements=[ScrapeJob.resort_id])
+    )
+    session.commit()
+
+
+def claim_jobs(
+    session: Session,
+    worker_id: str,
+    resort_query: Query,
+    limit: Optional[int] = None,
+    exclude: Iterable[str] = (),
+) -> List[str]:
+    """
+    Lease up to `limit` of the resorts selected by `resort_query` (other than those in
+    `exclude`) to this worker, most popular first, and return their IDs. Resorts that are
+    leased to a live worker, or being claimed by one right now, are left alone.
+
+    Popularity is scored as the resorts are claimed, rather than read from
+    `resorts.popularity`, which is only kept up to date for resorts that get claimed.
+    """
+    now = datetime.now(timezone.utc)
+    scores = get_popularity_scores()
+    jobs: List[ScrapeJob] = (
+        session.execute(
+            select(ScrapeJob)
+            .outerjoin(scores, scores.c.resort_id == ScrapeJob.resort_id)
+            .where(
+                ScrapeJob.resort_id.in_(resort_query.with_only_columns(Resort.id)),
+                ScrapeJob.resort_id.notin_(list(exclude)),
+                or_(
+                    ScrapeJob.leased_until
+                    == None,  # pylint: disable=singleton-comparison
+                    ScrapeJob.leased_until < now,
+                ),
+            )
+            .order_by(scores.c.score.desc().nulls_last())
+            .limit(limit)
+            .with_for_update(of=ScrapeJob, skip_locked=True)
+        )
+        .scalars()
+        .all()
+    )
+
+    for job in jobs:
+        if job.leased_until is not None:
+            print(f"Reclaiming {job.resort_id}, whose lease to {job.worker_id} expired")
+        job.worker_id = worker_id
+        job.claimed_at = now
+        job.heartbeat_at = now
+        job.leased_until = now + timedelta(seconds=LEASE_SECONDS)
+
+    resort_ids = [job.resort_id for job in jobs]
+    session.commit()
+    return resort_ids
+
+
+def release_jobs(worker_id: str, resort_ids: Iterable[str]) -> None:
+    """
+    Give up this worker's leases on some resorts. Leases that already ran out and were
+    claimed by another worker are left alone.
+    """
+    with get_session() as session:
+        session.execute(
+            update(ScrapeJob)
+            .where(
+                ScrapeJob.worker_id == worker_id,
+                ScrapeJob.resort_id.in_(list(resort_ids)),
+            )
+            .values(worker_id=None, leased_until=None)
+        )
+        session.commit()
+
+
+class Heartbeat:
+    """
+    Extend this worker's leases on the resorts it's holding every `HEARTBEAT_SECONDS`,
+    from a background thread, for as long as the `with` block lasts.
+    """
+
+    def __init__(self, worker_id: str, interval: float = HEARTBEAT_SECONDS):
+        self.worker_id = worker_id
+        self.interval = interval
+        self.held: Set[str] = set()
+        self._lock = Lock()
+        self._stopped = Event()
+        self._thread = Thread(target=self.run, daemon=True)
+
+    def hold(self, resort_ids: Iterable[str]) -> None:
+        """Start extending the leases on these resorts."""
+        with self._lock:
+            self.held.update(resort_ids)
+
+    def release(self, resort_ids: Iterable[str]) -> None:
+        """Stop extending the leases on these resorts, and give them up."""
+        resort_ids = list(resort_ids)
+        with self._lock:
+            self.held.difference_update(resort_ids)
+        release_jobs(self.worker_id, resort_ids)
+
+    def beat(self) -> None:
+        """Extend every lease that's still held."""
+        with self._lock:
+            resort_ids = list(self.held)
+        if not resort_ids:
+            return
+
+        now = datetime.now(timezone.utc)
+        with get_session() as session:
+            session.execute(
+                update(ScrapeJob)
+                .where(
+                    ScrapeJob.worker_id == self.worker_id,
+                    ScrapeJob.resort_id.in_(resort_ids),
+                )
+                .values(
+                    heartbeat_at=now,
+                    leased_until=now + timedelta(seconds=LEASE_SECONDS),
+                )
+            )
+            session.commit()
+
+    def run(self) -> None:
+        """Beat until stopped. A missed beat is retried on the next one."""
+        while not self._stopped.wait(self.interval):
+            try:
+                self.beat()
+            except Exception as exception:
+                print("Failed to extend leases")
+                print_exception(exception)
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._stopped.set()
+        self._thread.join()
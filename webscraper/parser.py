@@ -3,16 +3,176 @@
 This module contains the base Parser class that is inherited by custom parsers.
 """
 
+from time import monotonic, sleep
+from traceback import print_exception
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional
 
-from typing import List
-
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support.ui import WebDriverWait
 
 
-from lib.models import Lift, Trail
+from webscraper.records import ScrapedLift, ScrapedTrail
+from webscraper.static_page import StaticElement, StaticPage
+
+# Read every row matching a CSS selector in one round trip, returning one object per row
+# with a value for each requested field. See `Field` for what each field can read.
+# With a section selector, rows and section headers are walked together in document
+# order, and each row's `section` is the text of the last header before it.
+EXTRACT_ROWS_SCRIPT = """
+const [rowSelector, fields, sectionSelector] = arguments;
+const readRow = (row) => {
+  const values = {};
+  for (const [name, [selector, prop]] of Object.entries(fields)) {
+    if (prop === "all") {
+      const elements = selector ? row.querySelectorAll(selector) : [row];
+      values[name] = Array.from(elements).map((element) => element.innerText.trim());
+      continue;
+    }
+    const element = selector ? row.querySelector(selector) : row;
+    if (prop === "exists") {
+      values[name] = element !== null;
+    } else if (element === null) {
+      values[name] = null;
+    } else if (prop === "text") {
+      values[name] = element.innerText.trim();
+    } else if (prop.startsWith("@")) {
+      values[name] = element.getAttribute(prop.slice(1));
+    } else {
+      values[name] = element[prop];
+    }
+  }
+  return values;
+};
+if (!sectionSelector) {
+  return Array.from(document.querySelectorAll(rowSelector)).map(readRow);
+}
+const rows = [];
+let section = null;
+for (const element of document.querySelectorAll(`${sectionSelector}, ${rowSelector}`)) {
+  if (element.matches(rowSelector)) {
+    rows.push({ ...readRow(element), section });
+  } else {
+    section = element.innerText.trim();
+  }
+}
+return rows;
+"""
+
+# Summarize many rows in one round trip: the classes of everything within each row, and
+# whether each of a list of selectors matches anything within it. See `RowSummary`.
+ROW_SUMMARY_SCRIPT = """
+const [rows, selectors] = arguments;
+return rows.map((row) => ({
+  classes: Array.from(
+    new Set(
+      Array.from(row.querySelectorAll("[class]")).flatMap((element) =>
+        Array.from(element.classList)
+      )
+    )
+  ),
+  present: selectors.map((selector) => row.querySelector(selector) !== null),
+}));
+"""
+
+# Installed in each tab before it navigates, to count the fetch + XHR requests that are
+# still in flight. Finished requests show up in the performance timeline, but pending
+# ones don't, like a slow API call that the lifts + trails are waiting on.
+REQUEST_TRACKER_SCRIPT = """
+if (window.__pendingRequests === undefined) {
+  window.__pendingRequests = 0;
+  const done = () => {
+    window.__pendingRequests -= 1;
+  };
+  const originalFetch = window.fetch;
+  if (originalFetch) {
+    window.fetch = function (...args) {
+      window.__pendingRequests += 1;
+      return originalFetch.apply(this, args).finally(done);
+    };
+  }
+  const originalSend = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function (...args) {
+    window.__pendingRequests += 1;
+    this.addEventListener("loadend", done, { once: true });
+    try {
+      return originalSend.apply(this, args);
+    } catch (error) {
+      done();
+      throw error;
+    }
+  };
+}
+"""
+
+# Report on everything needed to decide whether a page is ready to be parsed, in a
+# single round trip: how many elements match each selector, whether the page has
+# finished loading, how many requests are still in flight, and how long it's been since
+# the last network response.
+READINESS_SCRIPT = """
+const [selectors] = arguments;
+const entries = performance
+  .getEntriesByType("resource")
+  .concat(performance.getEntriesByType("navigation"));
+const lastResponse = entries.reduce(
+  (latest, entry) => Math.max(latest, entry.responseEnd || 0), 0
+);
+return {
+  counts: selectors.map((selector) => document.querySelectorAll(selector).length),
+  complete: document.readyState === "complete",
+  idleMs: performance.now() - lastResponse,
+  pending: window.__pendingRequests || 0,
+};
+"""
+
+READY_TIMEOUT_SECONDS = 10
+READY_POLL_SECONDS = 0.25
+# How long the network has to be quiet before the page counts as idle.
+NETWORK_IDLE_MS = 500
+# How long a fully loaded + idle page gets to render a missing selector before giving up,
+# on top of any `additional_wait_seconds` the resort needs.
+MISSING_SELECTOR_GRACE_MS = 2000
+
+
+class Field(NamedTuple):
+    """
+    Describes how to read a single value (like a trail's name) out of each row
+    during bulk extraction.
+
+    `selector` is a CSS selector relative to the row, or `None` for the row itself.
+    `prop` is one of:
+        "text": trimmed visible text, same as `WebElement.text`
+        "exists": whether or not `selector` matches anything
+        "all": a list with the text of every match for `selector`
+        "@<name>": the value of an HTML attribute, like "@class"
+        any other DOM property, like "innerText" or "textContent"
+    `transform` is optionally applied to the value that was read.
+    """
+
+    selector: Optional[str] = None
+    prop: str = "text"
+    transform: Optional[Callable[[Any], Any]] = None
+
+
+class RowSummary(NamedTuple):
+    """
+    What's inside a lift or trail row, read ahead of time so that checking for a marker
+    (like a "closed" or "groomed" icon) is a lookup rather than a round trip to the
+    browser, and a missing marker doesn't cost an exception.
+
+    `classes` holds every CSS class used within the row, and `present` whether each of
+    the parser's `row_presence_css_selectors` matches anything within it.
+    """
+
+    classes: FrozenSet[str]
+    present: Dict[str, bool]
+
+
+def open_if_present(present: bool) -> str:
+    """For reports that only mark open items, turn presence of that marker into a status."""
+    return "Open" if present else "Closed"
 
 
 class Parser:
@@ -25,8 +185,154 @@ class Parser:
     snow_report_css_selector = None
     trail_type_to_rating: dict = {}
 
+    # Declaring these enables bulk extraction of every lift/trail in a single script call.
+    # Keys are the keyword arguments of `make_lift`/`make_trail`.
+    lift_fields: Dict[str, Field] = {}
+    trail_fields: Dict[str, Field] = {}
+    # Headers naming the trail type of every trail after them (up to the next header),
+    # for reports that group trails by difficulty instead of marking each trail.
+    trail_section_css_selector: Optional[str] = None
+
+    # Structural checks (that can't be told from classes alone) to read for every row at
+    # once along with its classes, for `has_child`.
+    row_presence_css_selectors: List[str] = []
+
+    # Readiness conditions that are checked before parsing a freshly loaded trail report.
+    # Selectors default to `lift_css_selector` and `trail_css_selector`.
+    ready_css_selectors: List[str] = []
+    wait_for_stable_rows = False
+    wait_for_network_idle = False
+
     def __init__(self, browser: WebDriver):
         self.browser = browser
+        # Snapshots of the report ("lifts", "trails", "snow_report") to parse instead of
+        # the live browser, when they've been captured.
+        self.pages: Dict[str, StaticPage] = {}
+        self._row_summaries: Dict[Any, RowSummary] = {}
+        self._unsummarized_rows: List[WebElement] = []
+
+    @classmethod
+    def has_tabs(cls) -> bool:
+        """Return `True` if lifts and trails have to be displayed separately."""
+        return (
+            cls.display_lifts is not Parser.display_lifts
+            or cls.display_trails is not Parser.display_trails
+        )
+
+    def get_ready_css_selectors(self, include_snow_report: bool = False) -> List[str]:
+        """Return selectors that must match something before the report can be parsed."""
+        selectors = self.ready_css_selectors or [
+            self.lift_css_selector,
+            self.trail_css_selector,
+        ]
+        if include_snow_report:
+            selectors = selectors + [self.snow_report_css_selector]
+        return [selector for selector in selectors if selector]
+
+    def wait_until_ready(
+        self,
+        css_selectors: List[str],
+        timeout: float = READY_TIMEOUT_SECONDS,
+        extra_grace_seconds: float = 0,
+    ) -> None:
+        """
+        Poll the live browser until every selector matches something (and, if the parser
+        asks for it, the number of matches has stopped changing and the network has gone
+        quiet).
+
+        Rather than waiting out the full `timeout`, give up early if a selector still
+        matches nothing after the page has finished loading, no requests are in flight,
+        and no responses have arrived for `MISSING_SELECTOR_GRACE_MS` plus
+        `extra_grace_seconds`.
+        """
+        if isinstance(self.browser, StaticPage):
+            return
+
+        deadline = monotonic() + timeout
+        grace_ms = MISSING_SELECTOR_GRACE_MS + extra_grace_seconds * 1000
+        last_counts = None
+        while True:
+            state = self.browser.execute_script(READINESS_SCRIPT, css_selectors)
+            counts, idle_ms = state["counts"], state["idleMs"]
+            quiet = not state["pending"]
+            present = all(counts)
+            stable = not self.wait_for_stable_rows or counts == last_counts
+            idle = not self.wait_for_network_idle or (
+                quiet and idle_ms >= NETWORK_IDLE_MS
+            )
+            if present and stable and idle:
+                return
+
+            if not present and state["complete"] and quiet and idle_ms >= grace_ms:
+                missing = [
+                    selector
+                    for selector, count in zip(css_selectors, counts)
+                    if not count
+                ]
+                raise NoSuchElementException(f"Page loaded without {missing}")
+
+            if monotonic() > deadline:
+                raise TimeoutException(f"Page not ready after {timeout} seconds")
+
+            last_counts = counts
+            sleep(READY_POLL_SECONDS)
+
+    def until(self, condition: Callable[[Any], Any]) -> Any:
+        """
+        Wait for `condition` to return something truthy, like `WebDriverWait.until`.
+        Captured pages can't change, so they're only checked once.
+        """
+        if isinstance(self.browser, StaticPage):
+            result = condition(self.browser)
+            if not result:
+                raise NoSuchElementException("Nothing found in captured page")
+            return result
+
+        return WebDriverWait(self.browser, timeout=READY_TIMEOUT_SECONDS).until(
+            condition
+        )
+
+    def capture_report(self) -> None:
+        """
+        Snapshot the trail report as rendered by the live browser, once per tab if lifts
+        and trails are displayed separately, so that it can be parsed without the browser.
+        """
+        if self.has_tabs():
+            self.display_lifts()
+            self.pages["lifts"] = StaticPage(self.browser.page_source)
+            self.display_trails()
+            self.pages["trails"] = StaticPage(self.browser.page_source)
+        else:
+            page = StaticPage(self.browser.page_source)
+            self.pages["lifts"] = self.pages["trails"] = page
+
+    def capture_snow_report(self, separate_page: bool) -> None:
+        """
+        Snapshot the snow report as rendered by the live browser, unless it's part of a
+        trail report that has already been captured.
+        """
+        if separate_page or "trails" not in self.pages:
+            self.pages["snow_report"] = StaticPage(self.browser.page_source)
+        else:
+            self.pages["snow_report"] = self.pages["trails"]
+
+    def load_static_report(
+        self, trail_report_source: str, snow_report_source: Optional[str] = None
+    ) -> None:
+        """
+        Parse HTML that was fetched without a browser. Every tab is already part of
+        server-rendered HTML, so lifts and trails can be read from the same page.
+        """
+        page = StaticPage(trail_report_source)
+        self.pages["lifts"] = self.pages["trails"] = page
+        self.pages["snow_report"] = (
+            StaticPage(snow_report_source) if snow_report_source else page
+        )
+
+    def use_page(self, name: str) -> None:
+        """Point the parser at a captured snapshot of the report, if there is one."""
+        if name in self.pages:
+            self.browser = self.pages[name]
 
     def display_trails(self) -> None:
         """Take any action needed to render trails in the DOM (like opening a "trails" panel
@@ -40,15 +346,58 @@ class Parser:
     def element_has_child(cls, element: WebElement, css_selector: str) -> bool:
         """Return `true` if a there is a match for a given `css_selector`
         within a given web element."""
-        try:
-            element.find_element(By.CSS_SELECTOR, css_selector)
-            return True
-        except Exception as _:
-            return False
+        return bool(element.find_elements(By.CSS_SELECTOR, css_selector))
+
+    def summarize_rows(self, rows: List[WebElement]) -> None:
+        """Read a `RowSummary` of every row with a single script call."""
+        selectors = self.row_presence_css_selectors
+        if not rows:
+            return
+        if isinstance(rows[0], StaticElement):
+            summaries = [row.summarize(selectors) for row in rows]
+        else:
+            summaries = self.browser.execute_script(ROW_SUMMARY_SCRIPT, rows, selectors)
+
+        for row, summary in zip(rows, summaries):
+            self._row_summaries[row] = RowSummary(
+                classes=frozenset(summary["classes"]),
+                present=dict(zip(selectors, summary["present"])),
+            )
+
+    def queue_row_summaries(self, rows: List[WebElement]) -> None:
+        """
+        Summarize these rows all together, as soon as any one of them is checked, rather
+        than one at a time.
+        """
+        self._unsummarized_rows = list(rows)
+
+    def get_row_summary(self, row: WebElement) -> RowSummary:
+        """Return the `RowSummary` of a row, reading it (and any queued rows) if needed."""
+        if row not in self._row_summaries:
+            if row in self._unsummarized_rows:
+                self.summarize_rows(self._unsummarized_rows)
+                self._unsummarized_rows = []
+            else:
+                self.summarize_rows([row])
+        return self._row_summaries[row]
+
+    def has_class(self, row: WebElement, class_name: str) -> bool:
+        """Return `True` if anything within the row has the CSS class `class_name`."""
+        return class_name in self.get_row_summary(row).classes
+
+    def has_child(self, row: WebElement, css_selector: str) -> bool:
+        """
+        Return `True` if `css_selector` matches anything within the row. This is a lookup
+        for selectors in `row_presence_css_selectors`, and a round trip otherwise.
+        """
+        present = self.get_row_summary(row).present
+        if css_selector in present:
+            return present[css_selector]
+        return self.element_has_child(row, css_selector)
 
     def get_lift_elements(self) -> List[WebElement]:
         """Get the HTML elements containing all lift information."""
-        elements = WebDriverWait(self.browser, timeout=10).until(
+        elements = self.until(
             lambda browser: browser.find_elements(
                 By.CSS_SELECTOR, self.lift_css_selector
             )
@@ -62,23 +411,81 @@ class Parser:
     def get_lift_status(self, lift: WebElement) -> str:
         """Find the status of this lift within the HTML element."""
 
-    def get_lifts(self) -> List["Lift"]:
-        """Return `Lift` instances for each web element representing a lift."""
+    def make_lift(self, name: str, status: str) -> ScrapedLift:
+        """Build a `ScrapedLift` out of values found in the trail report."""
+        return ScrapedLift(
+            name=name, unique_name=name, status=status, is_open=status.lower() == "open"
+        )
+
+    def extract_rows(
+        self,
+        css_selector: str,
+        fields: Dict[str, Field],
+        section_css_selector: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Read every field of every row matching `css_selector` with a single script call,
+        instead of a round trip to the browser for each field of each row. Given a
+        `section_css_selector`, each row's `section` is also read in the same pass.
+        """
+        field_specs = {
+            name: [field.selector, field.prop] for name, field in fields.items()
+        }
+        if isinstance(self.browser, StaticPage):
+            rows = self.until(
+                lambda page: page.extract_rows(
+                    css_selector, field_specs, section_css_selector
+                )
+            )
+        else:
+            rows = self.until(
+                lambda browser: browser.execute_script(
+                    EXTRACT_ROWS_SCRIPT, css_selector, field_specs, section_css_selector
+                )
+            )
+        print(f"{len(rows)} rows extracted")
+        for row in rows:
+            for name, field in fields.items():
+                if field.transform:
+                    row[name] = field.transform(row[name])
+        return rows
+
+    def extract_lifts(self) -> Optional[List[ScrapedLift]]:
+        """Return a `ScrapedLift` for each lift via bulk extraction, if this parser supports it."""
+        if not (self.lift_fields and self.lift_css_selector):
+            return None
+
+        try:
+            rows = self.extract_rows(self.lift_css_selector, self.lift_fields)
+            return [self.make_lift(**row) for row in rows]
+        except Exception as exception:
+            print("Bulk lift extraction failed, falling back to individual elements")
+            print_exception(exception)
+            return None
+
+    def get_lifts(self) -> List[ScrapedLift]:
+        """Return a `ScrapedLift` for each web element representing a lift."""
+        self.use_page("lifts")
         self.display_lifts()
+        lifts = self.extract_lifts()
+        if lifts is not None:
+            return lifts
+
         lifts = []
-        for lift_element in self.get_lift_elements():
-            lift = Lift(
-                name=self.get_lift_name(lift_element),
-                unique_name=self.get_lift_name(lift_element),
-                status=self.get_lift_status(lift_element),
+        lift_elements = self.get_lift_elements()
+        self.queue_row_summaries(lift_elements)
+        for lift_element in lift_elements:
+            lifts.append(
+                self.make_lift(
+                    name=self.get_lift_name(lift_element),
+                    status=self.get_lift_status(lift_element),
+                )
             )
-            lift.is_open = lift.status.lower() == "open"
-            lifts.append(lift)
         return lifts
 
     def get_trail_elements(self) -> List[WebElement]:
         """Return all web elements containing information about individual trails."""
-        elements = WebDriverWait(self.browser, timeout=10).until(
+        elements = self.until(
             lambda browser: browser.find_elements(
                 By.CSS_SELECTOR, self.trail_css_selector
             )
@@ -86,22 +493,77 @@ class Parser:
         print(f"{len(elements)} trails")
         return elements
 
-    def get_trails(self) -> List["Trail"]:
-        "Return `Trail` instances for each web element representing a trail."
+    def make_trail(
+        self,
+        name: str,
+        trail_type: str,
+        status: str,
+        groomed: bool = False,
+        night_skiing: bool = False,
+        rating: Optional[int] = None,
+    ) -> ScrapedTrail:
+        """
+        Build a `ScrapedTrail` out of values found in the trail report. The rating is
+        looked up from the trail type, unless it's already known.
+        """
+        if rating is None and trail_type:
+            rating = self.trail_type_to_rating.get(trail_type)
+
+        status = status.lower()
+        return ScrapedTrail(
+            name=name,
+            unique_name=f"{name}_{trail_type}" if name and trail_type else None,
+            trail_type=trail_type,
+            status=status,
+            # is_open=status == "open"
+            is_open="open" in status,
+            groomed=groomed,
+            night_skiing=night_skiing,
+            rating=rating,
+        )
+
+    def extract_trails(self) -> Optional[List[ScrapedTrail]]:
+        """Return a `ScrapedTrail` for each trail via bulk extraction, if this parser supports it."""
+        if not (self.trail_fields and self.trail_css_selector):
+            return None
+
+        try:
+            rows = self.extract_rows(
+                self.trail_css_selector,
+                self.trail_fields,
+                self.trail_section_css_selector,
+            )
+            if self.trail_section_css_selector:
+                for row in rows:
+                    row["trail_type"] = row.pop("section")
+            return [self.make_trail(**row) for row in rows]
+        except Exception as exception:
+            print("Bulk trail extraction failed, falling back to individual elements")
+            print_exception(exception)
+            return None
+
+    def get_trails(self) -> List[ScrapedTrail]:
+        "Return a `ScrapedTrail` for each web element representing a trail."
+        self.use_page("trails")
         self.display_trails()
+        trails = self.extract_trails()
+        if trails is not None:
+            return trails
+
         trails = []
-        for trail_element in self.get_trail_elements():
-            trail = Trail(
-                name=self.get_trail_name(trail_element),
-                trail_type=self.get_trail_type(trail_element),
-                status=self.get_trail_status(trail_element).lower(),
-                groomed=self.get_trail_groomed(trail_element),
-                night_skiing=self.get_trail_night_skiing(trail_element),
-                rating=self.get_trail_rating(trail_element),
+        trail_elements = self.get_trail_elements()
+        self.queue_row_summaries(trail_elements)
+        for trail_element in trail_elements:
+            trails.append(
+                self.make_trail(
+                    name=self.get_trail_name(trail_element),
+                    trail_type=self.get_trail_type(trail_element),
+                    status=self.get_trail_status(trail_element),
+                    groomed=self.get_trail_groomed(trail_element),
+                    night_skiing=self.get_trail_night_skiing(trail_element),
+                    rating=self.get_trail_rating(trail_element),
+                )
             )
-            # trail.is_open = trail.status.lower() == "open"
-            trail.is_open = "open" in trail.status.lower()
-            trails.append(trail)
         return trails
 
     def get_trail_name(self, trail: WebElement) -> str:
@@ -141,6 +603,7 @@ class Parser:
         that can be found + returned as a dict.
         """
         if self.snow_report_css_selector is not None:
+            self.use_page("snow_report")
             snow_report = self.get_snow_report_element()
             return {
                 "baseLayer": self.get_base_layer(snow_report),
@@ -151,7 +614,7 @@ class Parser:
 
     def get_snow_report_element(self) -> WebElement:
         """Get the HTML element that contains all snow information."""
-        element = WebDriverWait(self.browser, timeout=10).until(
+        element = self.until(
             lambda browser: browser.find_element(
                 By.CSS_SELECTOR, self.snow_report_css_selector
             )
@@ -6,7 +6,7 @@ import re
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.common.exceptions import NoSuchElementException
-from webscraper import Parser, Rating
+from webscraper import Field, Parser, Rating, open_if_present
 from lib.util import get_inch_range_from_string
 
 
@@ -25,6 +25,19 @@ class Bromley(Parser):
         "Extremely Difficult": Rating.DOUBLE_BLACK.value,
     }
 
+    lift_fields = {
+        "name": Field(".lift-name"),
+        "status": Field("svg.icon_snowreport_open", "exists", open_if_present),
+    }
+    trail_fields = {
+        "name": Field(".trail-name"),
+        "status": Field("svg.icon_snowreport_open", "exists", open_if_present),
+    }
+    # Each difficulty's title comes right before the sections of trails it applies to.
+    trail_section_css_selector = (
+        "div#trails > div.difficulty-info .difficulty-level-title"
+    )
+
     def display_lifts(self):
         tabs = self.browser.find_elements(By.CLASS_NAME, "tab-box")
         tabs[0].click()
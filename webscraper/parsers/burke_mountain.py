@@ -5,7 +5,7 @@ Burke Mountain webscraper
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 
-from webscraper import Parser, Rating
+from webscraper import Field, Parser, Rating
 from lib.util import get_inch_range_from_string
 
 
@@ -25,6 +25,19 @@ class BurkeMountain(Parser):
         "level-4": Rating.DOUBLE_BLACK.value,
     }
 
+    lift_fields = {
+        "name": Field('td[data-label="Lift Name"]'),
+        "status": Field('td[data-label="Status"] > span', "@class"),
+    }
+    trail_fields = {
+        "name": Field('td[data-label="Trail Name"] > div.label'),
+        "trail_type": Field('td[data-label="Trail Name"] > div.label > span', "@class"),
+        "status": Field('td[data-label="Status"] > span', "@class"),
+        "groomed": Field(
+            'td[data-label="Groomed"] > span', "@class", lambda css: css == "open"
+        ),
+    }
+
     def get_lift_name(self, lift: WebElement) -> str:
         return lift.find_element(By.CSS_SELECTOR, 'td[data-label="Lift Name"]').text
 
@@ -5,7 +5,6 @@ import re
 from typing import List, Optional
 
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.remote.webelement import WebElement
 
 from webscraper import Parser, Rating
@@ -18,6 +17,7 @@ class Killington(Parser):
     """
 
     snow_report_css_selector = "div.dor-snow-totals > ul"
+    ready_css_selectors = ["div.panel-body > table tbody > tr"]
 
     trail_type_to_rating: dict = {
         "difficulty-level-green": Rating.GREEN.value,
@@ -27,6 +27,7 @@ class Killington(Parser):
     }
 
     red_x_color = "#D0021B"
+    row_presence_css_selectors = ["td.difficulty", "td.groomed > div"]
 
     def __init__(self, browser):
         self._lifts_and_trails = None
@@ -54,19 +55,22 @@ class Killington(Parser):
                 By.CSS_SELECTOR, "div.panel-body > table"
             )[1:]
 
-            for table in table_panels:
-                table_rows = table.find_elements(By.CSS_SELECTOR, "tbody > tr")
-                for row in table_rows:
-                    try:
-                        row.find_element(By.CSS_SELECTOR, "td.difficulty")
-                        trail_elements.append(row)
-                    except NoSuchElementException:
-                        lift_elements.append(row)
-
-                self._lifts_and_trails = {
-                    "lifts": lift_elements,
-                    "trails": trail_elements,
-                }
+            table_rows = [
+                row
+                for table in table_panels
+                for row in table.find_elements(By.CSS_SELECTOR, "tbody > tr")
+            ]
+            self.summarize_rows(table_rows)
+            for row in table_rows:
+                if self.has_child(row, "td.difficulty"):
+                    trail_elements.append(row)
+                else:
+                    lift_elements.append(row)
+
+            self._lifts_and_trails = {
+                "lifts": lift_elements,
+                "trails": trail_elements,
+            }
 
         return self._lifts_and_trails
 
@@ -115,11 +119,7 @@ class Killington(Parser):
         return None
 
     def get_trail_groomed(self, trail: WebElement) -> bool:
-        try:
-            trail.find_element(By.CSS_SELECTOR, "td.groomed > div")
-            return True
-        except NoSuchElementException:
-            return False
+        return self.has_child(trail, "td.groomed > div")
 
     def get_trail_night_skiing(self, trail: WebElement) -> bool:
         return False
@@ -21,6 +21,8 @@ class SaskadenaSix(Parser):
         "Expert": Rating.DOUBLE_BLACK.value,
     }
 
+    ready_css_selectors = [".node--type-lift-trail"]
+
     def __init__(self, browser):
         self._lifts_and_trails = None
         super().__init__(browser)
@@ -49,8 +51,9 @@ class SaskadenaSix(Parser):
             all_elements = self.browser.find_elements(
                 By.CLASS_NAME, "node--type-lift-trail"
             )
+            self.summarize_rows(all_elements)
             for element in all_elements:
-                if Parser.element_has_child(element, ".level"):
+                if self.has_class(element, "level"):
                     trail_elements.append(element)
                 else:
                     lift_elements.append(element)
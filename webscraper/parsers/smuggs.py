@@ -6,7 +6,6 @@ from typing import List, Optional
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.common.exceptions import NoSuchElementException
 
 from webscraper import Parser, Rating
 from lib.util import get_inch_range_from_string
@@ -29,6 +28,7 @@ class Smuggs(Parser):
     }
 
     report_sections = ["sterling-report", "madonna-report", "morse-report"]
+    ready_css_selectors = [f"#{section} .report" for section in report_sections]
 
     def __init__(self, browser):
         self._lifts_and_trails = None
@@ -69,44 +69,24 @@ class Smuggs(Parser):
         return lift.text.strip()
 
     def get_lift_status(self, lift: WebElement) -> str:
-        try:
-            if lift.find_element(By.CLASS_NAME, "closed"):
-                return "Closed"
-        except NoSuchElementException:
-            return "Open"
-
-        return None
+        return "Closed" if self.has_class(lift, "closed") else "Open"
 
     def get_trail_name(self, trail: WebElement) -> str:
         return trail.text.strip()
 
     def get_trail_status(self, trail: WebElement) -> str:
-        try:
-            if trail.find_element(By.CLASS_NAME, "closed"):
-                return "Closed"
-        except NoSuchElementException:
-            return "Open"
-
-        return None
+        return "Closed" if self.has_class(trail, "closed") else "Open"
 
     def get_trail_type(self, trail: WebElement) -> str:
+        classes = self.get_row_summary(trail).classes
         for trail_type in self.trail_type_to_rating:
-            try:
-                if trail.find_element(By.CLASS_NAME, trail_type):
-                    return trail_type
-            except NoSuchElementException:
-                continue
+            if trail_type in classes:
+                return trail_type
 
         return None
 
     def get_trail_groomed(self, trail: WebElement) -> bool:
-        try:
-            if trail.find_element(By.CLASS_NAME, "groomed-now"):
-                return True
-        except NoSuchElementException:
-            return False
-
-        return None
+        return self.has_class(trail, "groomed-now")
 
     def get_trail_night_skiing(self, trail: WebElement) -> bool:
         return False
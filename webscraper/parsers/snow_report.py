@@ -9,7 +9,7 @@ from typing import List
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 
-from webscraper import Parser, Rating
+from webscraper import Field, Parser, Rating
 from lib.util import get_inch_range_from_string
 
 
@@ -19,6 +19,19 @@ class SnowReportCSS(Parser):
     lift_css_selector = "article.SnowReport-Lift.SnowReport-feature"
     trail_css_selector = "article.SnowReport-Trail.SnowReport-feature"
 
+    lift_fields = {
+        "name": Field(".SnowReport-feature-title"),
+        "status": Field(".SnowReport-item-status .SnowReport-sr-label"),
+    }
+    trail_fields = {
+        "name": Field(".SnowReport-feature-title"),
+        "status": Field(".SnowReport-item-status span"),
+        "groomed": Field(".pti-groomed", "exists"),
+        "night_skiing": Field(".pti-moon-mining", "exists"),
+    }
+    # Trails are grouped into a section per difficulty, each headed by its name.
+    trail_section_css_selector = "section h2"
+
     def get_lift_name(self, lift: WebElement) -> str:
         lift_name_element = lift.find_element(By.CLASS_NAME, "SnowReport-feature-title")
         return lift_name_element.text
@@ -50,10 +63,10 @@ class SnowReportCSS(Parser):
         return header.text
 
     def get_trail_groomed(self, trail: WebElement) -> bool:
-        return Parser.element_has_child(trail, ".pti-groomed")
+        return self.has_class(trail, "pti-groomed")
 
     def get_trail_night_skiing(self, trail: WebElement) -> bool:
-        return Parser.element_has_child(trail, ".pti-moon-mining")
+        return self.has_class(trail, "pti-moon-mining")
 
 
 class BoltonValley(SnowReportCSS):
@@ -7,7 +7,7 @@ from typing import List
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 
-from webscraper import Parser, Rating
+from webscraper import Field, Parser, Rating
 
 
 class Sugarbush(Parser):
@@ -17,6 +17,8 @@ class Sugarbush(Parser):
 
     lift_css_selector = "ul.Lifts_list__3PwcO > li"
     trail_css_selector = "ul.Trails_trailsList__3gYwp > li"
+    # Rows are rendered by a single page app, a batch at a time
+    wait_for_stable_rows = True
 
     trail_type_to_rating: dict = {
         "Easiest": Rating.GREEN.value,
@@ -26,6 +28,21 @@ class Sugarbush(Parser):
         "Wooded Area": Rating.WOODED.value,
     }
 
+    lift_fields = {
+        "name": Field("h3.Lifts_name__1YvQ1"),
+        "status": Field("p.Lifts_status__z9n5V"),
+    }
+    trail_fields = {
+        "name": Field("dd > h4.Trails_trailName__1_oua"),
+        "trail_type": Field("div.Trails_trailDetailDifficulty__2n1p- > dd > span"),
+        "status": Field("dd > p.Trails_trailStatus__jJDvi"),
+        "groomed": Field(
+            "ul.Trails_trailFeatures__2pFdC > li",
+            "all",
+            lambda features: "Grooming" in features,
+        ),
+    }
+
     def get_lift_name(self, lift: WebElement) -> str:
         return lift.find_element(By.CSS_SELECTOR, "h3.Lifts_name__1YvQ1").text
 
@@ -4,12 +4,31 @@ Webscraper for various Vail Resorts mountains, like:
     Mt. Snow
     Stowe
 """
+from typing import Optional
+
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 
-from webscraper import Parser, Rating
+from webscraper import Field, Parser, Rating, open_if_present
 from lib.util import get_inch_range_from_string
 
+TRAIL_TYPES = [
+    "beginner",
+    "intermediate",
+    "mostdifficult",
+    "expert",
+    "terrainpark",
+]
+
+
+def get_trail_type_from_icon(icon_class: Optional[str]) -> str:
+    """Find which trail type is named in the CSS class of a trail's difficulty icon."""
+    for trail_type in TRAIL_TYPES:
+        if icon_class and icon_class.find(trail_type) != -1:
+            return trail_type
+
+    raise RuntimeError("Trail type not found")
+
 
 class Vail(Parser):
     """
@@ -19,6 +38,8 @@ class Vail(Parser):
     lift_css_selector = ".liftStatus__lifts__row"
     trail_css_selector = ".trailStatus__trails__row"
     snow_report_css_selector = "div.snow_report__content"
+    # Rows are rendered by a single page app, a batch at a time
+    wait_for_stable_rows = True
 
     trail_type_to_rating: dict = {
         "beginner": Rating.GREEN.value,
@@ -28,6 +49,22 @@ class Vail(Parser):
         "terrainpark": Rating.TERRAIN_PARK.value,
     }
 
+    lift_fields = {
+        "name": Field("span.liftStatus__lifts__row__title"),
+        "status": Field("div.icon-status-open", "exists", open_if_present),
+    }
+    trail_fields = {
+        "name": Field(".trailStatus__trails__row--name", "innerText"),
+        # Trail difficulty is the 2nd icon in the row.
+        "trail_type": Field(
+            "div.trailStatus__trails__row--icon:nth-of-type(2)",
+            "@class",
+            get_trail_type_from_icon,
+        ),
+        "status": Field("div.icon-status-open", "exists", open_if_present),
+        "groomed": Field("div.icon-status-snowcat", "exists"),
+    }
+
     def get_lift_name(self, lift: WebElement) -> str:
         name_element: WebElement = lift.find_element(
             By.CSS_SELECTOR, "span.liftStatus__lifts__row__title"
@@ -38,11 +75,7 @@ class Vail(Parser):
         """
         See if this item is open, or else return "Closed".
         """
-        try:
-            item.find_element(By.CSS_SELECTOR, "div.icon-status-open")
-            return "Open"
-        except Exception as _:  # pylint: disable=broad-except
-            return "Closed"
+        return "Open" if self.has_class(item, "icon-status-open") else "Closed"
 
     def get_lift_status(self, lift: WebElement) -> str:
         return self.get_item_status(lift)
@@ -57,26 +90,14 @@ class Vail(Parser):
         return name_element.get_attribute("innerText")
 
     def get_trail_type(self, trail: WebElement) -> str:
-        trail_types = [
-            "beginner",
-            "intermediate",
-            "mostdifficult",
-            "expert",
-            "terrainpark",
-        ]
         # Trail difficulty is the 2nd icon in the row.
         trail_icon: WebElement = trail.find_element(
             By.CSS_SELECTOR, "div.trailStatus__trails__row--icon:nth-of-type(2)"
         )
-        icon_class = trail_icon.get_attribute("class")
-        for trail_type in trail_types:
-            if icon_class.find(trail_type) != -1:
-                return trail_type
-
-        raise RuntimeError("Trail type not found")
+        return get_trail_type_from_icon(trail_icon.get_attribute("class"))
 
     def get_trail_groomed(self, trail: WebElement) -> bool:
-        return Parser.element_has_child(trail, "div.icon-status-snowcat")
+        return self.has_class(trail, "icon-status-snowcat")
 
     def get_trail_night_skiing(self, trail: WebElement) -> bool:
         return False
@@ -0,0 +1,98 @@
+# pylint: disable=broad-except
+"""
+Decouple scraping from writing: webscraping workers put what they found on a bounded
+queue, and a single writer thread drains it, writing several resorts per transaction.
+
+That way the number of database connections (and the time spent in transactions) stays
+the same no matter how many resorts are being scraped at once, and workers that get
+ahead of the database simply wait for room on the queue.
+"""
+from queue import Empty, Queue
+from threading import Thread
+from time import monotonic
+from traceback import print_exception
+from typing import Any, Callable, List, Optional
+
+QUEUE_SIZE = 32
+BATCH_SIZE = 8
+# How long the writer waits for a batch to fill up before writing what it has.
+BATCH_WAIT_SECONDS = 1.0
+
+# Put on the queue to tell the writer there's nothing more coming.
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    Pass records to `write` in batches of up to `batch_size`, from a background thread,
+    for as long as the `with` block lasts. Once each batch has been written (or failed
+    to), its records are passed to `on_written`.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[Any]], None],
+        on_written: Optional[Callable[[List[Any]], None]] = None,
+        batch_size: int = BATCH_SIZE,
+        queue_size: int = QUEUE_SIZE,
+        batch_wait_seconds: float = BATCH_WAIT_SECONDS,
+    ):
+        self.write = write
+        self.on_written = on_written
+        self.batch_size = batch_size
+        self.batch_wait_seconds = batch_wait_seconds
+        self._queue: "Queue[Any]" = Queue(maxsize=queue_size)
+        self._stopping = False
+        self._thread = Thread(target=self.run, daemon=True)
+
+    def put(self, record: Any) -> None:
+        """Queue a record to be written, waiting for room if the queue is full."""
+        self._queue.put(record)
+
+    def next_batch(self) -> List[Any]:
+        """
+        Wait for a record, then collect whatever else arrives within
+        `batch_wait_seconds`, up to `batch_size` records in all.
+        """
+        batch: List[Any] = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            try:
+                if deadline is None:
+                    record = self._queue.get()
+                else:
+                    record = self._queue.get(timeout=max(deadline - monotonic(), 0))
+            except Empty:
+                break
+            if record is _STOP:
+                self._stopping = True
+                break
+            batch.append(record)
+            deadline = deadline or monotonic() + self.batch_wait_seconds
+        return batch
+
+    def run(self) -> None:
+        """Write batches until told to stop, and then until the queue is empty."""
+        while not self._stopping:
+            batch = self.next_batch()
+            if not batch:
+                continue
+            try:
+                self.write(batch)
+            except Exception as exception:
+                print(f"Failed to write a batch of {len(batch)}")
+                print_exception(exception)
+
+            try:
+                if self.on_written is not None:
+                    self.on_written(batch)
+            except Exception as exception:
+                print_exception(exception)
+
+    def __enter__(self) -> "BatchWriter":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._queue.put(_STOP)
+        self._thread.join()
@@ -0,0 +1,31 @@
+"""
+Lightweight records of the lifts and trails found in a trail report.
+
+Parsers produce these instead of `Lift` and `Trail` models, which carry SQLAlchemy's
+instrumentation and instance state around for every row. They are only turned into models
+(or rows for a bulk upsert) when they're written, and in the meantime are cheap to build,
+hash, compare and serialize.
+"""
+from typing import NamedTuple, Optional
+
+
+class ScrapedLift(NamedTuple):
+    """A lift, as it appears in the trail report."""
+
+    name: str
+    unique_name: str
+    status: str
+    is_open: bool
+
+
+class ScrapedTrail(NamedTuple):
+    """A trail, as it appears in the trail report."""
+
+    name: str
+    unique_name: Optional[str]
+    trail_type: str
+    status: str
+    is_open: bool
+    groomed: bool = False
+    night_skiing: bool = False
+    rating: Optional[int] = None
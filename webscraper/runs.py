@@ -0,0 +1,111 @@
+"""
+Time each phase of a scrape, and summarize the `scrape_runs` those timings are saved to,
+so a slow resort can be traced to whatever it's slow at: waiting for a browser, loading
+pages, waiting for them to render, parsing, or writing to the database.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from time import monotonic
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm.session import Session
+
+from lib.models import Resort, ScrapeRun
+
+# Each phase is saved to the `<phase>_seconds` column of `scrape_runs`.
+PHASES = [
+    "browser_wait",
+    "page_load",
+    "ready_wait",
+    "capture",
+    "lifts",
+    "trails",
+    "snow_report",
+    "write",
+]
+
+
+class Spans:
+    """Add up the wall-clock time spent in each phase of a scrape."""
+
+    def __init__(self):
+        self.started_at = monotonic()
+        self.seconds: Dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Count time that was measured elsewhere towards a phase."""
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        """Count the time spent in the `with` block towards a phase."""
+        started_at = monotonic()
+        try:
+            yield
+        finally:
+            self.add(phase, monotonic() - started_at)
+
+    def elapsed(self) -> float:
+        """Return the seconds since the scrape started."""
+        return monotonic() - self.started_at
+
+    def columns(self) -> Dict[str, float]:
+        """Return the time spent in each phase, keyed by its `scrape_runs` column."""
+        return {f"{phase}_seconds": seconds for phase, seconds in self.seconds.items()}
+
+
+def get_slowest_resorts(session: Session, days: int = 7, limit: int = 10) -> List[Row]:
+    """
+    Return the resorts whose scrapes took longest on average over the past `days`, with
+    their p95, failure count, and the average time spent in each phase.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    return session.execute(
+        select(
+            Resort.name,
+            func.count().label("runs"),
+            func.count(ScrapeRun.error_class).label("errors"),
+            func.avg(ScrapeRun.total_seconds).label("avg_seconds"),
+            func.percentile_cont(0.95)
+            .within_group(ScrapeRun.total_seconds)
+            .label("p95_seconds"),
+            *(
+                func.avg(getattr(ScrapeRun, f"{phase}_seconds")).label(phase)
+                for phase in PHASES
+            ),
+        )
+        .join(Resort, Resort.id == ScrapeRun.resort_id)
+        .where(ScrapeRun.started_at >= since)
+        .group_by(Resort.name)
+        .order_by(func.avg(ScrapeRun.total_seconds).desc().nulls_last())
+        .limit(limit)
+    ).all()
+
+
+def get_slowest_phases(
+    session: Session, days: int = 7
+) -> List[Tuple[str, float, float]]:
+    """
+    Return `(phase, average seconds, p95 seconds)` for each phase over the past `days`,
+    slowest on average first. Runs that skipped a phase don't count towards it.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    columns = [getattr(ScrapeRun, f"{phase}_seconds") for phase in PHASES]
+    row = session.execute(
+        select(
+            *(func.avg(column) for column in columns),
+            *(func.percentile_cont(0.95).within_group(column) for column in columns),
+        ).where(ScrapeRun.started_at >= since)
+    ).one()
+    averages, p95s = row[: len(PHASES)], row[len(PHASES) :]
+    return sorted(
+        (
+            (phase, float(average), float(p95))
+            for phase, average, p95 in zip(PHASES, averages, p95s)
+            if average is not None
+        ),
+        key=lambda phase: phase[1],
+        reverse=True,
+    )
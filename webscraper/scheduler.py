@@ -0,0 +1,150 @@
+"""
+Decide when each resort is next due to be scraped, based on how often its reports have
+been changing, the time of day where the resort is, whether it's open for the season,
+and how closely users are watching it.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, select
+from sqlalchemy.orm.session import Session
+from sqlalchemy.sql.selectable import Subquery
+
+from lib.models import Resort, ResortRead, UserResort
+
+DEFAULT_TIMEZONE = "America/New_York"
+
+# Local hours (start inclusive, end exclusive) when lifts are turning and reports change.
+OPERATING_HOURS = (6, 22)
+# Local hours around opening, when lifts and trails open one after another.
+OPENING_HOURS = (7, 10)
+
+MIN_INTERVAL_MINUTES = 5
+MAX_INTERVAL_MINUTES = 60
+OVERNIGHT_INTERVAL_MINUTES = 180
+OFF_SEASON_INTERVAL_MINUTES = 720
+# Nothing has to be open overnight, but a resort with nothing open for this long is done.
+OFF_SEASON_AFTER_DAYS = 3
+
+# A pin counts as much as this many API reads of the resort over `READS_WINDOW_DAYS`.
+PIN_WEIGHT = 20
+READS_WINDOW_DAYS = 7
+# The most watched resort is scraped this many times more often during the day.
+POPULARITY_BOOST = 2.0
+
+# How much the latest scrape counts towards a resort's change rate, versus the ones before.
+CHANGE_RATE_WEIGHT = 0.3
+
+
+def update_change_rate(resort: Resort, changed: bool) -> float:
+    """
+    Fold the outcome of the latest scrape into the resort's change rate: a moving average
+    of how often scrapes have found lifts or trails that changed, between 0 and 1.
+    """
+    previous = resort.change_rate if resort.change_rate is not None else 1.0
+    resort.change_rate = (
+        CHANGE_RATE_WEIGHT * float(changed) + (1 - CHANGE_RATE_WEIGHT) * previous
+    )
+    return resort.change_rate
+
+
+def get_popularity_scores() -> Subquery:
+    """
+    Return a subquery of every resort's `score`: how watched it is, from its pins and
+    recent API reads.
+    """
+    pins = (
+        select(UserResort.resort_id, func.count().label("pins"))
+        .group_by(UserResort.resort_id)
+        .subquery()
+    )
+    reads = (
+        select(ResortRead.resort_id, func.sum(ResortRead.count).label("reads"))
+        .where(ResortRead.read_on >= date.today() - timedelta(days=READS_WINDOW_DAYS))
+        .group_by(ResortRead.resort_id)
+        .subquery()
+    )
+    score = PIN_WEIGHT * func.coalesce(pins.c.pins, 0) + func.coalesce(reads.c.reads, 0)
+    return (
+        select(Resort.id.label("resort_id"), score.label("score"))
+        .outerjoin(pins, pins.c.resort_id == Resort.id)
+        .outerjoin(reads, reads.c.resort_id == Resort.id)
+        .subquery("popularity")
+    )
+
+
+def get_popularity(session: Session) -> Dict[str, float]:
+    """
+    Return how watched each resort is, from its pins and recent API reads, relative to
+    the most watched resort: 1 for that resort, down to 0 for resorts nobody watches.
+    """
+    scores = get_popularity_scores()
+    rows = session.execute(select(scores.c.resort_id, scores.c.score)).all()
+
+    top_score = max((float(row[1]) for row in rows), default=0.0)
+    return {
+        resort_id: float(score) / top_score if top_score else 0.0
+        for resort_id, score in rows
+    }
+
+
+def is_off_season(resort: Resort, now: datetime) -> bool:
+    """
+    A resort with nothing open, and nothing open in the past `OFF_SEASON_AFTER_DAYS`
+    either, is closed for the season.
+    """
+    if resort.open_lifts or resort.open_trails:
+        return False
+    return resort.last_opened_on is None or (
+        now.date() - resort.last_opened_on > timedelta(days=OFF_SEASON_AFTER_DAYS)
+    )
+
+
+def get_local_time(resort: Resort, now: datetime) -> datetime:
+    """Return `now` in the resort's own timezone."""
+    return now.astimezone(ZoneInfo(resort.timezone or DEFAULT_TIMEZONE))
+
+
+def get_next_opening(local_now: datetime) -> datetime:
+    """Return the next start of `OPENING_HOURS`, in the same timezone as `local_now`."""
+    opening = local_now.replace(
+        hour=OPENING_HOURS[0], minute=0, second=0, microsecond=0
+    )
+    if opening <= local_now:
+        opening += timedelta(days=1)
+    return opening
+
+
+def get_scrape_interval(resort: Resort, now: datetime) -> timedelta:
+    """
+    Return how long to wait before scraping the resort again. Scrapes are as frequent as
+    allowed around opening time, back off towards `MAX_INTERVAL_MINUTES` through the day
+    for resorts whose reports rarely change, and are rare overnight and out of season.
+    Popular resorts are scraped up to `POPULARITY_BOOST` times as often through the day.
+    Neither overnight nor out of season do scrapes sleep through the next opening, so a
+    resort that opens for the weekend (or the season) is caught that morning.
+    """
+    local_now = get_local_time(resort, now)
+    until_opening = get_next_opening(local_now) - local_now
+    if is_off_season(resort, local_now):
+        return min(timedelta(minutes=OFF_SEASON_INTERVAL_MINUTES), until_opening)
+
+    if not OPERATING_HOURS[0] <= local_now.hour < OPERATING_HOURS[1]:
+        return min(timedelta(minutes=OVERNIGHT_INTERVAL_MINUTES), until_opening)
+
+    if OPENING_HOURS[0] <= local_now.hour < OPENING_HOURS[1]:
+        return timedelta(minutes=MIN_INTERVAL_MINUTES)
+
+    change_rate = resort.change_rate if resort.change_rate is not None else 1.0
+    minutes = MAX_INTERVAL_MINUTES - change_rate * (
+        MAX_INTERVAL_MINUTES - MIN_INTERVAL_MINUTES
+    )
+    minutes /= 1 + (POPULARITY_BOOST - 1) * (resort.popularity or 0.0)
+    return timedelta(minutes=max(minutes, MIN_INTERVAL_MINUTES))
+
+
+def get_next_scrape_at(resort: Resort, changed: bool, now: datetime) -> datetime:
+    """Update the resort's change rate with the latest scrape, and return when it's next due."""
+    update_change_rate(resort, changed)
+    return now + get_scrape_interval(resort, now)
@@ -0,0 +1,234 @@
+"""
+Snapshots of rendered pages that parsers can read without a running browser.
+
+`StaticPage` and `StaticElement` implement the parts of Selenium's `WebDriver` and
+`WebElement` interfaces that parsers rely on, backed by an in-process lxml tree.
+"""
+import re
+from typing import Dict, List, Optional
+
+from lxml import html
+from lxml.etree import XPathError
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+
+# Elements that start on a new line when rendered, so their text does too.
+BLOCK_TAGS = {
+    "address",
+    "article",
+    "aside",
+    "blockquote",
+    "dd",
+    "div",
+    "dl",
+    "dt",
+    "fieldset",
+    "figcaption",
+    "figure",
+    "footer",
+    "form",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "header",
+    "hr",
+    "li",
+    "main",
+    "nav",
+    "ol",
+    "p",
+    "pre",
+    "section",
+    "table",
+    "tbody",
+    "thead",
+    "tfoot",
+    "tr",
+    "ul",
+}
+# Elements whose text is never rendered.
+HIDDEN_TAGS = {"script", "style", "noscript", "template"}
+WHITESPACE = re.compile(r"\s+")
+
+
+def render_text(element: html.HtmlElement, parts: List[str]) -> None:
+    """
+    Collect the text of an element as it would be laid out, with a line break around
+    each block element and `<br>`, and a space between table cells.
+    """
+    if not isinstance(element.tag, str) or element.tag in HIDDEN_TAGS:
+        return
+    if element.tag in BLOCK_TAGS or element.tag == "br":
+        parts.append("\n")
+    if element.text:
+        parts.append(WHITESPACE.sub(" ", element.text))
+    for child in element:
+        render_text(child, parts)
+        if child.tail:
+            parts.append(WHITESPACE.sub(" ", child.tail))
+    if element.tag in BLOCK_TAGS:
+        parts.append("\n")
+    elif element.tag in ("td", "th"):
+        parts.append(" ")
+
+
+def to_css_selector(by: str, value: str) -> Optional[str]:
+    """Translate a Selenium locator into an equivalent CSS selector, if there is one."""
+    if by == By.CSS_SELECTOR:
+        return value
+    if by == By.CLASS_NAME:
+        return f".{value}"
+    if by == By.TAG_NAME:
+        return value
+    if by == By.ID:
+        return f'[id="{value}"]'
+    if by == By.NAME:
+        return f'[name="{value}"]'
+    return None
+
+
+class StaticElement:
+    """An element of a `StaticPage`, standing in for a `WebElement`."""
+
+    def __init__(self, element: html.HtmlElement):
+        self.element = element
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, StaticElement) and other.element is self.element
+
+    def __hash__(self) -> int:
+        return hash(self.element)
+
+    @property
+    def tag_name(self) -> str:
+        """The element's tag, like `div`."""
+        return self.element.tag
+
+    @property
+    def text(self) -> str:
+        """
+        The element's rendered text, roughly matching what `WebElement.text` would
+        return: whitespace in the markup collapses to single spaces, and lines only
+        break around block elements and `<br>`.
+        """
+        parts: List[str] = []
+        render_text(self.element, parts)
+        lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+    def text_content(self) -> str:
+        """All text within the element, exactly as it appears in the markup."""
+        return self.element.text_content()
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        """Return an HTML attribute, or one of the text properties a browser would expose."""
+        if name == "textContent":
+            return self.text_content()
+        if name == "innerText":
+            return self.text
+        return self.element.get(name)
+
+    def click(self) -> None:
+        """Tabs and panels are captured separately, so there's nothing to click."""
+
+    def find_elements(self, by: str, value: str) -> List["StaticElement"]:
+        """Return every element within this one that matches the locator."""
+        css_selector = to_css_selector(by, value)
+        if css_selector is not None:
+            matches = self.element.cssselect(css_selector)
+        elif by == By.XPATH:
+            try:
+                matches = self.element.xpath(value)
+            except XPathError as error:
+                raise NoSuchElementException(str(error)) from error
+        else:
+            raise NotImplementedError(f"Unsupported locator: {by}")
+
+        return [StaticElement(match) for match in matches]
+
+    def find_element(self, by: str, value: str) -> "StaticElement":
+        """Return the first element within this one that matches the locator."""
+        matches = self.find_elements(by, value)
+        if not matches:
+            raise NoSuchElementException(f"No element found for {by}={value}")
+        return matches[0]
+
+    def summarize(self, selectors: List[str]) -> dict:
+        """
+        Return the classes of everything within this element, and whether each selector
+        matches anything within it, the same way that `ROW_SUMMARY_SCRIPT` does.
+        """
+        classes = {
+            class_name
+            for class_attribute in self.element.xpath(".//*/@class")
+            for class_name in class_attribute.split()
+        }
+        return {
+            "classes": list(classes),
+            "present": [
+                bool(self.element.cssselect(selector)) for selector in selectors
+            ],
+        }
+
+    def read(self, selector: Optional[str], prop: str):
+        """Read a value relative to this element, as described by a `Field`."""
+        matches = self.find_elements(By.CSS_SELECTOR, selector) if selector else [self]
+        if prop == "all":
+            return [match.text for match in matches]
+        if prop == "exists":
+            return bool(matches)
+        if not matches:
+            return None
+        if prop == "text":
+            return matches[0].text
+        if prop.startswith("@"):
+            return matches[0].get_attribute(prop[1:])
+        return matches[0].get_attribute(prop)
+
+
+class StaticPage(StaticElement):
+    """The HTML source of a page, standing in for the `WebDriver` that rendered it."""
+
+    def __init__(self, page_source: str, url: Optional[str] = None):
+        self.page_source = page_source
+        self.current_url = url
+        super().__init__(html.document_fromstring(page_source))
+
+    def extract_rows(
+        self,
+        css_selector: str,
+        field_specs: Dict[str, list],
+        section_css_selector: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Read every field of every row matching `css_selector`, the same way that
+        `EXTRACT_ROWS_SCRIPT` does within a browser.
+        """
+
+        def read_row(row: StaticElement) -> dict:
+            return {
+                name: row.read(selector, prop)
+                for name, (selector, prop) in field_specs.items()
+            }
+
+        if not section_css_selector:
+            return [
+                read_row(row)
+                for row in self.find_elements(By.CSS_SELECTOR, css_selector)
+            ]
+
+        # lxml returns matches for a selector group in document order, like the browser.
+        row_elements = set(self.element.cssselect(css_selector))
+        rows, section = [], None
+        for element in self.find_elements(
+            By.CSS_SELECTOR, f"{section_css_selector}, {css_selector}"
+        ):
+            if element.element in row_elements:
+                rows.append({**read_row(element), "section": section})
+            else:
+                section = element.text
+        return rows